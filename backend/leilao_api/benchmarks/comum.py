@@ -0,0 +1,56 @@
+"""Utilitários compartilhados pelos benchmarks.
+
+Os benchmarks usam o banco configurado em src.config e criam seus próprios
+dados (uma campanha, uma categoria e itens), removidos ao final.
+"""
+
+from src.db import create_dedicated_connection
+
+def criar_dados(quantidade_itens):
+    """Cria uma campanha de benchmark com itens e retorna (campanha_id, itens)."""
+    conn = create_dedicated_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute(
+            "INSERT INTO campanhas (nome, ano, status) VALUES ('Benchmark', 2000, 'ativa') RETURNING id"
+        )
+        campanha_id = cursor.fetchone()[0]
+        cursor.execute(
+            "INSERT INTO categorias (nome) VALUES (%s) RETURNING id",
+            (f'Benchmark {campanha_id}',)
+        )
+        categoria_id = cursor.fetchone()[0]
+        itens = []
+        for numero in range(quantidade_itens):
+            cursor.execute("""
+                INSERT INTO itens (nome, campanha_id, categoria_id, lance_inicial, lance_atual)
+                VALUES (%s, %s, %s, 1, 1)
+                RETURNING id
+            """, (f'Item {numero}', campanha_id, categoria_id))
+            itens.append(cursor.fetchone()[0])
+        conn.commit()
+        return campanha_id, itens
+    finally:
+        conn.close()
+
+def remover_dados(campanha_id):
+    """Remove a campanha de benchmark com seus itens e lances."""
+    conn = create_dedicated_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute("UPDATE itens SET lance_lider_id = NULL WHERE campanha_id = %s", (campanha_id,))
+        cursor.execute("""
+            DELETE FROM lances
+            WHERE item_id IN (SELECT id FROM itens WHERE campanha_id = %s)
+        """, (campanha_id,))
+        cursor.execute(
+            "DELETE FROM itens WHERE campanha_id = %s RETURNING categoria_id",
+            (campanha_id,)
+        )
+        categorias = {row[0] for row in cursor.fetchall()}
+        cursor.execute("DELETE FROM campanhas WHERE id = %s", (campanha_id,))
+        for categoria_id in categorias:
+            cursor.execute("DELETE FROM categorias WHERE id = %s", (categoria_id,))
+        conn.commit()
+    finally:
+        conn.close()
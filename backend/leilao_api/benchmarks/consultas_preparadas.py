@@ -0,0 +1,73 @@
+"""Compara a latência por requisição com e sem prepared statements.
+
+Mede GET /api/itens e POST /api/lances pelo cliente de testes do Flask, no
+mesmo processo, para isolar o tempo gasto pelo banco em analisar e planejar
+as consultas.
+
+Uso (a partir de backend/leilao_api):
+    python -m benchmarks.consultas_preparadas --requisicoes 2000
+"""
+
+import argparse
+import statistics
+import time
+
+from src.config import Config
+from src.main import app
+from benchmarks.comum import criar_dados, remover_dados
+
+def medir(requisicoes, enviar):
+    """Executa as requisições e retorna as latências em milissegundos."""
+    latencias = []
+    for sequencia in range(requisicoes):
+        comeco = time.perf_counter()
+        resposta = enviar(sequencia)
+        latencias.append((time.perf_counter() - comeco) * 1000)
+        if resposta.status_code >= 500:
+            raise RuntimeError(resposta.get_json())
+    return latencias
+
+def resumir(latencias):
+    ordenadas = sorted(latencias)
+    return statistics.mean(latencias), ordenadas[len(ordenadas) * 95 // 100]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requisicoes', type=int, default=2000)
+    parser.add_argument('--itens', type=int, default=50)
+    args = parser.parse_args()
+
+    cliente = app.test_client()
+    campanha_id, itens = criar_dados(args.itens)
+    valor = [1]
+
+    def listar(sequencia):
+        return cliente.get(f'/api/itens?campanha_id={campanha_id}')
+
+    def dar_lance(sequencia):
+        valor[0] += 1
+        return cliente.post('/api/lances', json={
+            'item_id': itens[sequencia % len(itens)],
+            'valor': valor[0],
+            'nome_participante': 'Benchmark',
+            'telefone': '0000000000'
+        })
+
+    try:
+        for rota, enviar in (('GET /api/itens', listar), ('POST /api/lances', dar_lance)):
+            resultados = {}
+            for preparadas in (False, True):
+                Config.CONSULTAS_PREPARADAS = preparadas
+                # Aquecimento: abre a conexão do pool e prepara as consultas
+                medir(50, enviar)
+                resultados[preparadas] = resumir(medir(args.requisicoes, enviar))
+            (media_sql, p95_sql), (media_prep, p95_prep) = resultados[False], resultados[True]
+            print(f"{rota}")
+            print(f"  SQL a cada chamada: média {media_sql:6.3f} ms  p95 {p95_sql:6.3f} ms")
+            print(f"  Prepared statement: média {media_prep:6.3f} ms  p95 {p95_prep:6.3f} ms "
+                  f"({media_sql - media_prep:+.3f} ms economizados)")
+    finally:
+        remover_dados(campanha_id)
+
+if __name__ == '__main__':
+    main()
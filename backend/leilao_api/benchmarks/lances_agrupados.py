@@ -0,0 +1,71 @@
+"""Compara lances por segundo com e sem a gravação agrupada.
+
+Uso (a partir de backend/leilao_api):
+    python -m benchmarks.lances_agrupados --threads 32 --lances 200
+"""
+
+import argparse
+import threading
+import time
+
+from src.db import create_dedicated_connection
+from src.gravacao_agrupada import GravacaoAgrupada
+from src.precos import registrar_lance
+from benchmarks.comum import criar_dados, remover_dados
+
+def executar(threads, lances_por_thread, itens, registrar):
+    """Dispara os lances em paralelo e retorna lances por segundo."""
+    inicio = threading.Barrier(threads + 1)
+
+    def trabalhador(numero):
+        enviar = registrar()
+        inicio.wait()
+        for sequencia in range(lances_por_thread):
+            item_id = itens[(numero + sequencia) % len(itens)]
+            # Valores sempre crescentes por thread para que a maioria seja aceita
+            enviar(item_id, 2 + sequencia * threads + numero, 'Benchmark', '0000000000')
+
+    trabalhadores = [threading.Thread(target=trabalhador, args=(n,)) for n in range(threads)]
+    for trabalhador_thread in trabalhadores:
+        trabalhador_thread.start()
+    inicio.wait()
+    comeco = time.perf_counter()
+    for trabalhador_thread in trabalhadores:
+        trabalhador_thread.join()
+    return threads * lances_por_thread / (time.perf_counter() - comeco)
+
+def registrar_direto():
+    conn = create_dedicated_connection()
+    cursor = conn.cursor()
+
+    def enviar(item_id, valor, nome, telefone):
+        registrar_lance(cursor, item_id, valor, nome, telefone)
+        conn.commit()
+    return enviar
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--threads', type=int, default=32)
+    parser.add_argument('--lances', type=int, default=200, help='lances por thread')
+    parser.add_argument('--itens', type=int, default=10)
+    parser.add_argument('--lote', type=int, default=100)
+    parser.add_argument('--intervalo-ms', type=int, default=3)
+    args = parser.parse_args()
+
+    campanha_id, itens = criar_dados(args.itens)
+    try:
+        direto = executar(args.threads, args.lances, itens, registrar_direto)
+        print(f"Um commit por lance: {direto:10.0f} lances/s")
+
+        gravacao = GravacaoAgrupada(tamanho_lote=args.lote, intervalo=args.intervalo_ms / 1000)
+        gravacao.iniciar()
+        try:
+            agrupado = executar(args.threads, args.lances, itens, lambda: gravacao.registrar_lance)
+        finally:
+            gravacao.parar()
+        print(f"Gravação agrupada:   {agrupado:10.0f} lances/s ({agrupado / direto:.1f}x)")
+    finally:
+        remover_dados(campanha_id)
+
+if __name__ == '__main__':
+    main()
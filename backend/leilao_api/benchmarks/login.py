@@ -0,0 +1,110 @@
+"""Mede a vazão de POST /api/login com diferentes custos do bcrypt.
+
+Dispara logins simultâneos pelo cliente de testes do Flask, com o hash de
+senhas no pool da aplicação, e mostra para cada custo os logins por segundo,
+a latência p95 e quantos foram recusados com 503 pela fila cheia. Enquanto os
+logins correm, uma thread faz GET /api/itens para mostrar o efeito sobre as
+rotas públicas.
+
+Uso (a partir de backend/leilao_api):
+    python -m benchmarks.login --custos 10,11,12 --logins 200 --concorrencia 16
+"""
+
+import argparse
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from src.config import Config
+from src.db import create_dedicated_connection
+from src.main import app
+from src.senhas import gerar_hash
+
+EMAIL = 'benchmark-login@exemplo.com'
+SENHA = 'senha-do-benchmark'
+
+def preparar_usuario(custo):
+    """Cria (ou atualiza) o usuário do benchmark com o hash no custo informado."""
+    conn = create_dedicated_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute("""
+            INSERT INTO usuarios (nome, email, senha, permissao)
+            VALUES ('Benchmark', %s, %s, 'gestor')
+            ON CONFLICT (email) DO UPDATE SET senha = EXCLUDED.senha
+        """, (EMAIL, gerar_hash(SENHA, custo)))
+        conn.commit()
+    finally:
+        conn.close()
+
+def remover_usuario():
+    conn = create_dedicated_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute("DELETE FROM usuarios WHERE email = %s", (EMAIL,))
+        conn.commit()
+    finally:
+        conn.close()
+
+def medir(logins, concorrencia):
+    """Retorna (duração, latências dos logins aceitos, recusados, latências das leituras)."""
+    cliente = app.test_client()
+    latencias, recusados, leituras = [], [0], []
+    terminou = threading.Event()
+
+    def logar(_):
+        comeco = time.perf_counter()
+        resposta = cliente.post('/api/login', json={'email': EMAIL, 'senha': SENHA})
+        if resposta.status_code == 503:
+            recusados[0] += 1
+        elif resposta.status_code != 200:
+            raise RuntimeError(resposta.get_json())
+        else:
+            latencias.append((time.perf_counter() - comeco) * 1000)
+
+    def ler():
+        while not terminou.is_set():
+            comeco = time.perf_counter()
+            cliente.get('/api/itens')
+            leituras.append((time.perf_counter() - comeco) * 1000)
+            time.sleep(0.01)
+
+    leitor = threading.Thread(target=ler)
+    leitor.start()
+    comeco = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concorrencia) as executor:
+        list(executor.map(logar, range(logins)))
+    duracao = time.perf_counter() - comeco
+    terminou.set()
+    leitor.join()
+    return duracao, latencias, recusados[0], leituras
+
+def p95(valores):
+    if not valores:
+        return 0.0
+    ordenados = sorted(valores)
+    return ordenados[len(ordenados) * 95 // 100]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--custos', default='10,11,12')
+    parser.add_argument('--logins', type=int, default=200)
+    parser.add_argument('--concorrencia', type=int, default=16)
+    args = parser.parse_args()
+
+    print(f"{args.logins} logins, {args.concorrencia} simultâneos, "
+          f"{Config.SENHAS_TRABALHADORES} trabalhadores e fila de {Config.SENHAS_FILA}:")
+    try:
+        for custo in (int(valor) for valor in args.custos.split(',')):
+            # Mesmo custo no hash e na configuração, para não medir o rehash
+            Config.BCRYPT_CUSTO = custo
+            preparar_usuario(custo)
+            duracao, latencias, recusados, leituras = medir(args.logins, args.concorrencia)
+            print(f"  custo {custo:2d}: {len(latencias) / duracao:7.1f} logins/s  "
+                  f"p95 {p95(latencias):7.1f} ms  recusados {recusados:4d}  "
+                  f"GET /api/itens p95 {p95(leituras):6.1f} ms")
+    finally:
+        remover_usuario()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,125 @@
+"""Mede o tempo de serialização de linhas do banco em JSON.
+
+Compara, para 10 mil linhas no formato da listagem de itens, a montagem
+manual dos dicts com jsonify padrão do Flask, o Mapeador com o provedor JSON
+da aplicação e, com --banco, a listagem montada pelo Postgres com json_agg.
+
+Uso (a partir de backend/leilao_api):
+    python -m benchmarks.serializacao --linhas 10000 [--banco]
+"""
+
+import argparse
+import json
+import time
+from datetime import datetime, timezone
+from decimal import Decimal
+
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+
+from src import serializacao
+from src.serializacao import Mapeador, serializar
+
+MAPA_ITEM = Mapeador(
+    'id', 'nome', 'lance_inicial', 'banner_16_9', 'banner_1_1',
+    ('campanha', 'id', 'nome'),
+    ('categoria', 'id', 'nome'),
+    'lance_atual', 'total_lances', 'atualizado_em'
+)
+COLUNAS_ITEM = [
+    'g', "'Item ' || g", '10.00::NUMERIC(10, 2)', "'/banners/' || g || '_16_9.webp'", "'/banners/' || g || '_1_1.webp'",
+    '1', "'Campanha'", 'g % 10', "'Categoria ' || g % 10",
+    '(10 + g)::NUMERIC(10, 2)', 'g % 50', 'now()'
+]
+
+def gerar_linhas(quantidade):
+    agora = datetime.now(timezone.utc)
+    return [(
+        numero, f'Item {numero}', Decimal('10.00'),
+        f'/banners/{numero}_16_9.webp', f'/banners/{numero}_1_1.webp',
+        1, 'Campanha', numero % 10, f'Categoria {numero % 10}',
+        Decimal(10 + numero).quantize(Decimal('0.01')), numero % 50, agora
+    ) for numero in range(quantidade)]
+
+def manual(linhas):
+    """Como as rotas faziam: índices, float() e isoformat() à mão."""
+    result = []
+    for item in linhas:
+        result.append({
+            'id': item[0],
+            'nome': item[1],
+            'lance_inicial': float(item[2]),
+            'banner_16_9': item[3],
+            'banner_1_1': item[4],
+            'campanha': {
+                'id': item[5],
+                'nome': item[6]
+            },
+            'categoria': {
+                'id': item[7],
+                'nome': item[8]
+            },
+            'lance_atual': float(item[9]),
+            'total_lances': item[10],
+            'atualizado_em': item[11].isoformat()
+        })
+    return result
+
+def medir(funcao, repeticoes):
+    """Retorna o menor tempo, em milissegundos, entre as repetições."""
+    tempos = []
+    for _ in range(repeticoes):
+        comeco = time.perf_counter()
+        funcao()
+        tempos.append((time.perf_counter() - comeco) * 1000)
+    return min(tempos)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--linhas', type=int, default=10000)
+    parser.add_argument('--repeticoes', type=int, default=10)
+    parser.add_argument('--banco', action='store_true', help='inclui a comparação com json_agg')
+    args = parser.parse_args()
+
+    linhas = gerar_linhas(args.linhas)
+    padrao = DefaultJSONProvider(Flask(__name__))
+    orjson = serializacao.orjson
+
+    resultados = [
+        ('Manual + json do Flask', medir(lambda: padrao.dumps(manual(linhas)).encode('utf-8'), args.repeticoes)),
+    ]
+    serializacao.orjson = None
+    resultados.append(('Mapeador + json', medir(lambda: serializar(MAPA_ITEM.lista(linhas)), args.repeticoes)))
+    serializacao.orjson = orjson
+    if orjson:
+        resultados.append(('Mapeador + orjson', medir(lambda: serializar(MAPA_ITEM.lista(linhas)), args.repeticoes)))
+
+    if args.banco:
+        from src.db import create_dedicated_connection
+        conn = create_dedicated_connection()
+        try:
+            cursor = conn.cursor()
+            origem = f" FROM generate_series(1, {args.linhas}) g"
+            sql_linhas = f"SELECT {', '.join(COLUNAS_ITEM)}" + origem
+            sql_json = f"SELECT json_agg({MAPA_ITEM.objeto_json(COLUNAS_ITEM)})::text" + origem
+
+            def consultar_e_serializar():
+                cursor.execute(sql_linhas)
+                serializar(MAPA_ITEM.lista(cursor.fetchall()))
+
+            def consultar_json_agg():
+                cursor.execute(sql_json)
+                cursor.fetchone()[0].encode('utf-8')
+
+            resultados.append(('Consulta + Mapeador', medir(consultar_e_serializar, args.repeticoes)))
+            resultados.append(('Consulta com json_agg', medir(consultar_json_agg, args.repeticoes)))
+        finally:
+            conn.close()
+
+    referencia = resultados[0][1]
+    print(f"Serialização de {args.linhas} linhas (melhor de {args.repeticoes}):")
+    for descricao, tempo in resultados:
+        print(f"  {descricao:24s} {tempo:8.1f} ms  ({referencia / tempo:.1f}x)")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,34 @@
+-- Preço atual, lance líder e quantidade de lances desnormalizados em itens
+
+ALTER TABLE itens ADD COLUMN IF NOT EXISTS lance_atual NUMERIC(10, 2);
+ALTER TABLE itens ADD COLUMN IF NOT EXISTS lance_lider_id INTEGER;
+ALTER TABLE itens ADD COLUMN IF NOT EXISTS total_lances INTEGER NOT NULL DEFAULT 0;
+
+DO $$
+BEGIN
+    IF NOT EXISTS (
+        SELECT 1 FROM pg_constraint WHERE conname = 'itens_lance_lider_fk'
+    ) THEN
+        ALTER TABLE itens ADD CONSTRAINT itens_lance_lider_fk
+            FOREIGN KEY (lance_lider_id) REFERENCES lances(id)
+            DEFERRABLE INITIALLY DEFERRED;
+    END IF;
+END $$;
+
+-- Preenche a partir dos lances existentes
+UPDATE itens
+SET lance_atual = COALESCE(lider.valor, itens.lance_inicial),
+    lance_lider_id = lider.id,
+    total_lances = (SELECT COUNT(*) FROM lances l WHERE l.item_id = itens.id)
+FROM itens i
+LEFT JOIN LATERAL (
+    SELECT l.id, l.valor
+    FROM lances l
+    WHERE l.item_id = i.id
+    ORDER BY l.valor DESC, l.id
+    LIMIT 1
+) lider ON true
+WHERE itens.id = i.id AND itens.lance_atual IS NULL;
+
+SET CONSTRAINTS itens_lance_lider_fk IMMEDIATE;
+ALTER TABLE itens ALTER COLUMN lance_atual SET NOT NULL;
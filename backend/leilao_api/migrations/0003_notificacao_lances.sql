@@ -0,0 +1,19 @@
+-- Publica cada lance gravado no canal 'lances_novos' (entregue no commit)
+
+CREATE OR REPLACE FUNCTION notificar_lance() RETURNS trigger AS $$
+BEGIN
+    PERFORM pg_notify('lances_novos', json_build_object(
+        'id', NEW.id,
+        'item_id', NEW.item_id,
+        'campanha_id', (SELECT campanha_id FROM itens WHERE id = NEW.item_id),
+        'valor', NEW.valor,
+        'data_lance', NEW.data_lance
+    )::text);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS lances_notificar ON lances;
+CREATE TRIGGER lances_notificar
+    AFTER INSERT ON lances
+    FOR EACH ROW EXECUTE FUNCTION notificar_lance();
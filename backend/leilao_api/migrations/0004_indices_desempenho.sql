@@ -0,0 +1,30 @@
+-- Índices para as consultas mais frequentes das rotas
+
+-- Últimos lances de um item (GET /itens/<id>) e filtro por item em GET /lances;
+-- também atende às checagens da FK lances.item_id
+CREATE INDEX IF NOT EXISTS lances_item_data_idx
+    ON lances (item_id, data_lance DESC, id DESC) INCLUDE (valor);
+
+-- Listagem paginada de lances, últimos lances e dashboard
+CREATE INDEX IF NOT EXISTS lances_data_idx
+    ON lances (data_lance DESC, id DESC);
+
+-- Catálogo por campanha (GET /itens?campanha_id=), ordenado por id
+CREATE INDEX IF NOT EXISTS itens_campanha_idx
+    ON itens (campanha_id, id DESC);
+
+-- Filtro de lances por categoria e checagens da FK itens.categoria_id
+CREATE INDEX IF NOT EXISTS itens_categoria_idx
+    ON itens (categoria_id);
+
+-- GET /campanhas?status= ordenado por ano e contagem de campanhas ativas
+CREATE INDEX IF NOT EXISTS campanhas_status_ano_idx
+    ON campanhas (status, ano DESC);
+
+-- Log de auditoria paginado
+CREATE INDEX IF NOT EXISTS auditoria_data_idx
+    ON auditoria (data_acao DESC, id DESC);
+
+-- Checagens da FK auditoria.usuario_id ao remover usuários
+CREATE INDEX IF NOT EXISTS auditoria_usuario_idx
+    ON auditoria (usuario_id);
@@ -0,0 +1,124 @@
+-- Contadores do dashboard mantidos por triggers a cada escrita.
+-- Os totais ficam distribuídos em 8 fatias, escolhidas ao acaso por comando,
+-- para que lances simultâneos não disputem a mesma linha; a leitura soma as fatias.
+
+CREATE TABLE IF NOT EXISTS resumo_dashboard (
+    fatia SMALLINT PRIMARY KEY,
+    campanhas_ativas BIGINT NOT NULL DEFAULT 0,
+    total_itens BIGINT NOT NULL DEFAULT 0,
+    total_lances BIGINT NOT NULL DEFAULT 0,
+    valor_arrecadado NUMERIC(14, 2) NOT NULL DEFAULT 0
+);
+
+INSERT INTO resumo_dashboard (fatia)
+SELECT generate_series(0, 7)
+ON CONFLICT DO NOTHING;
+
+CREATE OR REPLACE FUNCTION atualizar_resumo_lances() RETURNS trigger AS $$
+DECLARE
+    sorteada SMALLINT := floor(random() * 8);
+    delta_lances BIGINT := 0;
+    delta_valor NUMERIC := 0;
+BEGIN
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        SELECT delta_lances + COUNT(*), delta_valor + COALESCE(SUM(valor), 0)
+        INTO delta_lances, delta_valor FROM novos;
+    END IF;
+    IF TG_OP IN ('DELETE', 'UPDATE') THEN
+        SELECT delta_lances - COUNT(*), delta_valor - COALESCE(SUM(valor), 0)
+        INTO delta_lances, delta_valor FROM antigos;
+    END IF;
+    IF delta_lances <> 0 OR delta_valor <> 0 THEN
+        UPDATE resumo_dashboard
+        SET total_lances = total_lances + delta_lances,
+            valor_arrecadado = valor_arrecadado + delta_valor
+        WHERE fatia = sorteada;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION atualizar_resumo_itens() RETURNS trigger AS $$
+DECLARE
+    sorteada SMALLINT := floor(random() * 8);
+    delta BIGINT;
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        SELECT COUNT(*) INTO delta FROM novos;
+    ELSE
+        SELECT -COUNT(*) INTO delta FROM antigos;
+    END IF;
+    IF delta <> 0 THEN
+        UPDATE resumo_dashboard
+        SET total_itens = total_itens + delta
+        WHERE fatia = sorteada;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION atualizar_resumo_campanhas() RETURNS trigger AS $$
+DECLARE
+    sorteada SMALLINT := floor(random() * 8);
+    delta BIGINT := 0;
+BEGIN
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        SELECT delta + COUNT(*) INTO delta FROM novos WHERE status = 'ativa';
+    END IF;
+    IF TG_OP IN ('DELETE', 'UPDATE') THEN
+        SELECT delta - COUNT(*) INTO delta FROM antigos WHERE status = 'ativa';
+    END IF;
+    IF delta <> 0 THEN
+        UPDATE resumo_dashboard
+        SET campanhas_ativas = campanhas_ativas + delta
+        WHERE fatia = sorteada;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS lances_resumo_insert ON lances;
+CREATE TRIGGER lances_resumo_insert AFTER INSERT ON lances
+    REFERENCING NEW TABLE AS novos
+    FOR EACH STATEMENT EXECUTE FUNCTION atualizar_resumo_lances();
+DROP TRIGGER IF EXISTS lances_resumo_update ON lances;
+CREATE TRIGGER lances_resumo_update AFTER UPDATE ON lances
+    REFERENCING NEW TABLE AS novos OLD TABLE AS antigos
+    FOR EACH STATEMENT EXECUTE FUNCTION atualizar_resumo_lances();
+DROP TRIGGER IF EXISTS lances_resumo_delete ON lances;
+CREATE TRIGGER lances_resumo_delete AFTER DELETE ON lances
+    REFERENCING OLD TABLE AS antigos
+    FOR EACH STATEMENT EXECUTE FUNCTION atualizar_resumo_lances();
+
+DROP TRIGGER IF EXISTS itens_resumo_insert ON itens;
+CREATE TRIGGER itens_resumo_insert AFTER INSERT ON itens
+    REFERENCING NEW TABLE AS novos
+    FOR EACH STATEMENT EXECUTE FUNCTION atualizar_resumo_itens();
+DROP TRIGGER IF EXISTS itens_resumo_delete ON itens;
+CREATE TRIGGER itens_resumo_delete AFTER DELETE ON itens
+    REFERENCING OLD TABLE AS antigos
+    FOR EACH STATEMENT EXECUTE FUNCTION atualizar_resumo_itens();
+
+DROP TRIGGER IF EXISTS campanhas_resumo_insert ON campanhas;
+CREATE TRIGGER campanhas_resumo_insert AFTER INSERT ON campanhas
+    REFERENCING NEW TABLE AS novos
+    FOR EACH STATEMENT EXECUTE FUNCTION atualizar_resumo_campanhas();
+DROP TRIGGER IF EXISTS campanhas_resumo_update ON campanhas;
+CREATE TRIGGER campanhas_resumo_update AFTER UPDATE ON campanhas
+    REFERENCING NEW TABLE AS novos OLD TABLE AS antigos
+    FOR EACH STATEMENT EXECUTE FUNCTION atualizar_resumo_campanhas();
+DROP TRIGGER IF EXISTS campanhas_resumo_delete ON campanhas;
+CREATE TRIGGER campanhas_resumo_delete AFTER DELETE ON campanhas
+    REFERENCING OLD TABLE AS antigos
+    FOR EACH STATEMENT EXECUTE FUNCTION atualizar_resumo_campanhas();
+
+-- Preenche os contadores com os dados existentes
+UPDATE resumo_dashboard
+SET campanhas_ativas = (SELECT COUNT(*) FROM campanhas WHERE status = 'ativa'),
+    total_itens = (SELECT COUNT(*) FROM itens),
+    total_lances = (SELECT COUNT(*) FROM lances),
+    valor_arrecadado = (SELECT COALESCE(SUM(valor), 0) FROM lances)
+WHERE fatia = 0;
+UPDATE resumo_dashboard
+SET campanhas_ativas = 0, total_itens = 0, total_lances = 0, valor_arrecadado = 0
+WHERE fatia <> 0;
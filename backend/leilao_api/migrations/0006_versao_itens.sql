@@ -0,0 +1,46 @@
+-- Versão de cada item para o feed de alterações (GET /api/itens/changes)
+--
+-- A versão é o ID da transação que alterou o item por último. Como IDs de
+-- transação só crescem, o feed usa como marca d'água o xmin do snapshot: toda
+-- transação com ID menor já terminou, então nenhuma alteração abaixo dele
+-- pode aparecer depois.
+
+ALTER TABLE itens ADD COLUMN IF NOT EXISTS versao BIGINT NOT NULL DEFAULT 0;
+
+UPDATE itens SET versao = pg_current_xact_id()::text::BIGINT;
+
+CREATE OR REPLACE FUNCTION marcar_versao_item() RETURNS trigger AS $$
+BEGIN
+    NEW.versao := pg_current_xact_id()::text::BIGINT;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS itens_versao ON itens;
+CREATE TRIGGER itens_versao
+    BEFORE INSERT OR UPDATE ON itens
+    FOR EACH ROW EXECUTE FUNCTION marcar_versao_item();
+
+CREATE INDEX IF NOT EXISTS itens_versao_idx ON itens (versao);
+
+-- Itens removidos, para que o feed também avise as exclusões
+CREATE TABLE IF NOT EXISTS itens_removidos (
+    item_id INTEGER PRIMARY KEY,
+    campanha_id INTEGER NOT NULL,
+    versao BIGINT NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS itens_removidos_versao_idx ON itens_removidos (versao);
+
+CREATE OR REPLACE FUNCTION registrar_item_removido() RETURNS trigger AS $$
+BEGIN
+    INSERT INTO itens_removidos (item_id, campanha_id, versao)
+    VALUES (OLD.id, OLD.campanha_id, pg_current_xact_id()::text::BIGINT);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS itens_removidos_registrar ON itens;
+CREATE TRIGGER itens_removidos_registrar
+    AFTER DELETE ON itens
+    FOR EACH ROW EXECUTE FUNCTION registrar_item_removido();
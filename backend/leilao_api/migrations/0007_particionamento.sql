@@ -0,0 +1,217 @@
+-- Particionamento de lances (por campanha) e auditoria (por mês)
+--
+-- Cada campanha tem a sua partição de lances, criada junto com a campanha.
+-- Quando a campanha é encerrada, a partição pode ser desanexada de lances e
+-- anexada a lances_arquivo (flask arquivar-lances): as consultas do leilão
+-- em andamento passam a percorrer só as campanhas ainda anexadas, por maior
+-- que seja o histórico. A auditoria é dividida por mês de data_acao.
+--
+-- A chave primária de uma tabela particionada precisa incluir a chave de
+-- partição, então lances.id deixa de ser único sozinho para o banco (a
+-- sequência continua garantindo IDs distintos) e a chave estrangeira de
+-- itens.lance_lider_id para lances é removida.
+
+ALTER TABLE itens DROP CONSTRAINT IF EXISTS itens_lance_lider_fk;
+
+-- Partição de lances de uma campanha; move para ela os lances da campanha que
+-- tenham caído na partição padrão
+CREATE OR REPLACE FUNCTION criar_particao_lances(campanha INTEGER) RETURNS void AS $$
+DECLARE
+    nome TEXT := 'lances_campanha_' || campanha;
+BEGIN
+    IF to_regclass(nome) IS NOT NULL THEN
+        RETURN;
+    END IF;
+    EXECUTE format('CREATE TABLE %I (LIKE lances INCLUDING DEFAULTS)', nome);
+    EXECUTE format(
+        'WITH movidos AS (DELETE FROM lances_padrao WHERE campanha_id = %s RETURNING *)
+         INSERT INTO %I SELECT * FROM movidos',
+        campanha, nome
+    );
+    EXECUTE format('ALTER TABLE lances ATTACH PARTITION %I FOR VALUES IN (%s)', nome, campanha);
+END;
+$$ LANGUAGE plpgsql;
+
+-- Partição de auditoria do mês, com o mesmo cuidado com a partição padrão
+CREATE OR REPLACE FUNCTION criar_particao_auditoria(mes DATE) RETURNS void AS $$
+DECLARE
+    inicio DATE := date_trunc('month', mes);
+    fim DATE := date_trunc('month', mes) + INTERVAL '1 month';
+    nome TEXT := 'auditoria_' || to_char(mes, 'YYYY_MM');
+BEGIN
+    IF to_regclass(nome) IS NOT NULL THEN
+        RETURN;
+    END IF;
+    EXECUTE format('CREATE TABLE %I (LIKE auditoria INCLUDING DEFAULTS)', nome);
+    EXECUTE format(
+        'WITH movidas AS (DELETE FROM auditoria_padrao WHERE data_acao >= %L AND data_acao < %L RETURNING *)
+         INSERT INTO %I SELECT * FROM movidas',
+        inicio, fim, nome
+    );
+    EXECUTE format(
+        'ALTER TABLE auditoria ATTACH PARTITION %I FOR VALUES FROM (%L) TO (%L)',
+        nome, inicio, fim
+    );
+END;
+$$ LANGUAGE plpgsql;
+
+DO $$
+BEGIN
+    IF (SELECT relkind FROM pg_class WHERE oid = 'lances'::regclass) = 'p' THEN
+        RETURN;
+    END IF;
+
+    -- Lances: a tabela antiga sai do caminho, mantendo a sequência dos IDs
+    ALTER TABLE lances RENAME TO lances_antiga;
+    ALTER TABLE lances_antiga RENAME CONSTRAINT lances_pkey TO lances_antiga_pkey;
+    ALTER SEQUENCE lances_id_seq OWNED BY NONE;
+
+    CREATE TABLE lances (
+        id INTEGER NOT NULL DEFAULT nextval('lances_id_seq'),
+        campanha_id INTEGER NOT NULL,
+        item_id INTEGER NOT NULL REFERENCES itens(id),
+        valor NUMERIC(10, 2) NOT NULL,
+        nome_participante VARCHAR(255) NOT NULL,
+        telefone VARCHAR(20) NOT NULL,
+        data_lance TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (id, campanha_id)
+    ) PARTITION BY LIST (campanha_id);
+    ALTER SEQUENCE lances_id_seq OWNED BY lances.id;
+
+    CREATE TABLE lances_padrao PARTITION OF lances DEFAULT;
+    PERFORM criar_particao_lances(id) FROM campanhas;
+
+    INSERT INTO lances (id, campanha_id, item_id, valor, nome_participante, telefone, data_lance)
+    SELECT l.id, i.campanha_id, l.item_id, l.valor, l.nome_participante, l.telefone, l.data_lance
+    FROM lances_antiga l
+    JOIN itens i ON i.id = l.item_id;
+
+    DROP TABLE lances_antiga;
+
+    -- Auditoria, da mesma forma, com uma partição por mês desde o registro mais antigo
+    ALTER TABLE auditoria RENAME TO auditoria_antiga;
+    ALTER TABLE auditoria_antiga RENAME CONSTRAINT auditoria_pkey TO auditoria_antiga_pkey;
+    ALTER SEQUENCE auditoria_id_seq OWNED BY NONE;
+
+    CREATE TABLE auditoria (
+        id INTEGER NOT NULL DEFAULT nextval('auditoria_id_seq'),
+        usuario_id INTEGER REFERENCES usuarios(id),
+        acao TEXT NOT NULL,
+        data_acao TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (id, data_acao)
+    ) PARTITION BY RANGE (data_acao);
+    ALTER SEQUENCE auditoria_id_seq OWNED BY auditoria.id;
+
+    CREATE TABLE auditoria_padrao PARTITION OF auditoria DEFAULT;
+    PERFORM criar_particao_auditoria(mes::DATE)
+    FROM generate_series(
+        date_trunc('month', COALESCE((SELECT MIN(data_acao) FROM auditoria_antiga), now())),
+        date_trunc('month', now()) + INTERVAL '2 months',
+        INTERVAL '1 month'
+    ) mes;
+
+    INSERT INTO auditoria (id, usuario_id, acao, data_acao)
+    SELECT id, usuario_id, acao, COALESCE(data_acao, now())
+    FROM auditoria_antiga;
+
+    DROP TABLE auditoria_antiga;
+END;
+$$;
+
+-- Lances das campanhas arquivadas, desanexados de lances
+CREATE TABLE IF NOT EXISTS lances_arquivo (
+    id INTEGER NOT NULL,
+    campanha_id INTEGER NOT NULL,
+    item_id INTEGER NOT NULL REFERENCES itens(id),
+    valor NUMERIC(10, 2) NOT NULL,
+    nome_participante VARCHAR(255) NOT NULL,
+    telefone VARCHAR(20) NOT NULL,
+    data_lance TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (id, campanha_id)
+) PARTITION BY LIST (campanha_id);
+
+-- Todos os lances, anexados ou arquivados, para recálculos e relatórios
+CREATE OR REPLACE VIEW lances_historico AS
+    SELECT * FROM lances
+    UNION ALL
+    SELECT * FROM lances_arquivo;
+
+CREATE INDEX IF NOT EXISTS lances_item_data_idx ON lances (item_id, data_lance DESC, id DESC) INCLUDE (valor);
+CREATE INDEX IF NOT EXISTS lances_data_idx ON lances (data_lance DESC, id DESC);
+CREATE INDEX IF NOT EXISTS lances_arquivo_item_idx ON lances_arquivo (item_id, data_lance DESC, id DESC) INCLUDE (valor);
+CREATE INDEX IF NOT EXISTS auditoria_data_idx ON auditoria (data_acao DESC, id DESC);
+CREATE INDEX IF NOT EXISTS auditoria_usuario_idx ON auditoria (usuario_id);
+
+-- A campanha já vem com a sua partição de lances, removida junto com ela
+CREATE OR REPLACE FUNCTION criar_particao_lances_campanha() RETURNS trigger AS $$
+BEGIN
+    PERFORM criar_particao_lances(NEW.id);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION remover_particao_lances_campanha() RETURNS trigger AS $$
+BEGIN
+    EXECUTE format('DROP TABLE IF EXISTS %I', 'lances_campanha_' || OLD.id);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS campanhas_particao_lances ON campanhas;
+CREATE TRIGGER campanhas_particao_lances
+    AFTER INSERT ON campanhas
+    FOR EACH ROW EXECUTE FUNCTION criar_particao_lances_campanha();
+
+DROP TRIGGER IF EXISTS campanhas_remover_particao_lances ON campanhas;
+CREATE TRIGGER campanhas_remover_particao_lances
+    AFTER DELETE ON campanhas
+    FOR EACH ROW EXECUTE FUNCTION remover_particao_lances_campanha();
+
+-- Item trocado de campanha leva os seus lances para a partição da nova campanha
+CREATE OR REPLACE FUNCTION mover_lances_item() RETURNS trigger AS $$
+BEGIN
+    UPDATE lances SET campanha_id = NEW.campanha_id
+    WHERE campanha_id = OLD.campanha_id AND item_id = NEW.id;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS itens_mover_lances ON itens;
+CREATE TRIGGER itens_mover_lances
+    AFTER UPDATE OF campanha_id ON itens
+    FOR EACH ROW
+    WHEN (OLD.campanha_id IS DISTINCT FROM NEW.campanha_id)
+    EXECUTE FUNCTION mover_lances_item();
+
+-- O lance já traz a campanha, sem consultar itens a cada notificação
+CREATE OR REPLACE FUNCTION notificar_lance() RETURNS trigger AS $$
+BEGIN
+    PERFORM pg_notify('lances_novos', json_build_object(
+        'id', NEW.id,
+        'item_id', NEW.item_id,
+        'campanha_id', NEW.campanha_id,
+        'valor', NEW.valor,
+        'data_lance', NEW.data_lance
+    )::text);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Os triggers da tabela antiga foram removidos junto com ela
+DROP TRIGGER IF EXISTS lances_notificar ON lances;
+CREATE TRIGGER lances_notificar
+    AFTER INSERT ON lances
+    FOR EACH ROW EXECUTE FUNCTION notificar_lance();
+
+DROP TRIGGER IF EXISTS lances_resumo_insert ON lances;
+CREATE TRIGGER lances_resumo_insert AFTER INSERT ON lances
+    REFERENCING NEW TABLE AS novos
+    FOR EACH STATEMENT EXECUTE FUNCTION atualizar_resumo_lances();
+DROP TRIGGER IF EXISTS lances_resumo_update ON lances;
+CREATE TRIGGER lances_resumo_update AFTER UPDATE ON lances
+    REFERENCING NEW TABLE AS novos OLD TABLE AS antigos
+    FOR EACH STATEMENT EXECUTE FUNCTION atualizar_resumo_lances();
+DROP TRIGGER IF EXISTS lances_resumo_delete ON lances;
+CREATE TRIGGER lances_resumo_delete AFTER DELETE ON lances
+    REFERENCING OLD TABLE AS antigos
+    FOR EACH STATEMENT EXECUTE FUNCTION atualizar_resumo_lances();
@@ -0,0 +1,79 @@
+-- Resultado das campanhas encerradas (GET /api/campanhas/<id>/resultados)
+--
+-- O resultado é calculado uma vez, quando a campanha é finalizada, e guardado
+-- pronto em JSON. Triggers marcam o resultado como desatualizado quando
+-- lances ou itens da campanha mudam depois disso; o próximo acesso o
+-- recalcula.
+
+CREATE TABLE IF NOT EXISTS resultados_campanhas (
+    campanha_id INTEGER PRIMARY KEY REFERENCES campanhas(id) ON DELETE CASCADE,
+    resultado JSON NOT NULL,
+    calculado_em TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    desatualizado BOOLEAN NOT NULL DEFAULT false
+);
+
+CREATE OR REPLACE FUNCTION invalidar_resultados_lances() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        UPDATE resultados_campanhas SET desatualizado = true
+        WHERE NOT desatualizado AND campanha_id IN (SELECT campanha_id FROM novos);
+    END IF;
+    IF TG_OP IN ('DELETE', 'UPDATE') THEN
+        UPDATE resultados_campanhas SET desatualizado = true
+        WHERE NOT desatualizado AND campanha_id IN (SELECT campanha_id FROM antigos);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION invalidar_resultados_itens() RETURNS trigger AS $$
+BEGIN
+    UPDATE resultados_campanhas SET desatualizado = true
+    WHERE NOT desatualizado AND campanha_id = OLD.campanha_id;
+    IF TG_OP = 'UPDATE' AND NEW.campanha_id <> OLD.campanha_id THEN
+        UPDATE resultados_campanhas SET desatualizado = true
+        WHERE NOT desatualizado AND campanha_id = NEW.campanha_id;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS lances_resultados_insert ON lances;
+CREATE TRIGGER lances_resultados_insert AFTER INSERT ON lances
+    REFERENCING NEW TABLE AS novos
+    FOR EACH STATEMENT EXECUTE FUNCTION invalidar_resultados_lances();
+DROP TRIGGER IF EXISTS lances_resultados_update ON lances;
+CREATE TRIGGER lances_resultados_update AFTER UPDATE ON lances
+    REFERENCING NEW TABLE AS novos OLD TABLE AS antigos
+    FOR EACH STATEMENT EXECUTE FUNCTION invalidar_resultados_lances();
+DROP TRIGGER IF EXISTS lances_resultados_delete ON lances;
+CREATE TRIGGER lances_resultados_delete AFTER DELETE ON lances
+    REFERENCING OLD TABLE AS antigos
+    FOR EACH STATEMENT EXECUTE FUNCTION invalidar_resultados_lances();
+
+-- Os lances arquivados são justamente os das campanhas encerradas
+DROP TRIGGER IF EXISTS lances_arquivo_resultados_update ON lances_arquivo;
+CREATE TRIGGER lances_arquivo_resultados_update AFTER UPDATE ON lances_arquivo
+    REFERENCING NEW TABLE AS novos OLD TABLE AS antigos
+    FOR EACH STATEMENT EXECUTE FUNCTION invalidar_resultados_lances();
+DROP TRIGGER IF EXISTS lances_arquivo_resultados_delete ON lances_arquivo;
+CREATE TRIGGER lances_arquivo_resultados_delete AFTER DELETE ON lances_arquivo
+    REFERENCING OLD TABLE AS antigos
+    FOR EACH STATEMENT EXECUTE FUNCTION invalidar_resultados_lances();
+
+-- Só as colunas que aparecem no resultado: o UPDATE do preço a cada lance não dispara
+DROP TRIGGER IF EXISTS itens_resultados_update ON itens;
+CREATE TRIGGER itens_resultados_update
+    AFTER UPDATE OF nome, categoria_id, lance_inicial, campanha_id ON itens
+    FOR EACH ROW EXECUTE FUNCTION invalidar_resultados_itens();
+DROP TRIGGER IF EXISTS itens_resultados_delete ON itens;
+CREATE TRIGGER itens_resultados_delete
+    AFTER DELETE ON itens
+    FOR EACH ROW EXECUTE FUNCTION invalidar_resultados_itens();
+
+-- Campanhas já encerradas têm o resultado calculado no primeiro acesso
+INSERT INTO resultados_campanhas (campanha_id, resultado, desatualizado)
+SELECT id, '{}', true
+FROM campanhas
+WHERE status IN ('finalizada', 'arquivada')
+ON CONFLICT (campanha_id) DO NOTHING;
@@ -0,0 +1,33 @@
+-- Busca de itens por texto (GET /api/itens/busca)
+--
+-- O nome de cada item ganha um tsvector em português sem acentos, para a
+-- busca por palavras ("bolo de cenoura" encontra "Bolos de Cenóura"), e um
+-- índice de trigramas, para trechos e erros de digitação ("cenora"). As duas
+-- condições usam índices GIN, combinados pelo Postgres num único plano.
+--
+-- Requer as extensões unaccent e pg_trgm (pacote contrib do PostgreSQL).
+
+CREATE EXTENSION IF NOT EXISTS unaccent;
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+-- unaccent não é IMMUTABLE (depende do dicionário configurado); fixando o
+-- dicionário, a função pode ser usada em índices
+CREATE OR REPLACE FUNCTION sem_acento(texto TEXT) RETURNS TEXT AS $$
+    SELECT public.unaccent('public.unaccent'::regdictionary, texto)
+$$ LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT;
+
+DO $$
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM pg_ts_config WHERE cfgname = 'portugues_sem_acento') THEN
+        CREATE TEXT SEARCH CONFIGURATION portugues_sem_acento (COPY = portuguese);
+        ALTER TEXT SEARCH CONFIGURATION portugues_sem_acento
+            ALTER MAPPING FOR hword, hword_part, word WITH unaccent, portuguese_stem;
+    END IF;
+END;
+$$;
+
+ALTER TABLE itens ADD COLUMN IF NOT EXISTS busca TSVECTOR
+    GENERATED ALWAYS AS (to_tsvector('portugues_sem_acento'::regconfig, nome)) STORED;
+
+CREATE INDEX IF NOT EXISTS itens_busca_idx ON itens USING gin (busca);
+CREATE INDEX IF NOT EXISTS itens_nome_trgm_idx ON itens USING gin (sem_acento(nome) gin_trgm_ops);
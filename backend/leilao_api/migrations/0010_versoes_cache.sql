@@ -0,0 +1,12 @@
+-- Versões dos grupos de dados do cache de leitura (src/cache.py)
+--
+-- Ficam no banco para que todos os processos da aplicação vejam as mesmas
+-- versões: uma escrita feita em um processo invalida na hora o cache dos
+-- outros. São sequências, e não linhas de uma tabela, porque nextval não
+-- trava nada nem depende da transação: incrementar a versão dos itens a cada
+-- lance não faz os lances esperarem uns pelos outros.
+
+CREATE SEQUENCE IF NOT EXISTS versao_cache_itens;
+CREATE SEQUENCE IF NOT EXISTS versao_cache_campanhas;
+CREATE SEQUENCE IF NOT EXISTS versao_cache_categorias;
+CREATE SEQUENCE IF NOT EXISTS versao_cache_configuracoes;
@@ -0,0 +1,7 @@
+-- Versão dos tokens de cada usuário
+--
+-- O login grava a versão atual no token, e a verificação do token recusa os
+-- de versão diferente: mudar email, senha ou permissão incrementa a versão e
+-- invalida os tokens já emitidos, em todos os processos da aplicação.
+
+ALTER TABLE usuarios ADD COLUMN IF NOT EXISTS token_versao INTEGER NOT NULL DEFAULT 0;
@@ -0,0 +1,14 @@
+"""Registro das ações administrativas na tabela auditoria.
+
+A linha de auditoria é gravada na mesma transação da alteração que ela
+descreve: as duas são confirmadas pelo mesmo commit, ou nenhuma delas. Assim
+não há um segundo commit por ação, nem alteração sem auditoria se a
+aplicação cair entre um e outro.
+"""
+
+def registrar_auditoria(cursor, usuario_id, acao):
+    """Registra a ação na transação do cursor; o commit fica com quem chamou."""
+    cursor.execute(
+        "INSERT INTO auditoria (usuario_id, acao) VALUES (%s, %s)",
+        (usuario_id, acao)
+    )
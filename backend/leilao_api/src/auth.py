@@ -1,7 +1,100 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
 import jwt
 from functools import wraps
 from flask import request, jsonify
 from src.config import Config
+from src.db import get_db_connection, release_db_connection
+
+class CacheTokens:
+    """Tokens JWT já verificados, para não repetir a verificação a cada requisição.
+
+    As entradas são indexadas pelo digest do token (o token em si não fica em
+    memória) e expiram em TOKENS_CACHE_TTL segundos, nunca depois do exp do
+    token. descartar_usuario remove as entradas de um usuário deste processo;
+    nos demais, elas expiram pelo TTL.
+    """
+
+    def __init__(self, max_entradas, ttl):
+        self.max_entradas = max_entradas
+        self.ttl = ttl
+        self._entradas = OrderedDict()
+        self._por_usuario = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _digest(token):
+        return hashlib.sha256(token.encode('utf-8')).digest()
+
+    def obter(self, token):
+        """Retorna o current_user do token em cache, ou None."""
+        digest = self._digest(token)
+        with self._lock:
+            entrada = self._entradas.get(digest)
+            if entrada is None:
+                return None
+            current_user, expira_em = entrada
+            if expira_em <= time.time():
+                self._remover(digest, current_user['id'])
+                return None
+            self._entradas.move_to_end(digest)
+            return current_user
+
+    def guardar(self, token, current_user, exp):
+        digest = self._digest(token)
+        expira_em = time.time() + self.ttl
+        if exp is not None:
+            expira_em = min(expira_em, exp)
+        with self._lock:
+            self._entradas[digest] = (current_user, expira_em)
+            self._entradas.move_to_end(digest)
+            self._por_usuario.setdefault(current_user['id'], set()).add(digest)
+            while len(self._entradas) > self.max_entradas:
+                antigo, (usuario, _) = self._entradas.popitem(last=False)
+                self._remover(antigo, usuario['id'], ja_removido=True)
+
+    def _remover(self, digest, usuario_id, ja_removido=False):
+        if not ja_removido:
+            self._entradas.pop(digest, None)
+        digests = self._por_usuario.get(usuario_id)
+        if digests is not None:
+            digests.discard(digest)
+            if not digests:
+                del self._por_usuario[usuario_id]
+
+    def descartar_usuario(self, usuario_id):
+        with self._lock:
+            for digest in self._por_usuario.pop(usuario_id, ()):
+                self._entradas.pop(digest, None)
+
+cache_tokens = CacheTokens(Config.TOKENS_CACHE_MAX, Config.TOKENS_CACHE_TTL)
+
+def revogar_tokens_usuario(usuario_id):
+    """Descarta os tokens do usuário em cache; chame depois de revogá-los no banco."""
+    cache_tokens.descartar_usuario(usuario_id)
+
+def _usuario_do_token(data):
+    """Confere o usuário do token no banco; None se ele foi removido ou o token revogado."""
+    conn = None
+    try:
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        cursor.execute(
+            "SELECT id, email, permissao, token_versao FROM usuarios WHERE id = %s",
+            (data['user_id'],)
+        )
+        usuario = cursor.fetchone()
+    finally:
+        if conn:
+            cursor.close()
+            release_db_connection(conn)
+    # Tokens emitidos antes da coluna token_versao não trazem a versão
+    if not usuario or usuario[3] != data.get('versao', 0):
+        return None
+    return {'id': usuario[0], 'email': usuario[1], 'permissao': usuario[2]}
 
 def token_required(f):
     """Decorator para proteger rotas que requerem autenticação."""
@@ -20,18 +113,23 @@ def token_required(f):
         if not token:
             return jsonify({'message': 'Token não fornecido!'}), 401
         
-        try:
-            # Decodifica o token
-            data = jwt.decode(token, Config.JWT_SECRET_KEY, algorithms=["HS256"])
-            current_user = {
-                'id': data['user_id'],
-                'email': data['email'],
-                'permissao': data['permissao']
-            }
-        except jwt.ExpiredSignatureError:
-            return jsonify({'message': 'Token expirado!'}), 401
-        except jwt.InvalidTokenError:
-            return jsonify({'message': 'Token inválido!'}), 401
+        current_user = cache_tokens.obter(token)
+        if current_user is None:
+            try:
+                # Decodifica o token
+                data = jwt.decode(token, Config.JWT_SECRET_KEY, algorithms=["HS256"])
+            except jwt.ExpiredSignatureError:
+                return jsonify({'message': 'Token expirado!'}), 401
+            except jwt.InvalidTokenError:
+                return jsonify({'message': 'Token inválido!'}), 401
+            
+            try:
+                current_user = _usuario_do_token(data)
+            except Exception as e:
+                return jsonify({'message': f'Erro ao verificar token: {str(e)}'}), 500
+            if current_user is None:
+                return jsonify({'message': 'Token revogado! Faça login novamente.'}), 401
+            cache_tokens.guardar(token, current_user, data.get('exp'))
         
         return f(current_user, *args, **kwargs)
     
@@ -0,0 +1,187 @@
+"""Cache de leitura em memória para as rotas GET do catálogo e do dashboard.
+
+As respostas das rotas GET marcadas com @cache_leitura ficam guardadas por
+rota e parâmetros da query, com validade (TTL) e descarte das menos usadas
+(LRU). Cada resposta depende de um ou mais grupos de dados ('itens',
+'campanhas', ...) e guarda a versão de cada grupo no momento da leitura. Os
+handlers de escrita chamam incrementar_versao depois do commit, o que
+invalida na hora as respostas que dependem daquele grupo.
+
+Cada resposta guardada recebe um ETag forte com o hash do corpo: a mesma
+resposta tem o mesmo ETag em qualquer processo e após um reinício, e uma
+resposta recalculada com outro conteúdo sempre muda de ETag. Um
+If-None-Match igual ao ETag da entrada válida responde 304 sem consultar o
+banco nem serializar nada. O corpo comprimido de cada codificação também fica
+na entrada, e o ETag ganha o nome da codificação para distinguir as variantes.
+
+As versões ficam em sequências do banco (versao_cache_<grupo>, migração
+0010), lidas a cada requisição: uma escrita feita em qualquer processo da
+aplicação invalida na hora o cache de todos. Se as versões não puderem ser
+lidas, a rota responde sem cache.
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from flask import current_app, make_response, request
+
+from src.config import Config
+from src.db import get_db_connection, release_db_connection
+from src.compressao import TIPOS_COMPRIMIVEIS, escolher_codificacao, comprimir_resposta
+
+# Grupos com sequência de versão no banco
+GRUPOS = ('itens', 'campanhas', 'categorias', 'configuracoes')
+
+class VersoesDados:
+    """Contadores de versão por grupo de dados, em sequências do banco."""
+
+    def _executar(self, sql, params=None):
+        conn = None
+        try:
+            conn = get_db_connection()
+            cursor = conn.cursor()
+            cursor.execute(sql, params)
+            resultado = cursor.fetchall()
+            conn.commit()
+            return resultado
+        except Exception:
+            if conn:
+                conn.rollback()
+            raise
+        finally:
+            if conn:
+                cursor.close()
+                release_db_connection(conn)
+
+    def incrementar(self, *grupos):
+        # Chamado depois do commit da escrita: uma falha aqui só atrasa a
+        # invalidação até o TTL, e não deve virar erro da requisição
+        try:
+            self._executar("SELECT " + ", ".join(f"nextval('versao_cache_{grupo}')" for grupo in grupos))
+        except Exception as e:
+            print(f"Erro ao incrementar a versão do cache ({', '.join(grupos)}): {e}")
+
+    def atuais(self, grupos):
+        """Versões atuais dos grupos, ou None se o banco não responder."""
+        try:
+            linhas = self._executar(
+                "SELECT sequencename, last_value FROM pg_sequences"
+                " WHERE schemaname = current_schema() AND sequencename = ANY(%s)",
+                ([f'versao_cache_{grupo}' for grupo in grupos],)
+            )
+        except Exception as e:
+            print(f"Erro ao ler as versões do cache: {e}")
+            return None
+        versoes = dict(linhas)
+        # Sequência ainda não usada: last_value é NULL
+        return tuple(versoes.get(f'versao_cache_{grupo}') or 0 for grupo in grupos)
+
+class CacheLeituras:
+    """Respostas em cache com TTL, descarte LRU e versões dos dados."""
+
+    def __init__(self, max_entradas=512, ttl=30):
+        self._entradas = OrderedDict()
+        self._max_entradas = max_entradas
+        self._ttl = ttl
+        self._trava = threading.Lock()
+
+    def obter(self, chave, versoes):
+        with self._trava:
+            entrada = self._entradas.get(chave)
+            if entrada is None:
+                return None
+            versoes_entrada, expira_em, resposta = entrada
+            if versoes_entrada != versoes or expira_em < time.monotonic():
+                del self._entradas[chave]
+                return None
+            self._entradas.move_to_end(chave)
+            return resposta
+
+    def guardar(self, chave, versoes, corpo, mimetype):
+        """Guarda a resposta e retorna a entrada (corpo, mimetype, etag, comprimidos)."""
+        entrada = (corpo, mimetype, hashlib.blake2b(corpo, digest_size=16).hexdigest(), {})
+        with self._trava:
+            self._entradas[chave] = (versoes, time.monotonic() + self._ttl, entrada)
+            self._entradas.move_to_end(chave)
+            while len(self._entradas) > self._max_entradas:
+                self._entradas.popitem(last=False)
+            return entrada
+
+    def limpar(self):
+        with self._trava:
+            self._entradas.clear()
+
+versoes_dados = VersoesDados()
+cache_leituras = CacheLeituras(Config.CACHE_LEITURAS_MAX, Config.CACHE_LEITURAS_TTL)
+
+def incrementar_versao(*grupos):
+    """Marca os grupos de dados como alterados, invalidando o cache.
+
+    Chame depois do commit: o incremento vale na hora para todos os processos.
+    """
+    versoes_dados.incrementar(*grupos)
+
+def _resposta_condicional(corpo, mimetype, etag, comprimidos, privado):
+    codificacao = escolher_codificacao(mimetype, len(corpo))
+    if codificacao:
+        etag = f"{etag}-{codificacao}"
+    if request.if_none_match.contains(etag):
+        resposta = current_app.response_class(status=304)
+        if mimetype in TIPOS_COMPRIMIVEIS:
+            resposta.vary.add('Accept-Encoding')
+    else:
+        resposta = current_app.response_class(corpo, status=200, mimetype=mimetype)
+        comprimir_resposta(resposta, comprimidos)
+    resposta.set_etag(etag)
+    resposta.headers['Cache-Control'] = 'private, no-cache' if privado else 'no-cache'
+    return resposta
+
+def cache_leitura(*grupos, privado=False):
+    """Decorator para rotas GET cujas respostas dependem dos grupos de dados.
+
+    Use privado=True em rotas autenticadas, para que proxies não guardem a resposta.
+    """
+    desconhecidos = set(grupos) - set(GRUPOS)
+    if desconhecidos:
+        raise ValueError(f"Grupos de dados sem versão: {', '.join(sorted(desconhecidos))}")
+
+    def sem_cache(f, args, kwargs):
+        # Sem versões confiáveis: ETag pelo conteúdo, só economiza banda
+        resposta = make_response(f(*args, **kwargs))
+        if resposta.status_code == 200:
+            comprimir_resposta(resposta)
+            resposta.add_etag()
+            resposta.headers['Cache-Control'] = 'private, no-cache' if privado else 'no-cache'
+            resposta.make_conditional(request)
+        return resposta
+
+    def decorator(f):
+        @wraps(f)
+        def decorated(*args, **kwargs):
+            if not Config.CACHE_LEITURAS_ATIVO:
+                return sem_cache(f, args, kwargs)
+
+            chave = (request.path, tuple(sorted(request.args.items(multi=True))))
+            # Versões lidas antes da consulta: uma escrita concorrente invalida o resultado
+            versoes = versoes_dados.atuais(grupos)
+            if versoes is None:
+                return sem_cache(f, args, kwargs)
+            guardada = cache_leituras.obter(chave, versoes)
+            if guardada is not None:
+                resposta = _resposta_condicional(*guardada, privado)
+                resposta.headers['X-Cache'] = 'HIT'
+                return resposta
+
+            resposta = make_response(f(*args, **kwargs))
+            if resposta.status_code != 200:
+                return resposta
+            corpo, mimetype = resposta.get_data(), resposta.mimetype
+            guardada = cache_leituras.guardar(chave, versoes, corpo, mimetype)
+            resposta = _resposta_condicional(*guardada, privado)
+            resposta.headers['X-Cache'] = 'MISS'
+            return resposta
+        return decorated
+    return decorator
@@ -0,0 +1,154 @@
+import sys
+import click
+from src.db import get_db_connection, release_db_connection, create_dedicated_connection
+from src.precos import recalcular_precos
+from src.migracoes import aplicar_migracoes, estado_migracoes
+from src.indices import verificar_indices
+from src.resumo_dashboard import recalcular_resumo
+from src.particoes import garantir_particoes, arquivar_lances, restaurar_lances
+from src.imagens import imagens_disponiveis, banners_pendentes, converter_banners, reescrever_banners
+from src.config import Config
+from src.cache import incrementar_versao
+
+def register_commands(app):
+    """Registra os comandos de manutenção no CLI do Flask."""
+
+    @app.cli.command('migrar')
+    @click.option('--listar', is_flag=True, help='Apenas mostra o estado das migrações.')
+    def migrar_command(listar):
+        """Aplica as migrações pendentes do banco."""
+        conn = create_dedicated_connection()
+        try:
+            if listar:
+                for versao, nome, aplicada in estado_migracoes(conn):
+                    click.echo(f"{versao:04d} {nome}: {'aplicada' if aplicada else 'pendente'}")
+                return
+            novas = aplicar_migracoes(
+                conn,
+                ao_aplicar=lambda versao, nome: click.echo(f"Aplicada {versao:04d} {nome}")
+            )
+            if not novas:
+                click.echo("Nenhuma migração pendente.")
+        finally:
+            conn.close()
+
+    @app.cli.command('verificar-indices')
+    def verificar_indices_command():
+        """Confere com EXPLAIN se as consultas frequentes usam seus índices."""
+        conn = create_dedicated_connection()
+        try:
+            resultado = verificar_indices(conn)
+        finally:
+            conn.close()
+        for descricao, indice, usado in resultado:
+            click.echo(f"{'OK   ' if usado else 'FALHA'} {descricao}: {indice}")
+        if not all(usado for _, _, usado in resultado):
+            sys.exit(1)
+
+    @app.cli.command('recalcular-precos')
+    @click.option('--item-id', type=int, default=None, help='Recalcula apenas este item.')
+    def recalcular_precos_command(item_id):
+        """Corrige o preço atual desnormalizado dos itens a partir dos lances."""
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        try:
+            corrigidos = recalcular_precos(cursor, item_id)
+            conn.commit()
+            click.echo(f"{len(corrigidos)} item(ns) corrigido(s).")
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cursor.close()
+            release_db_connection(conn)
+
+    @app.cli.command('recalcular-dashboard')
+    def recalcular_dashboard_command():
+        """Reconstrói os contadores do dashboard a partir das tabelas."""
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        try:
+            campanhas_ativas, total_itens, total_lances, valor_arrecadado = recalcular_resumo(cursor)
+            conn.commit()
+            incrementar_versao('itens', 'campanhas')
+            click.echo(
+                f"{campanhas_ativas} campanha(s) ativa(s), {total_itens} item(ns), "
+                f"{total_lances} lance(s), R$ {valor_arrecadado:.2f} arrecadados."
+            )
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cursor.close()
+            release_db_connection(conn)
+
+    @app.cli.command('manter-particoes')
+    @click.option('--meses', type=int, default=3, help='Meses de auditoria criados com antecedência.')
+    def manter_particoes_command(meses):
+        """Cria as partições de auditoria dos próximos meses e as de lances que faltarem."""
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        try:
+            criadas = garantir_particoes(cursor, meses)
+            conn.commit()
+            for nome in criadas:
+                click.echo(f"Criada {nome}")
+            click.echo(f"{len(criadas)} partição(ões) criada(s).")
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cursor.close()
+            release_db_connection(conn)
+
+    @app.cli.command('arquivar-lances')
+    @click.option('--campanha-id', type=int, default=None, help='Arquiva (ou restaura) apenas esta campanha.')
+    @click.option('--restaurar', is_flag=True, help='Devolve os lances arquivados da campanha à tabela lances.')
+    def arquivar_lances_command(campanha_id, restaurar):
+        """Move os lances das campanhas encerradas para lances_arquivo."""
+        if restaurar and campanha_id is None:
+            raise click.UsageError("--restaurar exige --campanha-id.")
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        try:
+            if restaurar:
+                if not restaurar_lances(cursor, campanha_id):
+                    raise click.ClickException(f"Os lances da campanha {campanha_id} não estão arquivados.")
+                conn.commit()
+                click.echo(f"Lances da campanha {campanha_id} restaurados.")
+                return
+            arquivadas = arquivar_lances(cursor, campanha_id)
+            conn.commit()
+            click.echo(f"{len(arquivadas)} campanha(s) arquivada(s): {', '.join(map(str, arquivadas)) or '-'}")
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cursor.close()
+            release_db_connection(conn)
+
+    @app.cli.command('converter-banners')
+    @click.option('--trabalhadores', type=int, default=None, help='Imagens convertidas em paralelo (padrão: IMAGENS_TRABALHADORES).')
+    def converter_banners_command(trabalhadores):
+        """Converte os banners atuais em variantes e troca as URLs no banco."""
+        if not imagens_disponiveis():
+            raise click.ClickException("Instale o pacote Pillow para converter os banners.")
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        try:
+            urls = banners_pendentes(cursor)
+            # Não segura a transação aberta durante os downloads e conversões
+            conn.commit()
+            click.echo(f"{len(urls)} banner(s) a converter.")
+            chaves, falhas = converter_banners(urls, trabalhadores or Config.IMAGENS_TRABALHADORES, app.static_folder)
+            for url, erro in falhas.items():
+                click.echo(f"FALHA {url}: {erro}")
+            alteradas = reescrever_banners(cursor, chaves)
+            conn.commit()
+            click.echo(f"{len(chaves)} banner(s) convertido(s), {alteradas} linha(s) atualizada(s), {len(falhas)} falha(s).")
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cursor.close()
+            release_db_connection(conn)
@@ -0,0 +1,106 @@
+"""Compressão das respostas JSON e CSV.
+
+Respostas a partir de COMPRESSAO_MINIMO bytes são comprimidas com brotli (se o
+pacote opcional 'brotli' estiver instalado) ou gzip, conforme o
+Accept-Encoding do cliente. Respostas em streaming, como a exportação de
+lances, são comprimidas bloco a bloco enquanto são enviadas.
+
+O cache de leitura guarda o corpo já comprimido de cada codificação, para
+que os acertos do cache não comprimam a mesma resposta de novo.
+"""
+
+import gzip
+import zlib
+
+from flask import request
+
+from src.config import Config
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+TIPOS_COMPRIMIVEIS = ('application/json', 'text/csv')
+
+def _codificacoes_suportadas():
+    return ('br', 'gzip') if brotli else ('gzip',)
+
+def escolher_codificacao(mimetype, tamanho=None):
+    """Retorna a codificação a usar na resposta, ou None para enviar sem compressão.
+
+    tamanho None indica uma resposta em streaming, sempre comprimida.
+    """
+    if not Config.COMPRESSAO_ATIVA or mimetype not in TIPOS_COMPRIMIVEIS:
+        return None
+    if tamanho is not None and tamanho < Config.COMPRESSAO_MINIMO:
+        return None
+    for codificacao in _codificacoes_suportadas():
+        if request.accept_encodings.quality(codificacao) > 0:
+            return codificacao
+    return None
+
+def comprimir(corpo, codificacao):
+    """Comprime o corpo inteiro na codificação informada."""
+    if codificacao == 'br':
+        return brotli.compress(corpo, quality=Config.COMPRESSAO_NIVEL_BROTLI)
+    return gzip.compress(corpo, compresslevel=Config.COMPRESSAO_NIVEL_GZIP, mtime=0)
+
+def _comprimir_blocos(blocos, codificacao):
+    if codificacao == 'br':
+        compressor = brotli.Compressor(quality=Config.COMPRESSAO_NIVEL_BROTLI)
+        comprimir_bloco, finalizar = compressor.process, compressor.finish
+    else:
+        compressor = zlib.compressobj(Config.COMPRESSAO_NIVEL_GZIP, zlib.DEFLATED, 31)
+        comprimir_bloco, finalizar = compressor.compress, compressor.flush
+
+    try:
+        for bloco in blocos:
+            if isinstance(bloco, str):
+                bloco = bloco.encode('utf-8')
+            comprimido = comprimir_bloco(bloco)
+            if comprimido:
+                yield comprimido
+        yield finalizar()
+    finally:
+        if hasattr(blocos, 'close'):
+            blocos.close()
+
+def comprimir_resposta(resposta, variantes=None):
+    """Comprime a resposta conforme o cliente, se o tipo e o tamanho justificarem.
+
+    variantes, se informado, guarda os corpos já comprimidos por codificação
+    e é reaproveitado nas chamadas seguintes com o mesmo corpo.
+    """
+    if resposta.status_code != 200 or 'Content-Encoding' in resposta.headers:
+        return resposta
+    if resposta.mimetype not in TIPOS_COMPRIMIVEIS:
+        return resposta
+    resposta.vary.add('Accept-Encoding')
+
+    if resposta.is_streamed:
+        codificacao = escolher_codificacao(resposta.mimetype)
+        if codificacao:
+            resposta.response = _comprimir_blocos(resposta.response, codificacao)
+            resposta.headers['Content-Encoding'] = codificacao
+            resposta.headers.pop('Content-Length', None)
+        return resposta
+
+    corpo = resposta.get_data()
+    codificacao = escolher_codificacao(resposta.mimetype, len(corpo))
+    if not codificacao:
+        return resposta
+
+    if variantes is not None and codificacao in variantes:
+        comprimido = variantes[codificacao]
+    else:
+        comprimido = comprimir(corpo, codificacao)
+        if variantes is not None:
+            variantes[codificacao] = comprimido
+    resposta.set_data(comprimido)
+    resposta.headers['Content-Encoding'] = codificacao
+    return resposta
+
+def init_compressao(app):
+    """Registra a compressão de todas as respostas da aplicação."""
+    app.after_request(comprimir_resposta)
@@ -15,3 +15,62 @@ class Config:
     DB_PASSWORD = os.getenv('DB_PASSWORD', 'postgres')
     
     DATABASE_URL = f'postgresql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}'
+    
+    # Hash de senhas com bcrypt num pool de threads com fila limitada (timeout em segundos)
+    BCRYPT_CUSTO = int(os.getenv('BCRYPT_CUSTO', '12'))
+    SENHAS_TRABALHADORES = int(os.getenv('SENHAS_TRABALHADORES', str(min(4, os.cpu_count() or 1))))
+    SENHAS_FILA = int(os.getenv('SENHAS_FILA', '32'))
+    SENHAS_TIMEOUT = float(os.getenv('SENHAS_TIMEOUT', '10'))
+    
+    # Cache de tokens JWT já verificados (TTL em segundos, limitado ao exp do token)
+    TOKENS_CACHE_MAX = int(os.getenv('TOKENS_CACHE_MAX', '10000'))
+    TOKENS_CACHE_TTL = float(os.getenv('TOKENS_CACHE_TTL', '300'))
+    
+    # Pool de conexões (tempos em segundos)
+    DB_POOL_MIN = int(os.getenv('DB_POOL_MIN', '2'))
+    DB_POOL_MAX = int(os.getenv('DB_POOL_MAX', '20'))
+    DB_POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', '5'))
+    DB_POOL_VERIFICAR_APOS = float(os.getenv('DB_POOL_VERIFICAR_APOS', '30'))
+    
+    # Consultas frequentes como prepared statements (desative atrás de PgBouncer em modo transação)
+    CONSULTAS_PREPARADAS = os.getenv('CONSULTAS_PREPARADAS', 'true').lower() == 'true'
+    
+    # Cache de leitura das rotas públicas do catálogo (TTL em segundos)
+    CACHE_LEITURAS_ATIVO = os.getenv('CACHE_LEITURAS_ATIVO', 'true').lower() == 'true'
+    CACHE_LEITURAS_TTL = float(os.getenv('CACHE_LEITURAS_TTL', '30'))
+    CACHE_LEITURAS_MAX = int(os.getenv('CACHE_LEITURAS_MAX', '512'))
+    
+    # Compressão das respostas JSON e CSV (brotli exige o pacote opcional 'brotli')
+    COMPRESSAO_ATIVA = os.getenv('COMPRESSAO_ATIVA', 'true').lower() == 'true'
+    COMPRESSAO_MINIMO = int(os.getenv('COMPRESSAO_MINIMO', '1024'))
+    COMPRESSAO_NIVEL_GZIP = int(os.getenv('COMPRESSAO_NIVEL_GZIP', '6'))
+    COMPRESSAO_NIVEL_BROTLI = int(os.getenv('COMPRESSAO_NIVEL_BROTLI', '5'))
+    
+    # Listagem de itens montada pelo Postgres com json_agg
+    SERIALIZACAO_JSON_AGG = os.getenv('SERIALIZACAO_JSON_AGG', 'false').lower() == 'true'
+    
+    # Motor de lances em memória (use com um único processo da aplicação)
+    MOTOR_LANCES_ATIVO = os.getenv('MOTOR_LANCES_ATIVO', 'false').lower() == 'true'
+    MOTOR_LANCES_TRAVAS = int(os.getenv('MOTOR_LANCES_TRAVAS', '64'))
+    MOTOR_LANCES_LOTE = int(os.getenv('MOTOR_LANCES_LOTE', '200'))
+    MOTOR_LANCES_INTERVALO_MS = int(os.getenv('MOTOR_LANCES_INTERVALO_MS', '5'))
+    MOTOR_LANCES_TIMEOUT = float(os.getenv('MOTOR_LANCES_TIMEOUT', '5'))
+    
+    # Gravação agrupada de lances pelo caminho SQL (um commit por lote)
+    GRAVACAO_AGRUPADA_ATIVA = os.getenv('GRAVACAO_AGRUPADA_ATIVA', 'false').lower() == 'true'
+    GRAVACAO_AGRUPADA_LOTE = int(os.getenv('GRAVACAO_AGRUPADA_LOTE', '100'))
+    GRAVACAO_AGRUPADA_INTERVALO_MS = int(os.getenv('GRAVACAO_AGRUPADA_INTERVALO_MS', '3'))
+    GRAVACAO_AGRUPADA_TIMEOUT = float(os.getenv('GRAVACAO_AGRUPADA_TIMEOUT', '5'))
+    
+    # Banners convertidos em variantes com Pillow (tamanho máximo em bytes, timeout em segundos)
+    IMAGENS_PASTA = os.getenv('IMAGENS_PASTA', os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'imagens'))
+    IMAGENS_TAMANHO_MAXIMO = int(os.getenv('IMAGENS_TAMANHO_MAXIMO', str(20 * 1024 * 1024)))
+    IMAGENS_QUALIDADE = int(os.getenv('IMAGENS_QUALIDADE', '82'))
+    IMAGENS_TRABALHADORES = int(os.getenv('IMAGENS_TRABALHADORES', str(os.cpu_count() or 1)))
+    IMAGENS_TIMEOUT_DOWNLOAD = float(os.getenv('IMAGENS_TIMEOUT_DOWNLOAD', '30'))
+    
+    # Transmissão de lances em tempo real (Server-Sent Events)
+    EVENTOS_HISTORICO = int(os.getenv('EVENTOS_HISTORICO', '1000'))
+    EVENTOS_HEARTBEAT = int(os.getenv('EVENTOS_HEARTBEAT', '15'))
+    # Margem (segundos) da retomada pelo banco: lances com ID menor confirmados depois
+    EVENTOS_JANELA_RETOMADA = float(os.getenv('EVENTOS_JANELA_RETOMADA', '10'))
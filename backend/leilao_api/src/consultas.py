@@ -0,0 +1,78 @@
+"""Registro das consultas frequentes executadas como prepared statements.
+
+Cada consulta registrada é preparada (PREPARE) uma única vez por conexão, no
+primeiro uso, e depois executada pelo nome (EXECUTE), sem que o Postgres
+precise analisar e planejar o SQL a cada requisição. O SQL continua escrito
+com parâmetros nomeados %(nome)s, como no restante do projeto.
+
+Conexões novas, como as abertas pelo pool depois de uma queda, não estão no
+registro e preparam as consultas de novo automaticamente.
+"""
+
+import re
+import weakref
+
+import psycopg2.errors
+import psycopg2.extensions
+
+from src.config import Config
+
+PARAMETRO = re.compile(r'%\((\w+)\)s')
+
+class Consulta:
+    """Consulta registrada: nome do prepared statement, SQL e tipos dos parâmetros."""
+
+    def __init__(self, nome, sql, tipos):
+        self.nome = nome
+        self.sql = sql
+        self.parametros = list(tipos)
+        posicoes = {parametro: numero for numero, parametro in enumerate(self.parametros, 1)}
+        self.sql_preparado = PARAMETRO.sub(lambda m: f'${posicoes[m.group(1)]}', sql)
+        if self.parametros:
+            marcadores = ', '.join(f'%({parametro})s' for parametro in self.parametros)
+            self.comando_preparar = f"PREPARE {nome} ({', '.join(tipos.values())}) AS {self.sql_preparado}"
+            self.comando_executar = f"EXECUTE {nome} ({marcadores})"
+        else:
+            self.comando_preparar = f"PREPARE {nome} AS {self.sql_preparado}"
+            self.comando_executar = f"EXECUTE {nome}"
+
+consultas = {}
+
+# Nomes já preparados em cada conexão; some junto com a conexão
+_preparadas = weakref.WeakKeyDictionary()
+
+def registrar_consulta(nome, sql, **tipos):
+    """Registra uma consulta frequente; tipos mapeia cada parâmetro ao tipo SQL."""
+    faltando = set(PARAMETRO.findall(sql)) - set(tipos)
+    if faltando:
+        raise ValueError(f"Tipos não informados para: {', '.join(sorted(faltando))}")
+    consulta = Consulta(nome, sql, tipos)
+    consultas[nome] = consulta
+    return consulta
+
+def _preparar(cursor, consulta):
+    preparadas = _preparadas.setdefault(cursor.connection, set())
+    if consulta.nome not in preparadas:
+        cursor.execute(consulta.comando_preparar)
+        preparadas.add(consulta.nome)
+
+def executar_consulta(cursor, consulta, parametros=None):
+    """Executa a consulta pelo prepared statement da conexão do cursor."""
+    parametros = parametros or {}
+    if not Config.CONSULTAS_PREPARADAS:
+        cursor.execute(consulta.sql, parametros)
+        return
+
+    conn = cursor.connection
+    fora_de_transacao = conn.info.transaction_status == psycopg2.extensions.TRANSACTION_STATUS_IDLE
+    try:
+        _preparar(cursor, consulta)
+        cursor.execute(consulta.comando_executar, parametros)
+    except psycopg2.errors.InvalidSqlStatementName:
+        # A sessão perdeu os prepared statements (ex.: DISCARD ALL no servidor)
+        _preparadas.pop(conn, None)
+        if not fora_de_transacao:
+            raise
+        conn.rollback()
+        _preparar(cursor, consulta)
+        cursor.execute(consulta.comando_executar, parametros)
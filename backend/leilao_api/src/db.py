@@ -1,7 +1,155 @@
+import threading
+import time
+from collections import deque
+
 import psycopg2
-from psycopg2 import pool
+import psycopg2.extensions
+from flask import g, has_app_context
 from src.config import Config
 
+class PoolEsgotado(Exception):
+    """Nenhuma conexão ficou livre dentro do tempo de espera."""
+
+class PoolConexoes:
+    """Pool de conexões thread-safe, com verificação de saúde e estatísticas.
+
+    Mantém entre minimo e maximo conexões abertas. Quem pede uma conexão com
+    o pool cheio aguarda até timeout segundos por uma devolução. Conexões
+    ociosas há mais de verificar_apos segundos são testadas com SELECT 1
+    antes de serem entregues; as que falham são descartadas e reabertas.
+    """
+
+    def __init__(self, minimo, maximo, timeout, verificar_apos, **parametros):
+        self._minimo = minimo
+        self._maximo = maximo
+        self._timeout = timeout
+        self._verificar_apos = verificar_apos
+        self._parametros = parametros
+        self._condicao = threading.Condition()
+        self._livres = deque()
+        self._em_uso = set()
+        self._fechado = False
+        self._contadores = {
+            'conexoes_abertas': 0,
+            'conexoes_descartadas': 0,
+            'emprestimos': 0,
+            'esperas': 0,
+            'timeouts': 0
+        }
+        for _ in range(minimo):
+            self._livres.append((self._abrir(), time.monotonic()))
+
+    def _abrir(self):
+        conn = psycopg2.connect(**self._parametros)
+        self._contadores['conexoes_abertas'] += 1
+        return conn
+
+    def _descartar(self, conn):
+        self._contadores['conexoes_descartadas'] += 1
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def _saudavel(self, conn, ociosa_desde):
+        if conn.closed:
+            return False
+        if time.monotonic() - ociosa_desde < self._verificar_apos:
+            return True
+        try:
+            cursor = conn.cursor()
+            cursor.execute("SELECT 1")
+            cursor.close()
+            conn.rollback()
+            return True
+        except Exception:
+            return False
+
+    def obter(self):
+        """Empresta uma conexão, aguardando até timeout segundos se necessário."""
+        limite = time.monotonic() + self._timeout
+        with self._condicao:
+            esperou = False
+            while True:
+                if self._fechado:
+                    raise PoolEsgotado("Pool de conexões fechado")
+                if self._livres or len(self._em_uso) < self._maximo:
+                    break
+                restante = limite - time.monotonic()
+                if restante <= 0:
+                    self._contadores['timeouts'] += 1
+                    raise PoolEsgotado("Tempo esgotado aguardando uma conexão livre do banco")
+                if not esperou:
+                    self._contadores['esperas'] += 1
+                    esperou = True
+                self._condicao.wait(restante)
+
+            livre = self._livres.pop() if self._livres else None
+            # Reserva a vaga antes de sair da trava; a conexão é aberta ou testada fora dela
+            marcador = object()
+            self._em_uso.add(marcador)
+
+        try:
+            if livre and self._saudavel(*livre):
+                conn = livre[0]
+            else:
+                if livre:
+                    with self._condicao:
+                        self._descartar(livre[0])
+                conn = psycopg2.connect(**self._parametros)
+                with self._condicao:
+                    self._contadores['conexoes_abertas'] += 1
+        except Exception:
+            with self._condicao:
+                self._em_uso.discard(marcador)
+                self._condicao.notify()
+            raise
+
+        with self._condicao:
+            self._em_uso.discard(marcador)
+            self._em_uso.add(conn)
+            self._contadores['emprestimos'] += 1
+        return conn
+
+    def devolver(self, conn):
+        """Devolve a conexão, desfazendo transações abertas e descartando as quebradas."""
+        reaproveitar = not conn.closed
+        if reaproveitar:
+            try:
+                if conn.info.transaction_status != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+                    conn.rollback()
+            except Exception:
+                reaproveitar = False
+
+        with self._condicao:
+            if conn not in self._em_uso:
+                return
+            self._em_uso.discard(conn)
+            if reaproveitar and not self._fechado:
+                self._livres.append((conn, time.monotonic()))
+            else:
+                self._descartar(conn)
+            self._condicao.notify()
+
+    def fechar(self):
+        """Fecha as conexões livres; as emprestadas são fechadas ao voltar."""
+        with self._condicao:
+            self._fechado = True
+            while self._livres:
+                self._livres.pop()[0].close()
+            self._condicao.notify_all()
+
+    def estatisticas(self):
+        """Retorna o tamanho atual do pool e os contadores acumulados."""
+        with self._condicao:
+            return {
+                'minimo': self._minimo,
+                'maximo': self._maximo,
+                'em_uso': len(self._em_uso),
+                'livres': len(self._livres),
+                **self._contadores
+            }
+
 # Pool de conexões para melhor performance
 connection_pool = None
 
@@ -9,8 +157,11 @@ def init_db_pool():
     """Inicializa o pool de conexões com o banco de dados."""
     global connection_pool
     try:
-        connection_pool = psycopg2.pool.SimpleConnectionPool(
-            1, 20,
+        connection_pool = PoolConexoes(
+            Config.DB_POOL_MIN,
+            Config.DB_POOL_MAX,
+            Config.DB_POOL_TIMEOUT,
+            Config.DB_POOL_VERIFICAR_APOS,
             host=Config.DB_HOST,
             port=Config.DB_PORT,
             database=Config.DB_NAME,
@@ -22,19 +173,51 @@ def init_db_pool():
         print(f"Erro ao criar pool de conexões: {e}")
         raise
 
+def create_dedicated_connection():
+    """Abre uma conexão fora do pool, para tarefas de longa duração."""
+    return psycopg2.connect(
+        host=Config.DB_HOST,
+        port=Config.DB_PORT,
+        database=Config.DB_NAME,
+        user=Config.DB_USER,
+        password=Config.DB_PASSWORD
+    )
+
 def get_db_connection():
-    """Obtém uma conexão do pool."""
-    if connection_pool:
-        return connection_pool.getconn()
-    raise Exception("Pool de conexões não inicializado")
+    """Obtém uma conexão do pool.
+
+    Dentro de uma requisição, a conexão é emprestada no primeiro uso e
+    reaproveitada até o fim dela, quando volta ao pool.
+    """
+    if not connection_pool:
+        raise Exception("Pool de conexões não inicializado")
+    if not has_app_context():
+        return connection_pool.obter()
+    if 'conexao_db' not in g:
+        g.conexao_db = connection_pool.obter()
+    return g.conexao_db
 
 def release_db_connection(conn):
-    """Devolve a conexão ao pool."""
+    """Devolve a conexão ao pool (a da requisição volta só no teardown)."""
+    if has_app_context() and g.get('conexao_db') is conn:
+        return
     if connection_pool:
-        connection_pool.putconn(conn)
+        connection_pool.devolver(conn)
+
+def release_request_connection(exception=None):
+    """Devolve ao pool a conexão emprestada para a requisição atual."""
+    conn = g.pop('conexao_db', None)
+    if conn is not None and connection_pool:
+        connection_pool.devolver(conn)
+
+def get_pool_stats():
+    """Retorna as estatísticas do pool de conexões."""
+    if not connection_pool:
+        return None
+    return connection_pool.estatisticas()
 
 def close_db_pool():
     """Fecha todas as conexões do pool."""
     if connection_pool:
-        connection_pool.closeall()
+        connection_pool.fechar()
         print("Pool de conexões fechado!")
@@ -0,0 +1,108 @@
+"""Manifesto dos arquivos estáticos do frontend.
+
+A pasta static é lida uma única vez, na inicialização: cada arquivo entra no
+manifesto com tipo, ETag, versões pré-comprimidas (.br e .gz geradas no
+build, se existirem) e, se for pequeno, o próprio conteúdo em memória. As
+requisições ao frontend são respondidas só com o manifesto, sem consultar o
+sistema de arquivos; arquivos novos exigem reiniciar a aplicação.
+
+Os arquivos com hash no nome gerados pelo Vite (assets/index-a1b2c3d4.js)
+nunca mudam de conteúdo e são enviados com cache imutável. O index.html e os
+demais arquivos são revalidados pelo ETag a cada acesso.
+"""
+
+import hashlib
+import mimetypes
+import os
+import re
+
+from flask import current_app, request, send_file
+
+# Nome com hash de conteúdo, como o Vite gera em assets/
+PADRAO_HASH = re.compile(r'^assets/.+-[A-Za-z0-9_-]{8,}\.\w+$')
+
+CACHE_IMUTAVEL = 'public, max-age=31536000, immutable'
+CACHE_REVALIDAR = 'no-cache'
+
+# Extensões das versões pré-comprimidas, na ordem de preferência
+PRE_COMPRIMIDOS = (('br', '.br'), ('gzip', '.gz'))
+
+class ArquivoEstatico:
+    """Um arquivo do manifesto e suas versões pré-comprimidas."""
+    __slots__ = ('caminho', 'mimetype', 'etag', 'cache_control', 'conteudo', 'variantes')
+
+    def __init__(self, caminho, mimetype, etag, cache_control, conteudo):
+        self.caminho = caminho
+        self.mimetype = mimetype
+        self.etag = etag
+        self.cache_control = cache_control
+        self.conteudo = conteudo
+        self.variantes = {}
+
+def _ler_arquivo(caminho, limite_memoria):
+    """Retorna (etag, conteudo), com conteudo None para arquivos grandes."""
+    with open(caminho, 'rb') as arquivo:
+        conteudo = arquivo.read()
+    etag = hashlib.sha1(conteudo).hexdigest()[:20]
+    return etag, conteudo if len(conteudo) <= limite_memoria else None
+
+class ManifestoEstaticos:
+    """Arquivos da pasta static indexados pelo caminho relativo."""
+
+    def __init__(self, pasta, limite_memoria=1024 * 1024):
+        self.arquivos = {}
+        for raiz, _, nomes in os.walk(pasta):
+            for nome in nomes:
+                caminho = os.path.join(raiz, nome)
+                relativo = os.path.relpath(caminho, pasta).replace(os.sep, '/')
+                if relativo.endswith(tuple(extensao for _, extensao in PRE_COMPRIMIDOS)):
+                    continue
+                mimetype = mimetypes.guess_type(nome)[0] or 'application/octet-stream'
+                etag, conteudo = _ler_arquivo(caminho, limite_memoria)
+                cache_control = CACHE_IMUTAVEL if PADRAO_HASH.match(relativo) else CACHE_REVALIDAR
+                estatico = ArquivoEstatico(caminho, mimetype, etag, cache_control, conteudo)
+                for codificacao, extensao in PRE_COMPRIMIDOS:
+                    if os.path.isfile(caminho + extensao):
+                        estatico.variantes[codificacao] = _ler_arquivo(caminho + extensao, limite_memoria) + (caminho + extensao,)
+                self.arquivos[relativo] = estatico
+        self.index = self.arquivos.get('index.html')
+
+    def resposta(self, path):
+        """Responde o arquivo do caminho, o index.html (rotas do SPA) ou None."""
+        estatico = self.arquivos.get(path) if path else None
+        if estatico is None:
+            estatico = self.index
+        if estatico is None:
+            return None
+
+        codificacao = None
+        for candidata, _ in PRE_COMPRIMIDOS:
+            if candidata in estatico.variantes and request.accept_encodings.quality(candidata) > 0:
+                codificacao = candidata
+                break
+
+        if codificacao:
+            etag, conteudo, caminho = estatico.variantes[codificacao]
+            etag = f"{etag}-{codificacao}"
+        else:
+            etag, conteudo, caminho = estatico.etag, estatico.conteudo, estatico.caminho
+
+        if conteudo is not None:
+            resposta = current_app.response_class(conteudo, mimetype=estatico.mimetype)
+        else:
+            resposta = send_file(caminho, mimetype=estatico.mimetype, etag=False, conditional=False)
+        resposta.set_etag(etag)
+        resposta.headers['Cache-Control'] = estatico.cache_control
+        if estatico.variantes:
+            resposta.vary.add('Accept-Encoding')
+        if codificacao:
+            resposta.headers['Content-Encoding'] = codificacao
+        return resposta.make_conditional(request)
+
+def carregar_manifesto(pasta):
+    """Lê a pasta static e monta o manifesto, ou retorna None se ela não existir."""
+    if pasta is None or not os.path.isdir(pasta):
+        return None
+    manifesto = ManifestoEstaticos(pasta)
+    print(f"Manifesto de estáticos carregado com {len(manifesto.arquivos)} arquivos!")
+    return manifesto
@@ -0,0 +1,250 @@
+"""Distribuição de lances em tempo real para os espectadores.
+
+Uma única conexão por processo escuta o canal 'lances_novos' (LISTEN/NOTIFY,
+publicado pelo trigger da tabela lances) e repassa cada evento para as filas
+dos assinantes do stream. Um histórico curto em memória permite retomar o
+stream a partir do cabeçalho Last-Event-ID.
+
+O histórico segue a ordem dos commits, a mesma das notificações. Os IDs dos
+lances não seguem essa ordem (vêm de nextval, reservados em lote pelo motor
+e pela gravação agrupada), então a retomada pelo banco usa a data do lance
+com uma margem de EVENTOS_JANELA_RETOMADA segundos, maior que a duração de
+uma transação de lances. Lances já recebidos podem ser reenviados; o
+cliente descarta os IDs repetidos.
+
+Quando faltam mais de LIMITE_RETOMADA lances para retomar, o stream envia o
+evento 'recarregar' no lugar deles: o cliente busca de novo o estado atual e
+segue recebendo os lances a partir dali. Ao reconectar, a escuta reenvia do
+banco os lances perdidos enquanto esteve desconectada.
+"""
+
+import json
+import queue
+import select
+import threading
+import time
+from collections import deque
+
+import psycopg2.extensions
+
+from src.config import Config
+from src.db import get_db_connection, release_db_connection, create_dedicated_connection
+
+CANAL_LANCES = 'lances_novos'
+
+# Limite de eventos recuperados do banco quando o histórico não cobre a retomada
+LIMITE_RETOMADA = 500
+
+# Tipo do evento que manda o cliente recarregar o estado atual
+EVENTO_RECARREGAR = 'recarregar'
+
+class Assinatura:
+    """Fila de eventos de um cliente do stream, com seus filtros."""
+
+    def __init__(self, item_id=None, campanha_id=None, tamanho_fila=100):
+        self.item_id = item_id
+        self.campanha_id = campanha_id
+        self.fila = queue.Queue(maxsize=tamanho_fila)
+        self.retomada = []
+
+    def encerrar(self):
+        """Sinaliza o fim do stream abrindo espaço na fila para o marcador."""
+        try:
+            self.fila.get_nowait()
+        except queue.Empty:
+            pass
+        self.fila.put_nowait(None)
+
+    def aceita(self, evento):
+        if self.item_id is not None and evento['item_id'] != self.item_id:
+            return False
+        if self.campanha_id is not None and evento['campanha_id'] != self.campanha_id:
+            return False
+        return True
+
+class TransmissorLances:
+    """Escuta as notificações de lances e as distribui aos assinantes."""
+
+    def __init__(self, tamanho_historico=1000):
+        self._assinantes = set()
+        self._historico = deque(maxlen=tamanho_historico)
+        self._trava = threading.Lock()
+        self._ouvinte = None
+
+    def iniciar(self):
+        """Inicia a thread que mantém a conexão LISTEN."""
+        self._ouvinte = threading.Thread(target=self._ouvir, name='eventos-lances', daemon=True)
+        self._ouvinte.start()
+
+    def _ouvir(self):
+        while True:
+            conn = None
+            try:
+                conn = create_dedicated_connection()
+                conn.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+                cursor = conn.cursor()
+                cursor.execute(f"LISTEN {CANAL_LANCES}")
+                # Já escutando: o que for notificado daqui em diante não se perde
+                reenviados = self._reenviar_perdidos()
+                while True:
+                    if select.select([conn], [], [], 30) == ([], [], []):
+                        continue
+                    conn.poll()
+                    while conn.notifies:
+                        notificacao = conn.notifies.pop(0)
+                        evento = json.loads(notificacao.payload)
+                        if evento['id'] in reenviados:
+                            reenviados.discard(evento['id'])
+                            continue
+                        self.publicar(evento)
+            except Exception as e:
+                print(f"Erro na escuta de lances, reconectando: {e}")
+                time.sleep(1)
+            finally:
+                if conn and not conn.closed:
+                    conn.close()
+
+    def _reenviar_perdidos(self):
+        """Publica os lances confirmados desde o último transmitido; retorna os IDs."""
+        with self._trava:
+            if not self._historico:
+                return set()
+            ultimo_id = self._historico[-1]['id']
+            ja_transmitidos = {evento['id'] for evento in self._historico}
+        eventos, completo = _lances_desde(ultimo_id)
+        if not completo:
+            # O histórico ficou com um buraco: quem retomar por ele vai ao banco
+            evento = _evento_recarregar(eventos[-1]['id'])
+            with self._trava:
+                self._historico.clear()
+                for assinatura in list(self._assinantes):
+                    self._entregar(assinatura, evento)
+            return set()
+        eventos = [evento for evento in eventos if evento['id'] not in ja_transmitidos]
+        for evento in eventos:
+            self.publicar(evento)
+        return {evento['id'] for evento in eventos}
+
+    def publicar(self, evento):
+        """Guarda o evento no histórico e o entrega aos assinantes."""
+        with self._trava:
+            self._historico.append(evento)
+            for assinatura in list(self._assinantes):
+                if assinatura.aceita(evento):
+                    self._entregar(assinatura, evento)
+
+    def _entregar(self, assinatura, evento):
+        # Chamado com a trava obtida
+        try:
+            assinatura.fila.put_nowait(evento)
+        except queue.Full:
+            # Cliente lento: encerra o stream, ele retoma pelo Last-Event-ID
+            self._assinantes.discard(assinatura)
+            assinatura.encerrar()
+
+    def assinar(self, item_id=None, campanha_id=None, ultimo_id=None):
+        """Registra um assinante, já com os eventos perdidos desde ultimo_id."""
+        assinatura = Assinatura(item_id, campanha_id)
+        recuperar_do_banco = False
+
+        with self._trava:
+            if ultimo_id is not None:
+                ids = [evento['id'] for evento in self._historico]
+                if ultimo_id in ids:
+                    posicao = ids.index(ultimo_id) + 1
+                    assinatura.retomada = [
+                        evento for evento in list(self._historico)[posicao:]
+                        if assinatura.aceita(evento)
+                    ]
+                else:
+                    recuperar_do_banco = True
+            self._assinantes.add(assinatura)
+
+        if recuperar_do_banco:
+            # Eventos que também chegarem pela fila são ignorados pelo stream
+            eventos, completo = _lances_desde(ultimo_id)
+            if completo:
+                assinatura.retomada = [evento for evento in eventos if assinatura.aceita(evento)]
+            else:
+                assinatura.retomada = [_evento_recarregar(eventos[-1]['id'])]
+        return assinatura
+
+    def cancelar(self, assinatura):
+        """Remove o assinante quando o cliente desconecta."""
+        with self._trava:
+            self._assinantes.discard(assinatura)
+
+def _evento_recarregar(ultimo_id):
+    # Leva o ID do lance mais recente recuperado, para que a próxima retomada
+    # parta dele e não caia de novo no limite
+    return {'tipo': EVENTO_RECARREGAR, 'id': ultimo_id}
+
+def _lances_desde(ultimo_id):
+    """Lances confirmados depois de ultimo_id, como (eventos, completo).
+
+    completo é False se houver mais de LIMITE_RETOMADA lances; nesse caso o
+    último evento é o do lance mais recente, não o seguinte aos retornados.
+    """
+    conn = get_db_connection()
+    try:
+        cursor = conn.cursor()
+        # Sem o último lance (removido ou arquivado), recai na ordem dos IDs
+        cursor.execute("""
+            WITH ultimo AS (
+                SELECT max(data_lance) - %(janela)s * INTERVAL '1 second' AS desde
+                FROM lances
+                WHERE id = %(ultimo_id)s
+            )
+            SELECT l.id, l.item_id, l.campanha_id, l.valor, l.data_lance
+            FROM lances l, ultimo
+            WHERE l.id <> %(ultimo_id)s
+              AND CASE WHEN ultimo.desde IS NULL THEN l.id > %(ultimo_id)s
+                       ELSE l.data_lance >= ultimo.desde END
+            ORDER BY l.data_lance, l.id
+            LIMIT %(limite)s
+        """, {'ultimo_id': ultimo_id, 'janela': Config.EVENTOS_JANELA_RETOMADA, 'limite': LIMITE_RETOMADA + 1})
+        lances = cursor.fetchall()
+        completo = len(lances) <= LIMITE_RETOMADA
+        if not completo:
+            cursor.execute("""
+                SELECT id, item_id, campanha_id, valor, data_lance
+                FROM lances
+                ORDER BY data_lance DESC, id DESC
+                LIMIT 1
+            """)
+            lances = [cursor.fetchone()]
+        eventos = [{
+            'id': lance[0],
+            'item_id': lance[1],
+            'campanha_id': lance[2],
+            'valor': float(lance[3]),
+            'data_lance': lance[4].isoformat()
+        } for lance in lances]
+        cursor.close()
+        conn.commit()
+        return eventos, completo
+    finally:
+        release_db_connection(conn)
+
+def formatar_evento(evento):
+    """Serializa um evento no formato Server-Sent Events."""
+    if evento.get('tipo') == EVENTO_RECARREGAR:
+        return f"id: {evento['id']}\nevent: {EVENTO_RECARREGAR}\ndata: {{}}\n\n"
+    return f"id: {evento['id']}\nevent: lance\ndata: {json.dumps(evento)}\n\n"
+
+transmissor_lances = None
+_trava_transmissor = threading.Lock()
+
+def get_transmissor_lances():
+    """Retorna o transmissor de lances deste processo, iniciando-o no primeiro uso.
+
+    Só o stream o usa: os comandos da CLI, que importam a aplicação, não
+    abrem a conexão LISTEN.
+    """
+    global transmissor_lances
+    with _trava_transmissor:
+        if transmissor_lances is None:
+            transmissor = TransmissorLances(tamanho_historico=Config.EVENTOS_HISTORICO)
+            transmissor.iniciar()
+            transmissor_lances = transmissor
+        return transmissor_lances
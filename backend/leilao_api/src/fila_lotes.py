@@ -0,0 +1,130 @@
+"""Fila de gravação em lote com confirmação por requisição.
+
+Agrupa as gravações enviadas por várias requisições durante alguns
+milissegundos e as grava numa única transação, em uma conexão dedicada. Cada
+requisição recebe um Future que é resolvido com o seu próprio resultado depois
+do commit do lote. Um resultado que seja uma exceção é entregue como falha
+apenas ao seu item; os demais itens do lote continuam confirmados. Se o lote
+inteiro falhar, os itens são gravados de novo um a um, e só os que falharem
+outra vez recebem o erro.
+"""
+
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from src.db import create_dedicated_connection
+
+class ConfirmacaoPendente(Exception):
+    """O lote não foi gravado dentro do prazo de espera; o item continua na fila."""
+
+    def __init__(self, mensagem, lance_atual=None):
+        super().__init__(mensagem)
+        self.lance_atual = lance_atual
+
+class FilaLotes:
+    """Coleta itens enviados por várias threads e os grava em lotes."""
+
+    def __init__(self, processar_lote, nome, tamanho_lote=200, intervalo=0.005, ao_falhar=None):
+        # processar_lote(cursor, itens) deve retornar um resultado por item, na ordem
+        self._processar_lote = processar_lote
+        self._ao_falhar = ao_falhar
+        self._nome = nome
+        self._fila = queue.Queue()
+        self._tamanho_lote = tamanho_lote
+        self._intervalo = intervalo
+        self._escritor = None
+        self._parando = threading.Event()
+
+    def iniciar(self):
+        """Inicia a thread de gravação."""
+        self._escritor = threading.Thread(target=self._gravar, name=self._nome, daemon=True)
+        self._escritor.start()
+
+    def parar(self):
+        """Grava o que estiver pendente e encerra a thread de gravação."""
+        if self._escritor:
+            self._parando.set()
+            self._escritor.join()
+            self._escritor = None
+
+    def enviar(self, item):
+        """Enfileira um item e retorna o Future do seu resultado."""
+        confirmacao = Future()
+        self._fila.put((item, confirmacao))
+        return confirmacao
+
+    def _proximo_lote(self):
+        try:
+            lote = [self._fila.get(timeout=0.5)]
+        except queue.Empty:
+            return []
+
+        limite = time.monotonic() + self._intervalo
+        while len(lote) < self._tamanho_lote:
+            restante = limite - time.monotonic()
+            if restante <= 0:
+                break
+            try:
+                lote.append(self._fila.get(timeout=restante))
+            except queue.Empty:
+                break
+        return lote
+
+    def _executar(self, conn, lote):
+        """Grava o lote numa transação e entrega os resultados; relança a falha."""
+        cursor = conn.cursor()
+        try:
+            resultados = self._processar_lote(cursor, [item for item, _ in lote])
+            conn.commit()
+        except Exception:
+            if not conn.closed:
+                conn.rollback()
+            raise
+        finally:
+            cursor.close()
+
+        for resultado, (_, confirmacao) in zip(resultados, lote):
+            if isinstance(resultado, Exception):
+                confirmacao.set_exception(resultado)
+            else:
+                confirmacao.set_result(resultado)
+
+    def _falhar(self, lote, erro):
+        if self._ao_falhar:
+            self._ao_falhar([item for item, _ in lote])
+        for _, confirmacao in lote:
+            confirmacao.set_exception(erro)
+
+    def _gravar(self):
+        conn = None
+        while not (self._parando.is_set() and self._fila.empty()):
+            lote = self._proximo_lote()
+            if not lote:
+                continue
+
+            try:
+                if conn is None or conn.closed:
+                    conn = create_dedicated_connection()
+                self._executar(conn, lote)
+                continue
+            except Exception as e:
+                erro = e
+
+            if len(lote) == 1 or conn is None or conn.closed:
+                # Sem conexão, regravar item a item falharia do mesmo jeito
+                self._falhar(lote, erro)
+                continue
+
+            # Um item com problema não derruba os demais: grava um a um
+            for entrada in lote:
+                try:
+                    if conn.closed:
+                        conn = create_dedicated_connection()
+                    self._executar(conn, [entrada])
+                except Exception as e:
+                    self._falhar([entrada], e)
+
+        if conn and not conn.closed:
+            conn.close()
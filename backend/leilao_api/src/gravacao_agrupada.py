@@ -0,0 +1,67 @@
+"""Gravação agrupada (group commit) dos lances pelo caminho SQL.
+
+Os lances de requisições concorrentes são reunidos por alguns milissegundos
+e registrados com um único comando e um único commit, dividindo o custo do
+fsync entre todas elas. A validação continua sendo feita pelo banco, com as
+mesmas regras de src.precos.registrar_lance.
+"""
+
+from concurrent.futures import TimeoutError as TempoEsgotado
+
+from src.config import Config
+from src.fila_lotes import FilaLotes, ConfirmacaoPendente
+from src.precos import registrar_lances_em_lote
+
+class GravacaoAgrupada:
+    """Registra lances em lotes e devolve a cada requisição o seu resultado."""
+
+    def __init__(self, tamanho_lote=100, intervalo=0.003, timeout=5.0):
+        self._fila = FilaLotes(
+            registrar_lances_em_lote,
+            nome='gravacao-agrupada',
+            tamanho_lote=tamanho_lote,
+            intervalo=intervalo
+        )
+        self._timeout = timeout
+
+    def iniciar(self):
+        self._fila.iniciar()
+
+    def parar(self):
+        self._fila.parar()
+
+    def registrar_lance(self, item_id, valor, nome_participante, telefone):
+        """Aguarda o commit do lote e retorna o resultado deste lance.
+
+        Lança ConfirmacaoPendente se o lote não for gravado a tempo: o lance
+        continua na fila e ainda será validado.
+        """
+        confirmacao = self._fila.enviar((item_id, valor, nome_participante, telefone))
+        try:
+            return confirmacao.result(timeout=self._timeout)
+        except TempoEsgotado:
+            raise ConfirmacaoPendente('Lance recebido! A validação e a gravação ainda estão pendentes.')
+
+gravacao_agrupada = None
+
+def init_gravacao_agrupada():
+    """Inicia a gravação agrupada, se habilitada na configuração."""
+    global gravacao_agrupada
+    if not Config.GRAVACAO_AGRUPADA_ATIVA:
+        return
+    gravacao = GravacaoAgrupada(
+        tamanho_lote=Config.GRAVACAO_AGRUPADA_LOTE,
+        intervalo=Config.GRAVACAO_AGRUPADA_INTERVALO_MS / 1000,
+        timeout=Config.GRAVACAO_AGRUPADA_TIMEOUT
+    )
+    gravacao.iniciar()
+    gravacao_agrupada = gravacao
+
+def get_gravacao_agrupada():
+    """Retorna a gravação agrupada ativa, ou None para gravar lance a lance."""
+    return gravacao_agrupada
+
+def close_gravacao_agrupada():
+    """Encerra a gravação agrupada gravando o que estiver pendente."""
+    if gravacao_agrupada:
+        gravacao_agrupada.parar()
@@ -0,0 +1,254 @@
+"""Banners das campanhas e dos itens em variantes de tamanho fixo.
+
+Cada imagem é normalizada uma única vez: orientação corrigida pelo EXIF,
+recorte central em 16:9 e 1:1 e redução a algumas larguras, em JPEG e WebP,
+sem metadados. As variantes ficam em IMAGENS_PASTA, numa pasta com o hash do
+conteúdo original: a mesma imagem enviada de novo reaproveita os arquivos, e
+cada URL aponta sempre para o mesmo conteúdo, o que permite cache imutável.
+
+As colunas de banner guardam a URL da variante JPEG padrão de cada formato
+(/api/imagens/<chave>/16_9-960.jpg); as outras larguras e o WebP têm o mesmo
+nome com outra largura ou extensão. Imagens menores que uma largura não são
+ampliadas: o arquivo daquela largura fica com o tamanho original.
+
+Exige o pacote opcional Pillow.
+"""
+
+import hashlib
+import io
+import os
+import re
+import tempfile
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from src.config import Config
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:
+    Image = None
+
+# Entra no hash: mudar o processamento gera URLs novas em vez de alterar
+# arquivos já servidos como imutáveis
+VERSAO_PROCESSAMENTO = b'2'
+
+# Formato: (proporção, larguras, largura padrão)
+FORMATOS = {
+    '16_9': ((16, 9), (480, 960, 1600), 960),
+    '1_1': ((1, 1), (320, 640, 960), 640),
+}
+EXTENSOES = {'jpg': ('JPEG', 'image/jpeg'), 'webp': ('WEBP', 'image/webp')}
+
+PREFIXO_URL = '/api/imagens'
+PADRAO_CHAVE = re.compile(r'^[0-9a-f]{32}$')
+PADRAO_ARQUIVO = re.compile(r'^(16_9|1_1)-\d+\.(jpg|webp)$')
+
+# Acima disso a imagem é recusada antes de ser decodificada
+PIXELS_MAXIMO = 50_000_000
+
+class ErroImagem(Exception):
+    """A imagem não pode ser lida ou processada."""
+
+def imagens_disponiveis():
+    """Indica se o Pillow está instalado."""
+    return Image is not None
+
+def _nome_arquivo(formato, largura, extensao):
+    return f'{formato}-{largura}.{extensao}'
+
+def _nomes_variantes():
+    return [
+        _nome_arquivo(formato, largura, extensao)
+        for formato, (_, larguras, _) in FORMATOS.items()
+        for largura in larguras
+        for extensao in EXTENSOES
+    ]
+
+def _pasta_imagem(chave):
+    return os.path.join(Config.IMAGENS_PASTA, chave[:2], chave)
+
+def url_variante(chave, formato, largura=None, extensao='jpg'):
+    """URL de uma variante; sem largura, a largura padrão do formato."""
+    largura = largura or FORMATOS[formato][2]
+    return f'{PREFIXO_URL}/{chave}/{_nome_arquivo(formato, largura, extensao)}'
+
+def urls_imagem(chave):
+    """URLs padrão de cada formato e de todas as variantes da imagem."""
+    return {
+        'chave': chave,
+        'banner_16_9': url_variante(chave, '16_9'),
+        'banner_1_1': url_variante(chave, '1_1'),
+        'variantes': [f'{PREFIXO_URL}/{chave}/{nome}' for nome in _nomes_variantes()],
+    }
+
+def caminho_variante(chave, nome):
+    """Caminho no disco da variante, ou None se o nome não for de uma variante."""
+    if not PADRAO_CHAVE.match(chave) or not PADRAO_ARQUIVO.match(nome):
+        return None
+    return os.path.join(_pasta_imagem(chave), nome)
+
+def mimetype_variante(nome):
+    return EXTENSOES[nome.rsplit('.', 1)[1]][1]
+
+def _abrir(conteudo):
+    """Decodifica a imagem em RGB, já na orientação correta."""
+    try:
+        imagem = Image.open(io.BytesIO(conteudo))
+        if imagem.width * imagem.height > PIXELS_MAXIMO:
+            raise ErroImagem(f'Imagem muito grande: {imagem.width}x{imagem.height} pixels!')
+        # JPEGs de celular são decodificados já reduzidos (até 1/8), desde que
+        # os dois lados continuem maiores que a maior variante: a rotação do
+        # EXIF, aplicada depois, pode trocar a largura pela altura
+        largura = max(max(larguras) for _, larguras, _ in FORMATOS.values())
+        imagem.draft('RGB', (largura, largura))
+        imagem = ImageOps.exif_transpose(imagem)
+        if imagem.mode in ('RGBA', 'LA', 'PA') or 'transparency' in imagem.info:
+            # Transparência vira fundo branco
+            imagem = imagem.convert('RGBA')
+            fundo = Image.new('RGB', imagem.size, (255, 255, 255))
+            fundo.paste(imagem, mask=imagem.getchannel('A'))
+            return fundo
+        return imagem.convert('RGB')
+    except ErroImagem:
+        raise
+    except Exception:
+        raise ErroImagem('O arquivo não é uma imagem válida!')
+
+def _recorte_central(imagem, proporcao):
+    a, b = proporcao
+    largura, altura = imagem.size
+    if largura * b > altura * a:
+        nova_largura = altura * a // b
+        esquerda = (largura - nova_largura) // 2
+        return imagem.crop((esquerda, 0, esquerda + nova_largura, altura))
+    nova_altura = largura * b // a
+    topo = (altura - nova_altura) // 2
+    return imagem.crop((0, topo, largura, topo + nova_altura))
+
+def gerar_variantes(conteudo):
+    """Retorna {nome do arquivo: bytes} com todas as variantes da imagem."""
+    imagem = _abrir(conteudo)
+    variantes = {}
+    for formato, (proporcao, larguras, _) in FORMATOS.items():
+        recorte = _recorte_central(imagem, proporcao)
+        for largura in larguras:
+            if largura < recorte.width:
+                altura = max(1, round(largura * proporcao[1] / proporcao[0]))
+                reduzida = recorte.resize((largura, altura), Image.LANCZOS, reducing_gap=3.0)
+            else:
+                reduzida = recorte
+            for extensao, (formato_pil, _) in EXTENSOES.items():
+                saida = io.BytesIO()
+                if formato_pil == 'JPEG':
+                    reduzida.save(saida, 'JPEG', quality=Config.IMAGENS_QUALIDADE, optimize=True, progressive=True)
+                else:
+                    reduzida.save(saida, 'WEBP', quality=Config.IMAGENS_QUALIDADE, method=4)
+                variantes[_nome_arquivo(formato, largura, extensao)] = saida.getvalue()
+    return variantes
+
+def _gravar(caminho, dados):
+    # Grava num temporário e renomeia: quem lê nunca vê um arquivo pela metade
+    descritor, temporario = tempfile.mkstemp(dir=os.path.dirname(caminho), suffix='.tmp')
+    try:
+        with os.fdopen(descritor, 'wb') as arquivo:
+            arquivo.write(dados)
+        os.replace(temporario, caminho)
+    except Exception:
+        os.unlink(temporario)
+        raise
+
+def processar_imagem(conteudo):
+    """Gera e grava as variantes da imagem, se ainda não existirem; retorna a chave."""
+    if Image is None:
+        raise ErroImagem('Processamento de imagens indisponível: instale o pacote Pillow!')
+    if len(conteudo) > Config.IMAGENS_TAMANHO_MAXIMO:
+        raise ErroImagem(f'Imagem excede {Config.IMAGENS_TAMANHO_MAXIMO} bytes!')
+    chave = hashlib.sha256(VERSAO_PROCESSAMENTO + conteudo).hexdigest()[:32]
+    pasta = _pasta_imagem(chave)
+    if all(os.path.isfile(os.path.join(pasta, nome)) for nome in _nomes_variantes()):
+        return chave
+    variantes = gerar_variantes(conteudo)
+    os.makedirs(pasta, exist_ok=True)
+    for nome, dados in variantes.items():
+        _gravar(os.path.join(pasta, nome), dados)
+    return chave
+
+def ler_origem(url, pasta_local=None):
+    """Lê os bytes de um banner antigo: URL http(s) ou caminho servido pelo frontend."""
+    if url.startswith(('http://', 'https://')):
+        try:
+            with urllib.request.urlopen(url, timeout=Config.IMAGENS_TIMEOUT_DOWNLOAD) as resposta:
+                conteudo = resposta.read(Config.IMAGENS_TAMANHO_MAXIMO + 1)
+        except (urllib.error.URLError, ValueError, OSError) as e:
+            raise ErroImagem(f'Falha ao baixar {url}: {str(e)}')
+        return conteudo
+    if pasta_local is None:
+        raise ErroImagem(f'URL não suportada: {url}')
+    raiz = os.path.realpath(pasta_local)
+    caminho = os.path.realpath(os.path.join(raiz, url.split('?', 1)[0].lstrip('/')))
+    if not caminho.startswith(raiz + os.sep) or not os.path.isfile(caminho):
+        raise ErroImagem(f'Arquivo não encontrado: {url}')
+    with open(caminho, 'rb') as arquivo:
+        return arquivo.read(Config.IMAGENS_TAMANHO_MAXIMO + 1)
+
+def banners_pendentes(cursor):
+    """URLs de banner ainda não convertidas, sem repetição."""
+    cursor.execute("""
+        SELECT banner FROM campanhas WHERE banner <> ''
+        UNION SELECT banner_16_9 FROM itens WHERE banner_16_9 <> ''
+        UNION SELECT banner_1_1 FROM itens WHERE banner_1_1 <> ''
+    """)
+    return sorted(row[0] for row in cursor.fetchall() if not row[0].startswith(PREFIXO_URL + '/'))
+
+def converter_banners(urls, trabalhadores, pasta_local=None):
+    """Converte os banners em paralelo; retorna ({url: chave}, {url: erro}).
+
+    Threads bastam: o Pillow libera o GIL ao decodificar, redimensionar e
+    comprimir, e os downloads esperam pela rede.
+    """
+    def converter(url):
+        try:
+            return url, processar_imagem(ler_origem(url, pasta_local)), None
+        except ErroImagem as e:
+            return url, None, str(e)
+        except Exception as e:
+            # Uma falha inesperada num banner não interrompe a conversão dos demais
+            print(f"Erro ao converter o banner {url}: {e!r}")
+            return url, None, f'Erro inesperado: {str(e)}'
+
+    chaves, falhas = {}, {}
+    with ThreadPoolExecutor(max_workers=max(1, trabalhadores), thread_name_prefix='imagens') as executor:
+        for url, chave, erro in executor.map(converter, urls):
+            if chave:
+                chaves[url] = chave
+            else:
+                falhas[url] = erro
+    return chaves, falhas
+
+def reescrever_banners(cursor, chaves):
+    """Troca as URLs antigas pelas das variantes; chaves mapeia URL antiga -> chave.
+
+    O banner da campanha e o banner_16_9 dos itens recebem a variante 16:9; o
+    banner_1_1, a 1:1. Retorna o número de linhas alteradas.
+    """
+    if not chaves:
+        return 0
+    alteradas = 0
+    for tabela, coluna, formato in (
+        ('campanhas', 'banner', '16_9'),
+        ('itens', 'banner_16_9', '16_9'),
+        ('itens', 'banner_1_1', '1_1'),
+    ):
+        novas = [(antiga, url_variante(chave, formato)) for antiga, chave in chaves.items()]
+        cursor.execute(
+            f"""
+            UPDATE {tabela} t SET {coluna} = m.nova
+            FROM unnest(%s::TEXT[], %s::TEXT[]) AS m(antiga, nova)
+            WHERE t.{coluna} = m.antiga
+            """,
+            ([antiga for antiga, _ in novas], [nova for _, nova in novas])
+        )
+        alteradas += cursor.rowcount
+    return alteradas
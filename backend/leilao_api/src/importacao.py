@@ -0,0 +1,105 @@
+"""Leitura e validação dos itens importados em lote (POST /api/itens/lote).
+
+Os itens chegam como um array JSON ou como um arquivo CSV com cabeçalho
+(separado por vírgula ou ponto e vírgula), com as colunas nome,
+lance_inicial, categoria_id ou categoria (pelo nome) e, opcionalmente,
+banner_16_9 e banner_1_1. Cada linha é validada antes de qualquer gravação,
+e os erros são devolvidos com o número da linha.
+"""
+
+import csv
+import io
+from decimal import Decimal, InvalidOperation
+
+from src.precos import LANCE_MAXIMO
+
+LIMITE_ITENS_LOTE = 5000
+
+CAMPOS_TEXTO = (('nome', 255), ('banner_16_9', 255), ('banner_1_1', 255))
+
+class ErroImportacao(Exception):
+    """O conteúdo enviado não pode ser lido como uma lista de itens."""
+
+def ler_csv(conteudo):
+    """Converte o CSV em uma lista de dicts, pelas colunas do cabeçalho."""
+    if isinstance(conteudo, bytes):
+        try:
+            conteudo = conteudo.decode('utf-8-sig')
+        except UnicodeDecodeError:
+            raise ErroImportacao('O CSV deve estar em UTF-8!')
+    primeira_linha = conteudo.split('\n', 1)[0]
+    separador = ';' if primeira_linha.count(';') > primeira_linha.count(',') else ','
+    leitor = csv.DictReader(io.StringIO(conteudo), delimiter=separador)
+    if not leitor.fieldnames:
+        raise ErroImportacao('CSV sem cabeçalho!')
+    leitor.fieldnames = [campo.strip().lower() for campo in leitor.fieldnames]
+    return [{campo: (valor or '').strip() for campo, valor in linha.items() if campo} for linha in leitor]
+
+def _ler_lance(valor):
+    if isinstance(valor, str):
+        valor = valor.replace('R$', '').strip()
+        # Aceita o formato brasileiro: 1.234,56
+        if ',' in valor:
+            valor = valor.replace('.', '').replace(',', '.')
+    try:
+        lance = Decimal(str(valor))
+    except (InvalidOperation, ValueError):
+        return None
+    if not lance.is_finite() or lance < 0 or lance > LANCE_MAXIMO:
+        return None
+    return lance.quantize(Decimal('0.01'))
+
+def validar_itens(linhas, categorias):
+    """Valida as linhas e retorna (itens, erros).
+
+    categorias mapeia o ID de cada categoria ao seu nome. Cada item válido é a
+    tupla (nome, categoria_id, lance_inicial, banner_16_9, banner_1_1); cada
+    erro é um dict com a linha (a partir de 1) e as mensagens.
+    """
+    por_nome = {nome.strip().lower(): id for id, nome in categorias.items()}
+    itens, erros = [], []
+    for numero, linha in enumerate(linhas, 1):
+        if not isinstance(linha, dict):
+            erros.append({'linha': numero, 'erros': ['Item deve ser um objeto!']})
+            continue
+        mensagens = []
+
+        textos = {}
+        for campo, tamanho in CAMPOS_TEXTO:
+            valor = linha.get(campo)
+            valor = str(valor).strip() if valor not in (None, '') else None
+            if valor and len(valor) > tamanho:
+                mensagens.append(f'{campo} excede {tamanho} caracteres')
+            textos[campo] = valor
+        if not textos['nome']:
+            mensagens.append('nome é obrigatório')
+
+        categoria_id = None
+        if linha.get('categoria_id') not in (None, ''):
+            try:
+                categoria_id = int(linha['categoria_id'])
+            except (TypeError, ValueError):
+                pass
+            if categoria_id not in categorias:
+                mensagens.append(f"categoria_id {linha['categoria_id']} não encontrada")
+                categoria_id = None
+        elif linha.get('categoria') not in (None, ''):
+            categoria_id = por_nome.get(str(linha['categoria']).strip().lower())
+            if categoria_id is None:
+                mensagens.append(f"categoria '{linha['categoria']}' não encontrada")
+        else:
+            mensagens.append('categoria_id ou categoria é obrigatório')
+
+        lance_inicial = None
+        if linha.get('lance_inicial') in (None, ''):
+            mensagens.append('lance_inicial é obrigatório')
+        else:
+            lance_inicial = _ler_lance(linha['lance_inicial'])
+            if lance_inicial is None:
+                mensagens.append(f"lance_inicial inválido: {linha['lance_inicial']}")
+
+        if mensagens:
+            erros.append({'linha': numero, 'erros': mensagens})
+        else:
+            itens.append((textos['nome'], categoria_id, lance_inicial, textos['banner_16_9'], textos['banner_1_1']))
+    return itens, erros
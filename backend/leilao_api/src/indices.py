@@ -0,0 +1,102 @@
+"""Verificação de que as consultas mais frequentes usam os índices esperados.
+
+Roda EXPLAIN em cada consulta com a varredura sequencial desabilitada, para
+que o resultado não dependa do volume de dados do banco verificado: se o
+índice existir e servir para a consulta, ele aparece no plano. Nas tabelas
+particionadas, o plano usa os índices de cada partição, comparados pelo
+índice da tabela principal de que derivam.
+"""
+
+CONSULTAS_QUENTES = [
+    (
+        'Catálogo por campanha',
+        "SELECT i.id, i.nome FROM itens i WHERE i.campanha_id = %s ORDER BY i.id DESC",
+        (1,),
+        'itens_campanha_idx'
+    ),
+    (
+        'Últimos lances do item',
+        """
+            SELECT id, valor, data_lance FROM lances
+            WHERE campanha_id = %s AND item_id = %s ORDER BY data_lance DESC, id DESC LIMIT 3
+        """,
+        (1, 1),
+        'lances_item_data_idx'
+    ),
+    (
+        'Listagem paginada de lances',
+        """
+            SELECT l.id, l.valor, l.data_lance FROM lances l
+            WHERE (l.data_lance, l.id) < (now(), %s)
+            ORDER BY l.data_lance DESC, l.id DESC LIMIT 51
+        """,
+        (2 ** 31 - 1,),
+        'lances_data_idx'
+    ),
+    (
+        'Lances por categoria',
+        """
+            SELECT l.id FROM lances l JOIN itens i ON l.item_id = i.id
+            WHERE i.categoria_id = %s
+        """,
+        (1,),
+        'itens_categoria_idx'
+    ),
+    (
+        'Campanhas por status',
+        "SELECT id, nome FROM campanhas WHERE status = %s ORDER BY ano DESC",
+        ('ativa',),
+        'campanhas_status_ano_idx'
+    ),
+    (
+        'Log de auditoria paginado',
+        "SELECT a.id, a.acao FROM auditoria a ORDER BY a.data_acao DESC, a.id DESC LIMIT 101",
+        (),
+        'auditoria_data_idx'
+    ),
+    (
+        'Busca de itens por palavras',
+        "SELECT i.id FROM itens i WHERE i.busca @@ websearch_to_tsquery('portugues_sem_acento', %s)",
+        ('bolo',),
+        'itens_busca_idx'
+    ),
+    (
+        'Busca de itens por trecho do nome',
+        "SELECT i.id FROM itens i WHERE sem_acento(i.nome) ILIKE sem_acento(%s)",
+        ('%bolo%',),
+        'itens_nome_trgm_idx'
+    ),
+]
+
+def _indices_do_plano(plano):
+    indices = set()
+    if 'Index Name' in plano:
+        indices.add(plano['Index Name'])
+    for subplano in plano.get('Plans', []):
+        indices |= _indices_do_plano(subplano)
+    return indices
+
+def _indices_principais(cursor, indices):
+    if not indices:
+        return set()
+    cursor.execute(
+        "SELECT COALESCE(pg_partition_root(nome::regclass), nome::regclass)::text FROM unnest(%s) nome",
+        (list(indices),)
+    )
+    return {row[0] for row in cursor.fetchall()}
+
+def verificar_indices(conn):
+    """Retorna (descricao, indice_esperado, usado) para cada consulta quente."""
+    cursor = conn.cursor()
+    resultado = []
+    try:
+        cursor.execute("SET LOCAL enable_seqscan = off")
+        for descricao, sql, params, indice in CONSULTAS_QUENTES:
+            cursor.execute("EXPLAIN (FORMAT JSON) " + sql, params)
+            plano = cursor.fetchone()[0][0]['Plan']
+            usados = _indices_principais(cursor, _indices_do_plano(plano))
+            resultado.append((descricao, indice, indice in usados))
+    finally:
+        conn.rollback()
+        cursor.close()
+    return resultado
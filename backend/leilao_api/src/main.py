@@ -1,12 +1,20 @@
 import os
 import sys
+import atexit
 # DON'T CHANGE THIS !!!
 sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 
-from flask import Flask, send_from_directory
+from flask import Flask
 from flask_cors import CORS
 from src.config import Config
-from src.db import init_db_pool, close_db_pool
+from src.db import init_db_pool, close_db_pool, release_request_connection
+from src.cli import register_commands
+from src.compressao import init_compressao
+from src.serializacao import ProvedorJson
+from src.estaticos import carregar_manifesto
+from src.senhas import init_pool_senhas, close_pool_senhas
+from src.motor_lances import init_motor_lances, close_motor_lances
+from src.gravacao_agrupada import init_gravacao_agrupada, close_gravacao_agrupada
 
 # Importa os blueprints
 from src.routes.auth import auth_bp
@@ -16,12 +24,16 @@ from src.routes.itens import itens_bp
 from src.routes.lances import lances_bp
 from src.routes.usuarios import usuarios_bp
 from src.routes.dashboard import dashboard_bp
+from src.routes.imagens import imagens_bp
 
 app = Flask(__name__, static_folder=os.path.join(os.path.dirname(__file__), 'static'))
 app.config['SECRET_KEY'] = Config.SECRET_KEY
 
+# Serializa Decimal e datas direto no JSON (orjson, se instalado)
+app.json = ProvedorJson(app)
+
 # Habilita CORS para desenvolvimento
-CORS(app)
+CORS(app, expose_headers=['ETag'])
 
 # Inicializa o pool de conexões com o banco de dados
 try:
@@ -29,6 +41,23 @@ try:
 except Exception as e:
     print(f"Erro ao inicializar o banco de dados: {e}")
     print("A aplicação continuará, mas as operações de banco de dados falharão.")
+atexit.register(close_db_pool)
+
+# Hash de senhas fora das threads das requisições
+init_pool_senhas()
+atexit.register(close_pool_senhas)
+
+# Inicia o motor de lances em memória, se habilitado
+try:
+    init_motor_lances()
+except Exception as e:
+    print(f"Erro ao iniciar o motor de lances: {e}")
+    print("Os lances seguirão pelo caminho SQL.")
+atexit.register(close_motor_lances)
+
+# Inicia a gravação agrupada de lances, se habilitada
+init_gravacao_agrupada()
+atexit.register(close_gravacao_agrupada)
 
 # Registra os blueprints
 app.register_blueprint(auth_bp, url_prefix='/api')
@@ -38,28 +67,31 @@ app.register_blueprint(itens_bp, url_prefix='/api')
 app.register_blueprint(lances_bp, url_prefix='/api')
 app.register_blueprint(usuarios_bp, url_prefix='/api')
 app.register_blueprint(dashboard_bp, url_prefix='/api')
+app.register_blueprint(imagens_bp, url_prefix='/api')
+
+# Comprime as respostas JSON e CSV conforme o Accept-Encoding
+init_compressao(app)
+
+# Registra os comandos de manutenção (flask --app src.main <comando>)
+register_commands(app)
+
+# Lê os arquivos do frontend uma única vez
+manifesto_estaticos = carregar_manifesto(app.static_folder)
 
 @app.route('/', defaults={'path': ''})
 @app.route('/<path:path>')
 def serve(path):
     """Serve o frontend React."""
-    static_folder_path = app.static_folder
-    if static_folder_path is None:
+    if manifesto_estaticos is None:
         return "Static folder not configured", 404
 
-    if path != "" and os.path.exists(os.path.join(static_folder_path, path)):
-        return send_from_directory(static_folder_path, path)
-    else:
-        index_path = os.path.join(static_folder_path, 'index.html')
-        if os.path.exists(index_path):
-            return send_from_directory(static_folder_path, 'index.html')
-        else:
-            return "index.html not found", 404
-
-@app.teardown_appcontext
-def shutdown_session(exception=None):
-    """Fecha o pool de conexões ao encerrar a aplicação."""
-    close_db_pool()
+    resposta = manifesto_estaticos.resposta(path)
+    if resposta is None:
+        return "index.html not found", 404
+    return resposta
+
+# Devolve ao pool a conexão usada pela requisição
+app.teardown_appcontext(release_request_connection)
 
 if __name__ == '__main__':
     app.run(host='0.0.0.0', port=5000, debug=True)
@@ -0,0 +1,109 @@
+"""Migrações versionadas do esquema do banco.
+
+Cada arquivo em migrations/ se chama NNNN_descricao.sql e é aplicado uma única
+vez, em ordem, dentro da sua própria transação. As versões aplicadas ficam na
+tabela schema_migracoes.
+
+Uso (a partir de backend/leilao_api):
+    python -m src.migracoes            aplica as migrações pendentes
+    python -m src.migracoes --listar   mostra o estado de cada migração
+"""
+
+import os
+import re
+import sys
+
+from src.db import create_dedicated_connection
+
+DIRETORIO_MIGRACOES = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'migrations')
+
+PADRAO_ARQUIVO = re.compile(r'^(\d{4})_(\w+)\.sql$')
+
+# Chave do advisory lock que impede duas execuções simultâneas
+TRAVA_MIGRACOES = 7313001
+
+def listar_arquivos():
+    """Retorna as migrações disponíveis como (versao, nome, caminho), em ordem."""
+    migracoes = []
+    for arquivo in os.listdir(DIRETORIO_MIGRACOES):
+        encontrado = PADRAO_ARQUIVO.match(arquivo)
+        if encontrado:
+            migracoes.append((
+                int(encontrado.group(1)),
+                encontrado.group(2),
+                os.path.join(DIRETORIO_MIGRACOES, arquivo)
+            ))
+    return sorted(migracoes)
+
+def _versoes_aplicadas(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS schema_migracoes (
+            versao INTEGER PRIMARY KEY,
+            nome VARCHAR(255) NOT NULL,
+            aplicada_em TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    cursor.execute("SELECT versao FROM schema_migracoes")
+    return {row[0] for row in cursor.fetchall()}
+
+def estado_migracoes(conn):
+    """Retorna (versao, nome, aplicada) para cada migração disponível."""
+    cursor = conn.cursor()
+    aplicadas = _versoes_aplicadas(cursor)
+    conn.commit()
+    cursor.close()
+    return [(versao, nome, versao in aplicadas) for versao, nome, _ in listar_arquivos()]
+
+def aplicar_migracoes(conn, ao_aplicar=None):
+    """Aplica as migrações pendentes e retorna as versões aplicadas."""
+    cursor = conn.cursor()
+    cursor.execute("SELECT pg_advisory_lock(%s)", (TRAVA_MIGRACOES,))
+    try:
+        aplicadas = _versoes_aplicadas(cursor)
+        conn.commit()
+
+        novas = []
+        for versao, nome, caminho in listar_arquivos():
+            if versao in aplicadas:
+                continue
+            with open(caminho, encoding='utf-8') as arquivo:
+                sql = arquivo.read()
+            try:
+                cursor.execute(sql)
+                cursor.execute(
+                    "INSERT INTO schema_migracoes (versao, nome) VALUES (%s, %s)",
+                    (versao, nome)
+                )
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            novas.append(versao)
+            if ao_aplicar:
+                ao_aplicar(versao, nome)
+        return novas
+    finally:
+        cursor.execute("SELECT pg_advisory_unlock(%s)", (TRAVA_MIGRACOES,))
+        conn.commit()
+        cursor.close()
+
+def main(argv):
+    conn = create_dedicated_connection()
+    try:
+        if '--listar' in argv:
+            for versao, nome, aplicada in estado_migracoes(conn):
+                print(f"{versao:04d} {nome}: {'aplicada' if aplicada else 'pendente'}")
+            return 0
+
+        novas = aplicar_migracoes(
+            conn,
+            ao_aplicar=lambda versao, nome: print(f"Aplicada {versao:04d} {nome}")
+        )
+        if not novas:
+            print("Nenhuma migração pendente.")
+        return 0
+    finally:
+        conn.close()
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,179 @@
+"""Motor de lances em memória para o leilão ao vivo.
+
+Mantém o preço atual de cada item em memória, protegido por travas
+distribuídas em fatias (item_id % número de travas), e valida os lances sem
+ir ao banco. Os lances aceitos seguem para uma fila de gravação (FilaLotes)
+que os persiste em lote; cada requisição só recebe a resposta depois que o
+seu lance foi confirmado no banco.
+
+O estado em memória só é consistente com um único processo da aplicação.
+"""
+
+import threading
+from concurrent.futures import TimeoutError as TempoEsgotado
+
+from src.config import Config
+from src.db import get_db_connection, release_db_connection
+from src.fila_lotes import FilaLotes, ConfirmacaoPendente
+from src.precos import persistir_lances_aceitos, ler_valor_lance, erro_participante, ItemNaoEncontrado
+from src.consultas import registrar_consulta, executar_consulta
+
+CONSULTA_PRECO_ITEM = registrar_consulta(
+    'preco_item',
+    "SELECT lance_atual, total_lances FROM itens WHERE id = %(item_id)s",
+    item_id='INTEGER'
+)
+
+class EstadoItem:
+    """Preço atual e quantidade de lances de um item."""
+    __slots__ = ('lance_atual', 'total_lances')
+
+    def __init__(self, lance_atual, total_lances):
+        self.lance_atual = lance_atual
+        self.total_lances = total_lances
+
+class MotorLances:
+    """Valida lances em memória e os grava no banco em lotes."""
+
+    def __init__(self, num_travas=64, tamanho_lote=200, intervalo_escrita=0.005, timeout=5.0):
+        self._travas = [threading.Lock() for _ in range(num_travas)]
+        self._itens = {}
+        self._fila = FilaLotes(
+            persistir_lances_aceitos,
+            nome='motor-lances',
+            tamanho_lote=tamanho_lote,
+            intervalo=intervalo_escrita,
+            ao_falhar=self._descartar_lote
+        )
+        self._timeout = timeout
+
+    def _trava(self, item_id):
+        return self._travas[item_id % len(self._travas)]
+
+    def iniciar(self):
+        """Carrega os itens das campanhas ativas e inicia a gravação em lote."""
+        conn = get_db_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT i.id, i.lance_atual, i.total_lances
+                FROM itens i
+                JOIN campanhas c ON i.campanha_id = c.id
+                WHERE c.status = 'ativa'
+            """)
+            for item_id, lance_atual, total_lances in cursor.fetchall():
+                self._itens[item_id] = EstadoItem(lance_atual, total_lances)
+            cursor.close()
+            conn.commit()
+        finally:
+            release_db_connection(conn)
+
+        self._fila.iniciar()
+        print(f"Motor de lances iniciado com {len(self._itens)} itens em memória!")
+
+    def parar(self):
+        """Grava os lances pendentes e encerra a fila de gravação."""
+        self._fila.parar()
+
+    def descartar_item(self, item_id):
+        """Remove o item da memória para que seja recarregado do banco."""
+        with self._trava(item_id):
+            self._itens.pop(item_id, None)
+
+    def _ler_item(self, item_id):
+        conn = get_db_connection()
+        try:
+            cursor = conn.cursor()
+            executar_consulta(cursor, CONSULTA_PRECO_ITEM, {'item_id': item_id})
+            row = cursor.fetchone()
+            cursor.close()
+            conn.commit()
+        finally:
+            release_db_connection(conn)
+
+        if not row:
+            return None
+        return EstadoItem(row[0], row[1])
+
+    def propor_lance(self, item_id, valor, nome_participante, telefone):
+        """Valida o lance e aguarda sua gravação.
+
+        Segue o mesmo contrato de src.precos.registrar_lance: retorna
+        (lance_id, lance_atual), com lance_id None para lances recusados, ou
+        None se o item não existir. Lança ValueError para valores, nomes ou
+        telefones inválidos e ConfirmacaoPendente se a gravação não for
+        confirmada a tempo.
+        """
+        item_id = int(item_id)
+        # Um valor que não cabe na coluna derrubaria o lote inteiro na gravação
+        valor = ler_valor_lance(valor)
+        if valor is None:
+            raise ValueError('Valor do lance inválido!')
+        erro = erro_participante(nome_participante, telefone)
+        if erro:
+            raise ValueError(erro)
+
+        carregado = None
+        while True:
+            if carregado is None and item_id not in self._itens:
+                # Consulta o banco fora da trava, sem segurar os outros itens da fatia
+                carregado = self._ler_item(item_id)
+                if carregado is None:
+                    return None
+
+            with self._trava(item_id):
+                estado = self._itens.get(item_id)
+                if estado is None and carregado is not None:
+                    # Ninguém carregou o item enquanto o banco era consultado
+                    estado = self._itens[item_id] = carregado
+                if estado is not None:
+                    if valor <= estado.lance_atual:
+                        return None, estado.lance_atual
+
+                    estado.lance_atual = valor
+                    estado.total_lances += 1
+                    # Enfileira ainda sob a trava para preservar a ordem dos lances do item
+                    confirmacao = self._fila.enviar((item_id, valor, nome_participante, telefone))
+                    break
+            # O item saiu da memória entre a verificação e a trava: carrega de novo
+
+        try:
+            lance_id = confirmacao.result(timeout=self._timeout)
+        except TempoEsgotado:
+            # O lance já vale em memória e continua na fila: não é uma falha
+            raise ConfirmacaoPendente('Lance aceito! A gravação no banco ainda está pendente.', valor)
+        except ItemNaoEncontrado:
+            # Item removido depois de carregado na memória
+            self.descartar_item(item_id)
+            return None
+        return lance_id, valor
+
+    def _descartar_lote(self, lances):
+        # O estado em memória desses itens não vale mais: recarrega do banco
+        for item_id, _, _, _ in lances:
+            self.descartar_item(item_id)
+
+motor_lances = None
+
+def init_motor_lances():
+    """Inicia o motor de lances, se habilitado na configuração."""
+    global motor_lances
+    if not Config.MOTOR_LANCES_ATIVO:
+        return
+    motor = MotorLances(
+        num_travas=Config.MOTOR_LANCES_TRAVAS,
+        tamanho_lote=Config.MOTOR_LANCES_LOTE,
+        intervalo_escrita=Config.MOTOR_LANCES_INTERVALO_MS / 1000,
+        timeout=Config.MOTOR_LANCES_TIMEOUT
+    )
+    motor.iniciar()
+    motor_lances = motor
+
+def get_motor_lances():
+    """Retorna o motor de lances ativo, ou None para usar o caminho SQL."""
+    return motor_lances
+
+def close_motor_lances():
+    """Encerra o motor de lances gravando o que estiver pendente."""
+    if motor_lances:
+        motor_lances.parar()
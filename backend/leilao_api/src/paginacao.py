@@ -0,0 +1,56 @@
+"""Paginação por cursor (keyset) para listagens ordenadas por data e id.
+
+O cursor é opaco para o cliente: codifica a data (ou outro valor de
+ordenação, como a relevância da busca) e o id da última linha da página, e a
+próxima página começa logo depois dela. O custo de cada página
+não depende de quantas páginas já foram percorridas.
+"""
+
+import base64
+import json
+from datetime import datetime
+
+LIMITE_PADRAO = 50
+LIMITE_MAXIMO = 500
+
+def ler_limite(args, padrao=LIMITE_PADRAO, maximo=LIMITE_MAXIMO):
+    """Lê o parâmetro limit, restrito ao intervalo permitido."""
+    limite = args.get('limit', padrao, type=int)
+    return max(1, min(limite, maximo))
+
+def codificar_cursor(data, id):
+    """Gera o cursor opaco que aponta para depois da linha (data, id)."""
+    if hasattr(data, 'isoformat'):
+        data = data.isoformat()
+    conteudo = json.dumps([data, id]).encode('utf-8')
+    return base64.urlsafe_b64encode(conteudo).decode('ascii').rstrip('=')
+
+def decodificar_cursor(cursor, tipo=str):
+    """Retorna (data, id) do cursor, ou lança ValueError se for inválido.
+
+    tipo é o tipo esperado do primeiro valor: str para datas, float para
+    pontuações.
+    """
+    try:
+        conteudo = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        data, id = json.loads(conteudo)
+        if tipo is float and isinstance(data, int) and not isinstance(data, bool):
+            data = float(data)
+        if not isinstance(data, tipo) or not isinstance(id, int) or isinstance(id, bool):
+            raise ValueError
+        if tipo is str:
+            # Uma data inválida chegaria ao Postgres como erro 500
+            datetime.fromisoformat(data)
+    except Exception:
+        raise ValueError('Cursor inválido!')
+    return data, id
+
+def paginar(linhas, limite, chave):
+    """Separa a página das linhas (buscadas com limite + 1) e gera o próximo cursor.
+
+    chave(linha) deve retornar a tupla (data, id) usada na ordenação.
+    """
+    if len(linhas) <= limite:
+        return linhas, None
+    pagina = linhas[:limite]
+    return pagina, codificar_cursor(*chave(pagina[-1]))
@@ -0,0 +1,90 @@
+"""Manutenção das partições de lances e auditoria.
+
+Os lances ficam particionados por campanha. Ao arquivar uma campanha
+finalizada ou arquivada, a sua partição sai de lances e passa para
+lances_arquivo: as consultas do leilão em andamento deixam de percorrê-la, e
+os lances continuam disponíveis em lances_arquivo e na view lances_historico.
+
+A auditoria é particionada por mês. As partições dos meses seguintes são
+criadas com antecedência; registros fora delas caem na partição padrão e são
+movidos quando a partição do mês é criada.
+
+DETACH e ATTACH travam a tabela lances por um instante: arquive fora do
+horário do leilão.
+"""
+
+def _particao_lances(campanha_id):
+    return f'lances_campanha_{int(campanha_id)}'
+
+def garantir_particoes(cursor, meses=3):
+    """Cria as partições de auditoria dos próximos meses e as de lances que faltarem.
+
+    Retorna os nomes das partições criadas.
+    """
+    cursor.execute("""
+        SELECT 'auditoria_' || to_char(mes, 'YYYY_MM'), mes::DATE
+        FROM generate_series(
+            date_trunc('month', now()),
+            date_trunc('month', now()) + (%s - 1) * INTERVAL '1 month',
+            INTERVAL '1 month'
+        ) mes
+        WHERE to_regclass('auditoria_' || to_char(mes, 'YYYY_MM')) IS NULL
+    """, (meses,))
+    criadas = []
+    for nome, mes in cursor.fetchall():
+        cursor.execute("SELECT criar_particao_auditoria(%s)", (mes,))
+        criadas.append(nome)
+
+    cursor.execute("""
+        SELECT id FROM campanhas
+        WHERE to_regclass('lances_campanha_' || id) IS NULL
+        ORDER BY id
+    """)
+    for (campanha_id,) in cursor.fetchall():
+        cursor.execute("SELECT criar_particao_lances(%s)", (campanha_id,))
+        criadas.append(_particao_lances(campanha_id))
+    return criadas
+
+def arquivar_lances(cursor, campanha_id=None):
+    """Move para lances_arquivo as partições das campanhas encerradas.
+
+    Sem campanha_id, arquiva todas as campanhas finalizadas ou arquivadas que
+    ainda estejam em lances. Retorna os IDs das campanhas arquivadas.
+    """
+    cursor.execute("""
+        SELECT c.id
+        FROM campanhas c
+        JOIN pg_inherits h ON h.inhrelid = to_regclass('lances_campanha_' || c.id)
+        WHERE h.inhparent = 'lances'::regclass
+          AND c.status IN ('finalizada', 'arquivada')
+          AND (%(campanha_id)s::INTEGER IS NULL OR c.id = %(campanha_id)s)
+        ORDER BY c.id
+    """, {'campanha_id': campanha_id})
+    arquivadas = [row[0] for row in cursor.fetchall()]
+    for campanha in arquivadas:
+        particao = _particao_lances(campanha)
+        cursor.execute(f"ALTER TABLE lances DETACH PARTITION {particao}")
+        cursor.execute(f"ALTER TABLE lances_arquivo ATTACH PARTITION {particao} FOR VALUES IN ({int(campanha)})")
+    return arquivadas
+
+def restaurar_lances(cursor, campanha_id):
+    """Devolve a lances a partição arquivada da campanha.
+
+    Lances da campanha gravados depois do arquivamento, que caíram na
+    partição padrão, são movidos para a partição restaurada. Retorna False se
+    a campanha não estiver arquivada.
+    """
+    particao = _particao_lances(campanha_id)
+    cursor.execute("""
+        SELECT 1 FROM pg_inherits
+        WHERE inhrelid = to_regclass(%s) AND inhparent = 'lances_arquivo'::regclass
+    """, (particao,))
+    if cursor.fetchone() is None:
+        return False
+    cursor.execute(f"ALTER TABLE lances_arquivo DETACH PARTITION {particao}")
+    cursor.execute(f"""
+        WITH movidos AS (DELETE FROM lances_padrao WHERE campanha_id = {int(campanha_id)} RETURNING *)
+        INSERT INTO {particao} SELECT * FROM movidos
+    """)
+    cursor.execute(f"ALTER TABLE lances ATTACH PARTITION {particao} FOR VALUES IN ({int(campanha_id)})")
+    return True
@@ -0,0 +1,293 @@
+"""Manutenção do preço atual desnormalizado dos itens.
+
+A tabela itens guarda o lance atual, o lance líder e a quantidade de lances
+de cada item, atualizados junto com cada lance aceito. Assim as listagens não
+precisam agregar a tabela de lances a cada leitura.
+
+A tabela lances é particionada por campanha: todo INSERT informa o
+campanha_id do item, para que o lance vá direto para a partição certa.
+"""
+
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+
+from psycopg2.extras import execute_values
+from src.consultas import registrar_consulta, executar_consulta
+
+CENTAVOS = Decimal('0.01')
+
+# Maior valor aceito por NUMERIC(10, 2)
+LANCE_MAXIMO = Decimal('99999999.99')
+
+# Tamanhos das colunas nome_participante e telefone de lances
+NOME_PARTICIPANTE_MAXIMO = 255
+TELEFONE_MAXIMO = 20
+
+class ItemNaoEncontrado(LookupError):
+    """O item do lance não existe mais."""
+
+# Recalcula a partir de todos os lances, inclusive os arquivados, e corrige
+# apenas os itens divergentes
+SQL_RECALCULAR_PRECOS = """
+    WITH resumo AS (
+        SELECT i.id,
+               COALESCE(lider.valor, i.lance_inicial) AS lance_atual,
+               lider.id AS lance_lider_id,
+               (SELECT COUNT(*) FROM lances_historico l WHERE l.item_id = i.id) AS total_lances
+        FROM itens i
+        LEFT JOIN LATERAL (
+            SELECT l.id, l.valor
+            FROM lances_historico l
+            WHERE l.item_id = i.id
+            ORDER BY l.valor DESC, l.id
+            LIMIT 1
+        ) lider ON true
+        WHERE %(item_id)s IS NULL OR i.id = %(item_id)s
+    )
+    UPDATE itens
+    SET lance_atual = resumo.lance_atual,
+        lance_lider_id = resumo.lance_lider_id,
+        total_lances = resumo.total_lances
+    FROM resumo
+    WHERE itens.id = resumo.id
+      AND (itens.lance_atual IS DISTINCT FROM resumo.lance_atual
+           OR itens.lance_lider_id IS DISTINCT FROM resumo.lance_lider_id
+           OR itens.total_lances IS DISTINCT FROM resumo.total_lances)
+    RETURNING itens.id
+"""
+
+# Valida e registra o lance num único comando: o UPDATE condicional trava o
+# item e só deixa o INSERT acontecer se o valor superar o preço atual
+SQL_REGISTRAR_LANCE = """
+    WITH entrada AS (
+        SELECT %(valor)s::NUMERIC(10, 2) AS valor
+    ),
+    novo AS (
+        SELECT nextval(pg_get_serial_sequence('lances', 'id')) AS id
+    ),
+    atualizado AS (
+        UPDATE itens
+        SET lance_atual = entrada.valor,
+            lance_lider_id = (SELECT id FROM novo),
+            total_lances = itens.total_lances + 1
+        FROM entrada
+        WHERE itens.id = %(item_id)s AND itens.lance_atual < entrada.valor
+        RETURNING itens.id, itens.campanha_id, itens.lance_atual, itens.lance_lider_id
+    ),
+    inserido AS (
+        INSERT INTO lances (id, campanha_id, item_id, valor, nome_participante, telefone)
+        SELECT lance_lider_id, campanha_id, id, lance_atual, %(nome_participante)s, %(telefone)s
+        FROM atualizado
+        RETURNING id
+    )
+    SELECT inserido.id, COALESCE(atualizado.lance_atual, itens.lance_atual)
+    FROM itens
+    LEFT JOIN atualizado ON true
+    LEFT JOIN inserido ON true
+    WHERE itens.id = %(item_id)s
+"""
+
+CONSULTA_REGISTRAR_LANCE = registrar_consulta(
+    'registrar_lance',
+    SQL_REGISTRAR_LANCE,
+    valor='NUMERIC',
+    item_id='INTEGER',
+    nome_participante='VARCHAR',
+    telefone='VARCHAR'
+)
+
+# O comando acima lê o preço do snapshot anterior à espera pela trava do item;
+# num lance recusado, o preço informado vem desta nova leitura
+CONSULTA_LANCE_ATUAL = registrar_consulta(
+    'lance_atual_item',
+    "SELECT lance_atual FROM itens WHERE id = %(item_id)s",
+    item_id='INTEGER'
+)
+
+# Versão em lote de SQL_REGISTRAR_LANCE: trava os itens envolvidos e aceita
+# cada lance que supere o preço atual e todos os lances anteriores do lote
+SQL_REGISTRAR_LANCES_EM_LOTE = """
+    WITH lote (ordem, item_id, valor, nome_participante, telefone) AS (
+        VALUES %s
+    ),
+    precos AS (
+        SELECT id, campanha_id, lance_atual
+        FROM itens
+        WHERE id IN (SELECT item_id FROM lote)
+        ORDER BY id
+        FOR UPDATE
+    ),
+    avaliados AS (
+        SELECT lote.*, precos.campanha_id,
+               GREATEST(precos.lance_atual, MAX(lote.valor) OVER (
+                   PARTITION BY lote.item_id ORDER BY lote.ordem
+                   ROWS BETWEEN UNBOUNDED PRECEDING AND 1 PRECEDING
+               )) AS minimo
+        FROM lote
+        JOIN precos ON precos.id = lote.item_id
+    ),
+    aceitos AS (
+        SELECT avaliados.*, nextval(pg_get_serial_sequence('lances', 'id')) AS lance_id
+        FROM avaliados
+        WHERE valor > minimo
+        ORDER BY ordem
+    ),
+    inseridos AS (
+        INSERT INTO lances (id, campanha_id, item_id, valor, nome_participante, telefone)
+        SELECT lance_id, campanha_id, item_id, valor, nome_participante, telefone
+        FROM aceitos
+    ),
+    atualizados AS (
+        UPDATE itens
+        SET lance_atual = lider.valor,
+            lance_lider_id = lider.lance_id,
+            total_lances = itens.total_lances + lider.quantidade
+        FROM (
+            SELECT DISTINCT ON (item_id) item_id, valor, lance_id,
+                   COUNT(*) OVER (PARTITION BY item_id) AS quantidade
+            FROM aceitos
+            ORDER BY item_id, ordem DESC
+        ) lider
+        WHERE itens.id = lider.item_id
+    )
+    SELECT lote.ordem, avaliados.ordem IS NOT NULL, aceitos.lance_id,
+           COALESCE(aceitos.valor, avaliados.minimo)
+    FROM lote
+    LEFT JOIN avaliados ON avaliados.ordem = lote.ordem
+    LEFT JOIN aceitos ON aceitos.ordem = lote.ordem
+    ORDER BY lote.ordem
+"""
+
+def ler_preco(valor):
+    """Converte um preço para Decimal com centavos.
+
+    Retorna None se o valor não for numérico, finito e entre zero e o limite
+    de NUMERIC(10, 2).
+    """
+    if isinstance(valor, bool):
+        return None
+    try:
+        valor = Decimal(str(valor))
+    except (InvalidOperation, ValueError):
+        return None
+    if not valor.is_finite():
+        return None
+    valor = valor.quantize(CENTAVOS, rounding=ROUND_HALF_UP)
+    return valor if 0 <= valor <= LANCE_MAXIMO else None
+
+def ler_valor_lance(valor):
+    """Converte o valor do lance para Decimal com centavos.
+
+    Retorna None se o valor não for um preço válido (ler_preco) e positivo.
+    """
+    valor = ler_preco(valor)
+    return valor if valor else None
+
+def erro_participante(nome_participante, telefone):
+    """Mensagem de erro se o nome ou o telefone não couberem no lance; None se válidos."""
+    for valor, descricao, tamanho in (
+        (nome_participante, 'O nome do participante', NOME_PARTICIPANTE_MAXIMO),
+        (telefone, 'O telefone', TELEFONE_MAXIMO),
+    ):
+        if not isinstance(valor, str) or not valor.strip() or len(valor) > tamanho:
+            return f'{descricao} deve ter entre 1 e {tamanho} caracteres!'
+    return None
+
+def recalcular_precos(cursor, item_id=None):
+    """Recalcula o preço atual dos itens e retorna os IDs corrigidos."""
+    cursor.execute(SQL_RECALCULAR_PRECOS, {'item_id': item_id})
+    return [row[0] for row in cursor.fetchall()]
+
+def registrar_lance(cursor, item_id, valor, nome_participante, telefone):
+    """Registra o lance se superar o preço atual.
+
+    Retorna (lance_id, lance_atual), com lance_id None quando o lance foi
+    recusado, ou None se o item não existir.
+    """
+    executar_consulta(cursor, CONSULTA_REGISTRAR_LANCE, {
+        'item_id': item_id,
+        'valor': valor,
+        'nome_participante': nome_participante,
+        'telefone': telefone
+    })
+    resultado = cursor.fetchone()
+    if resultado and resultado[0] is None:
+        executar_consulta(cursor, CONSULTA_LANCE_ATUAL, {'item_id': item_id})
+        atual = cursor.fetchone()
+        resultado = (None, atual[0]) if atual else None
+    return resultado
+
+def registrar_lances_em_lote(cursor, lances):
+    """Registra vários lances num único comando, na ordem recebida.
+
+    Recebe tuplas (item_id, valor, nome_participante, telefone) e retorna,
+    para cada uma, o mesmo resultado de registrar_lance.
+    """
+    linhas = execute_values(
+        cursor,
+        SQL_REGISTRAR_LANCES_EM_LOTE,
+        [(ordem,) + tuple(lance) for ordem, lance in enumerate(lances)],
+        template="(%s, %s::INTEGER, %s::NUMERIC(10, 2), %s, %s)",
+        page_size=len(lances),
+        fetch=True
+    )
+    return [(lance_id, lance_atual) if encontrado else None
+            for _, encontrado, lance_id, lance_atual in linhas]
+
+def persistir_lances_aceitos(cursor, lances):
+    """Grava em lote lances já validados e atualiza o preço dos itens.
+
+    Recebe tuplas (item_id, valor, nome_participante, telefone) na ordem em
+    que foram aceitas e retorna os IDs gerados na mesma ordem. O lance de um
+    item que não existe mais recebe ItemNaoEncontrado no lugar do ID.
+    """
+    cursor.execute(
+        "SELECT nextval(pg_get_serial_sequence('lances', 'id')) FROM generate_series(1, %s)",
+        (len(lances),)
+    )
+    ids = sorted(row[0] for row in cursor.fetchall())
+    
+    # O JOIN descarta os lances de itens removidos; o RETURNING diz quais entraram
+    inseridos = {row[0] for row in execute_values(cursor, """
+        INSERT INTO lances (id, campanha_id, item_id, valor, nome_participante, telefone)
+        SELECT v.id, itens.campanha_id, v.item_id, v.valor, v.nome_participante, v.telefone
+        FROM (VALUES %s) AS v (id, item_id, valor, nome_participante, telefone)
+        JOIN itens ON itens.id = v.item_id
+        ORDER BY v.id
+        RETURNING id
+    """, [(lance_id,) + tuple(lance) for lance_id, lance in zip(ids, lances)],
+        template="(%s, %s::INTEGER, %s::NUMERIC(10, 2), %s, %s)",
+        page_size=len(lances),
+        fetch=True
+    )}
+    
+    # Maior lance de cada item no lote (o mais antigo em caso de empate): a
+    # ordem da fila não garante que o último seja o maior, por exemplo depois
+    # que um lote com falha faz o motor recarregar os preços do banco
+    resumo = {}
+    for lance_id, (item_id, valor, _, _) in zip(ids, lances):
+        if lance_id not in inseridos:
+            continue
+        if item_id not in resumo:
+            resumo[item_id] = (lance_id, valor, 1)
+        else:
+            lider_id, lider_valor, quantidade = resumo[item_id]
+            if valor > lider_valor:
+                lider_id, lider_valor = lance_id, valor
+            resumo[item_id] = (lider_id, lider_valor, quantidade + 1)
+    
+    if resumo:
+        execute_values(cursor, """
+            UPDATE itens
+            SET lance_atual = GREATEST(itens.lance_atual, v.valor),
+                lance_lider_id = CASE WHEN v.valor > itens.lance_atual THEN v.lance_id
+                                      ELSE itens.lance_lider_id END,
+                total_lances = itens.total_lances + v.quantidade
+            FROM (VALUES %s) AS v (item_id, lance_id, valor, quantidade)
+            WHERE itens.id = v.item_id
+        """, [(item_id,) + dados for item_id, dados in resumo.items()],
+            template="(%s, %s, %s::NUMERIC(10, 2), %s)",
+            page_size=len(resumo)
+        )
+    
+    return [lance_id if lance_id in inseridos else ItemNaoEncontrado(f'Item {item_id} não encontrado!')
+            for lance_id, (item_id, _, _, _) in zip(ids, lances)]
@@ -0,0 +1,107 @@
+"""Resultado das campanhas encerradas.
+
+Quando uma campanha é finalizada, o vencedor de cada item (o maior lance),
+os totais por categoria e o total arrecadado são calculados uma única vez e
+guardados em JSON na tabela resultados_campanhas. A rota de resultados só lê
+esse JSON pronto.
+
+Triggers marcam o resultado como desatualizado se lances ou itens da
+campanha mudarem depois (correção de lances, por exemplo); ele é recalculado
+no próximo acesso. Os lances vêm de lances_historico, para incluir os das
+campanhas já arquivadas.
+"""
+
+# Mesmo critério de desempate do preço atual: maior valor, depois o lance mais antigo
+SQL_RESULTADO = """
+    WITH itens_campanha AS (
+        SELECT i.id, i.nome, i.lance_inicial, cat.id AS categoria_id, cat.nome AS categoria
+        FROM itens i
+        JOIN categorias cat ON cat.id = i.categoria_id
+        WHERE i.campanha_id = %(campanha_id)s
+    ),
+    lances_campanha AS (
+        SELECT id, item_id, valor, nome_participante, telefone, data_lance
+        FROM lances_historico
+        WHERE campanha_id = %(campanha_id)s
+    ),
+    vencedores AS (
+        SELECT DISTINCT ON (item_id) *
+        FROM lances_campanha
+        ORDER BY item_id, valor DESC, id
+    ),
+    contagem AS (
+        SELECT item_id, COUNT(*) AS total_lances
+        FROM lances_campanha
+        GROUP BY item_id
+    ),
+    linhas AS (
+        SELECT ic.*, COALESCE(ct.total_lances, 0) AS total_lances,
+               v.id AS lance_id, v.valor, v.nome_participante, v.telefone, v.data_lance
+        FROM itens_campanha ic
+        LEFT JOIN vencedores v ON v.item_id = ic.id
+        LEFT JOIN contagem ct ON ct.item_id = ic.id
+    ),
+    categorias_campanha AS (
+        SELECT categoria_id, categoria, COUNT(*) AS itens, COUNT(lance_id) AS itens_arrematados,
+               SUM(total_lances) AS total_lances, COALESCE(SUM(valor), 0) AS total_arrecadado
+        FROM linhas
+        GROUP BY categoria_id, categoria
+    )
+    SELECT json_build_object(
+        'campanha', (SELECT json_build_object('id', id, 'nome', nome, 'ano', ano)
+                     FROM campanhas WHERE id = %(campanha_id)s),
+        'calculado_em', now(),
+        'total_itens', (SELECT COUNT(*) FROM linhas),
+        'itens_arrematados', (SELECT COUNT(lance_id) FROM linhas),
+        'total_lances', (SELECT COALESCE(SUM(total_lances), 0) FROM linhas),
+        'total_arrecadado', (SELECT COALESCE(SUM(valor), 0) FROM linhas),
+        'categorias', (
+            SELECT COALESCE(json_agg(json_build_object(
+                'id', categoria_id, 'nome', categoria, 'itens', itens,
+                'itens_arrematados', itens_arrematados, 'total_lances', total_lances,
+                'total_arrecadado', total_arrecadado
+            ) ORDER BY total_arrecadado DESC, categoria), '[]')
+            FROM categorias_campanha
+        ),
+        'itens', (
+            SELECT COALESCE(json_agg(json_build_object(
+                'id', id, 'nome', nome, 'lance_inicial', lance_inicial,
+                'categoria', json_build_object('id', categoria_id, 'nome', categoria),
+                'total_lances', total_lances,
+                'vencedor', CASE WHEN lance_id IS NOT NULL THEN json_build_object(
+                    'lance_id', lance_id, 'valor', valor, 'nome_participante', nome_participante,
+                    'telefone', telefone, 'data_lance', data_lance
+                ) END
+            ) ORDER BY id), '[]')
+            FROM linhas
+        )
+    )
+"""
+
+SQL_GUARDAR_RESULTADO = f"""
+    INSERT INTO resultados_campanhas (campanha_id, resultado, calculado_em, desatualizado)
+    VALUES (%(campanha_id)s, ({SQL_RESULTADO}), now(), false)
+    ON CONFLICT (campanha_id) DO UPDATE
+    SET resultado = EXCLUDED.resultado,
+        calculado_em = EXCLUDED.calculado_em,
+        desatualizado = false
+    RETURNING resultado::text
+"""
+
+def calcular_resultado(cursor, campanha_id):
+    """Calcula e guarda o resultado da campanha; retorna o JSON como texto."""
+    cursor.execute(SQL_GUARDAR_RESULTADO, {'campanha_id': campanha_id})
+    return cursor.fetchone()[0]
+
+def ler_resultado(cursor, campanha_id):
+    """Retorna (status da campanha, JSON do resultado ou None se precisar recalcular).
+
+    Retorna None se a campanha não existir.
+    """
+    cursor.execute("""
+        SELECT c.status, CASE WHEN NOT r.desatualizado THEN r.resultado::text END
+        FROM campanhas c
+        LEFT JOIN resultados_campanhas r ON r.campanha_id = c.id
+        WHERE c.id = %s
+    """, (campanha_id,))
+    return cursor.fetchone()
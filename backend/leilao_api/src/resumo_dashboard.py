@@ -0,0 +1,36 @@
+"""Contadores do dashboard mantidos incrementalmente.
+
+Os totais ficam na tabela resumo_dashboard, atualizada por triggers a cada
+escrita em campanhas, itens e lances, e distribuída em fatias para evitar
+disputa entre lances simultâneos. O dashboard soma as fatias em vez de
+agregar as tabelas inteiras.
+"""
+
+def ler_resumo(cursor):
+    """Retorna (campanhas_ativas, total_itens, total_lances, valor_arrecadado)."""
+    cursor.execute("""
+        SELECT COALESCE(SUM(campanhas_ativas), 0)::BIGINT, COALESCE(SUM(total_itens), 0)::BIGINT,
+               COALESCE(SUM(total_lances), 0)::BIGINT, COALESCE(SUM(valor_arrecadado), 0)
+        FROM resumo_dashboard
+    """)
+    return cursor.fetchone()
+
+def recalcular_resumo(cursor):
+    """Reconstrói os contadores a partir das tabelas e retorna os novos totais."""
+    # Bloqueia escritas nas tabelas contadas até o commit, para um retrato consistente
+    cursor.execute("LOCK TABLE campanhas, itens, lances, lances_arquivo IN SHARE MODE")
+    # Os lances arquivados continuam contando no total arrecadado
+    cursor.execute("""
+        UPDATE resumo_dashboard
+        SET campanhas_ativas = (SELECT COUNT(*) FROM campanhas WHERE status = 'ativa'),
+            total_itens = (SELECT COUNT(*) FROM itens),
+            total_lances = (SELECT COUNT(*) FROM lances_historico),
+            valor_arrecadado = (SELECT COALESCE(SUM(valor), 0) FROM lances_historico)
+        WHERE fatia = 0
+    """)
+    cursor.execute("""
+        UPDATE resumo_dashboard
+        SET campanhas_ativas = 0, total_itens = 0, total_lances = 0, valor_arrecadado = 0
+        WHERE fatia <> 0
+    """)
+    return ler_resumo(cursor)
@@ -1,9 +1,9 @@
 from flask import Blueprint, request, jsonify
 import jwt
-import bcrypt
 from datetime import datetime, timedelta
 from src.db import get_db_connection, release_db_connection
 from src.config import Config
+from src.senhas import verificar_senha, gerar_hash, precisa_rehash, SenhasOcupadas
 
 auth_bp = Blueprint('auth', __name__)
 
@@ -25,7 +25,7 @@ def login():
         
         # Busca o usuário pelo email
         cursor.execute(
-            "SELECT id, nome, email, senha, permissao FROM usuarios WHERE email = %s",
+            "SELECT id, nome, email, senha, permissao, token_versao FROM usuarios WHERE email = %s",
             (email,)
         )
         user = cursor.fetchone()
@@ -33,17 +33,29 @@ def login():
         if not user:
             return jsonify({'message': 'Credenciais inválidas!'}), 401
         
-        user_id, nome, user_email, senha_hash, permissao = user
+        user_id, nome, user_email, senha_hash, permissao, token_versao = user
         
         # Verifica a senha
-        if not bcrypt.checkpw(senha.encode('utf-8'), senha_hash.encode('utf-8')):
+        if not verificar_senha(senha, senha_hash):
             return jsonify({'message': 'Credenciais inválidas!'}), 401
         
+        # Refaz o hash se o custo configurado mudou
+        if precisa_rehash(senha_hash):
+            try:
+                cursor.execute(
+                    "UPDATE usuarios SET senha = %s WHERE id = %s",
+                    (gerar_hash(senha), user_id)
+                )
+                conn.commit()
+            except SenhasOcupadas:
+                pass  # Fica para o próximo login
+        
         # Gera o token JWT
         token = jwt.encode({
             'user_id': user_id,
             'email': user_email,
             'permissao': permissao,
+            'versao': token_versao,
             'exp': datetime.utcnow() + timedelta(hours=24)
         }, Config.JWT_SECRET_KEY, algorithm="HS256")
         
@@ -57,6 +69,8 @@ def login():
             }
         }), 200
         
+    except SenhasOcupadas:
+        return jsonify({'message': 'Muitos logins simultâneos, tente novamente em instantes.'}), 503, {'Retry-After': '1'}
     except Exception as e:
         return jsonify({'message': f'Erro ao realizar login: {str(e)}'}), 500
     finally:
@@ -1,10 +1,17 @@
 from flask import Blueprint, request, jsonify
 from src.db import get_db_connection, release_db_connection
+from src.auditoria import registrar_auditoria
 from src.auth import token_required, gestor_or_admin_required
+from src.cache import cache_leitura, incrementar_versao
+from src.serializacao import Mapeador, resposta_json_pronta
+from src.resultados import calcular_resultado, ler_resultado
 
 campanhas_bp = Blueprint('campanhas', __name__)
 
+MAPA_CAMPANHA = Mapeador('id', 'nome', 'ano', 'status', 'banner')
+
 @campanhas_bp.route('/campanhas', methods=['GET'])
+@cache_leitura('campanhas')
 def get_campanhas():
     """Lista todas as campanhas."""
     conn = None
@@ -27,15 +34,7 @@ def get_campanhas():
         
         campanhas = cursor.fetchall()
         
-        result = []
-        for campanha in campanhas:
-            result.append({
-                'id': campanha[0],
-                'nome': campanha[1],
-                'ano': campanha[2],
-                'status': campanha[3],
-                'banner': campanha[4]
-            })
+        result = MAPA_CAMPANHA.lista(campanhas)
         
         return jsonify(result), 200
         
@@ -47,6 +46,7 @@ def get_campanhas():
             release_db_connection(conn)
 
 @campanhas_bp.route('/campanhas/<int:id>', methods=['GET'])
+@cache_leitura('campanhas')
 def get_campanha(id):
     """Busca uma campanha específica."""
     conn = None
@@ -63,13 +63,7 @@ def get_campanha(id):
         if not campanha:
             return jsonify({'message': 'Campanha não encontrada!'}), 404
         
-        return jsonify({
-            'id': campanha[0],
-            'nome': campanha[1],
-            'ano': campanha[2],
-            'status': campanha[3],
-            'banner': campanha[4]
-        }), 200
+        return jsonify(MAPA_CAMPANHA(campanha)), 200
         
     except Exception as e:
         return jsonify({'message': f'Erro ao buscar campanha: {str(e)}'}), 500
@@ -78,6 +72,41 @@ def get_campanha(id):
             cursor.close()
             release_db_connection(conn)
 
+@campanhas_bp.route('/campanhas/<int:id>/resultados', methods=['GET'])
+@token_required
+@cache_leitura('campanhas', 'itens', privado=True)
+def get_resultados_campanha(current_user, id):
+    """Retorna o resultado de uma campanha encerrada: vencedores e totais."""
+    conn = None
+    try:
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        
+        campanha = ler_resultado(cursor, id)
+        
+        if not campanha:
+            return jsonify({'message': 'Campanha não encontrada!'}), 404
+        
+        status, resultado = campanha
+        if status == 'ativa':
+            return jsonify({'message': 'O resultado fica disponível quando a campanha é finalizada!'}), 400
+        
+        # Ainda não calculado ou desatualizado por alguma correção
+        if resultado is None:
+            resultado = calcular_resultado(cursor, id)
+            conn.commit()
+        
+        return resposta_json_pronta(resultado)
+        
+    except Exception as e:
+        if conn:
+            conn.rollback()
+        return jsonify({'message': f'Erro ao buscar resultado da campanha: {str(e)}'}), 500
+    finally:
+        if conn:
+            cursor.close()
+            release_db_connection(conn)
+
 @campanhas_bp.route('/campanhas', methods=['POST'])
 @token_required
 @gestor_or_admin_required
@@ -98,14 +127,9 @@ def create_campanha(current_user):
             (data['nome'], data['ano'], data['status'], data.get('banner'))
         )
         campanha_id = cursor.fetchone()[0]
+        registrar_auditoria(cursor, current_user['id'], f"Criou a campanha '{data['nome']}' (ID: {campanha_id})")
         conn.commit()
-        
-        # Registra na auditoria
-        cursor.execute(
-            "INSERT INTO auditoria (usuario_id, acao) VALUES (%s, %s)",
-            (current_user['id'], f"Criou a campanha '{data['nome']}' (ID: {campanha_id})")
-        )
-        conn.commit()
+        incrementar_versao('campanhas')
         
         return jsonify({'message': 'Campanha criada com sucesso!', 'id': campanha_id}), 201
         
@@ -134,7 +158,7 @@ def update_campanha(current_user, id):
         cursor = conn.cursor()
         
         # Verifica se a campanha existe
-        cursor.execute("SELECT id, nome FROM campanhas WHERE id = %s", (id,))
+        cursor.execute("SELECT id, nome, status FROM campanhas WHERE id = %s", (id,))
         campanha = cursor.fetchone()
         
         if not campanha:
@@ -164,14 +188,14 @@ def update_campanha(current_user, id):
         query = f"UPDATE campanhas SET {', '.join(fields)} WHERE id = %s"
         
         cursor.execute(query, values)
-        conn.commit()
         
-        # Registra na auditoria
-        cursor.execute(
-            "INSERT INTO auditoria (usuario_id, acao) VALUES (%s, %s)",
-            (current_user['id'], f"Atualizou a campanha '{campanha[1]}' (ID: {id})")
-        )
+        # Ao encerrar a campanha, o resultado é calculado uma única vez
+        if campanha[2] == 'ativa' and data.get('status') in ('finalizada', 'arquivada'):
+            calcular_resultado(cursor, id)
+        
+        registrar_auditoria(cursor, current_user['id'], f"Atualizou a campanha '{campanha[1]}' (ID: {id})")
         conn.commit()
+        incrementar_versao('campanhas', 'itens')
         
         return jsonify({'message': 'Campanha atualizada com sucesso!'}), 200
         
@@ -202,14 +226,9 @@ def delete_campanha(current_user, id):
             return jsonify({'message': 'Campanha não encontrada!'}), 404
         
         cursor.execute("DELETE FROM campanhas WHERE id = %s", (id,))
+        registrar_auditoria(cursor, current_user['id'], f"Deletou a campanha '{campanha[0]}' (ID: {id})")
         conn.commit()
-        
-        # Registra na auditoria
-        cursor.execute(
-            "INSERT INTO auditoria (usuario_id, acao) VALUES (%s, %s)",
-            (current_user['id'], f"Deletou a campanha '{campanha[0]}' (ID: {id})")
-        )
-        conn.commit()
+        incrementar_versao('campanhas', 'itens')
         
         return jsonify({'message': 'Campanha deletada com sucesso!'}), 200
         
@@ -1,10 +1,15 @@
 from flask import Blueprint, request, jsonify
 from src.db import get_db_connection, release_db_connection
 from src.auth import token_required, gestor_or_admin_required
+from src.cache import cache_leitura, incrementar_versao
+from src.serializacao import Mapeador
 
 categorias_bp = Blueprint('categorias', __name__)
 
+MAPA_CATEGORIA = Mapeador('id', 'nome')
+
 @categorias_bp.route('/categorias', methods=['GET'])
+@cache_leitura('categorias')
 def get_categorias():
     """Lista todas as categorias."""
     conn = None
@@ -15,12 +20,7 @@ def get_categorias():
         cursor.execute("SELECT id, nome FROM categorias ORDER BY nome")
         categorias = cursor.fetchall()
         
-        result = []
-        for categoria in categorias:
-            result.append({
-                'id': categoria[0],
-                'nome': categoria[1]
-            })
+        result = MAPA_CATEGORIA.lista(categorias)
         
         return jsonify(result), 200
         
@@ -32,6 +32,7 @@ def get_categorias():
             release_db_connection(conn)
 
 @categorias_bp.route('/categorias/<int:id>', methods=['GET'])
+@cache_leitura('categorias')
 def get_categoria(id):
     """Busca uma categoria específica."""
     conn = None
@@ -45,10 +46,7 @@ def get_categoria(id):
         if not categoria:
             return jsonify({'message': 'Categoria não encontrada!'}), 404
         
-        return jsonify({
-            'id': categoria[0],
-            'nome': categoria[1]
-        }), 200
+        return jsonify(MAPA_CATEGORIA(categoria)), 200
         
     except Exception as e:
         return jsonify({'message': f'Erro ao buscar categoria: {str(e)}'}), 500
@@ -78,6 +76,7 @@ def create_categoria(current_user):
         )
         categoria_id = cursor.fetchone()[0]
         conn.commit()
+        incrementar_versao('categorias')
         
         return jsonify({'message': 'Categoria criada com sucesso!', 'id': categoria_id}), 201
         
@@ -114,6 +113,7 @@ def update_categoria(current_user, id):
             (data['nome'], id)
         )
         conn.commit()
+        incrementar_versao('categorias', 'itens')
         
         return jsonify({'message': 'Categoria atualizada com sucesso!'}), 200
         
@@ -142,6 +142,7 @@ def delete_categoria(current_user, id):
         
         cursor.execute("DELETE FROM categorias WHERE id = %s", (id,))
         conn.commit()
+        incrementar_versao('categorias', 'itens')
         
         return jsonify({'message': 'Categoria deletada com sucesso!'}), 200
         
@@ -1,11 +1,21 @@
 from flask import Blueprint, request, jsonify
-from src.db import get_db_connection, release_db_connection
-from src.auth import token_required
+from src.db import get_db_connection, release_db_connection, get_pool_stats
+from src.auditoria import registrar_auditoria
+from src.auth import token_required, admin_required
+from src.cache import cache_leitura, incrementar_versao
+from src.resumo_dashboard import ler_resumo, recalcular_resumo
+from src.paginacao import ler_limite, decodificar_cursor, paginar
+from src.serializacao import Mapeador
 
 dashboard_bp = Blueprint('dashboard', __name__)
 
+MAPA_LANCE_RECENTE = Mapeador('id', 'valor', 'nome_participante', 'data_lance', ('item', 'id', 'nome'))
+MAPA_CONFIGURACOES = Mapeador('id', 'nome_instituicao', 'logo', 'telefone', 'email', 'moeda', 'mensagem_home')
+MAPA_AUDITORIA = Mapeador('id', 'acao', 'data_acao', ('usuario', 'id', 'nome', 'email'))
+
 @dashboard_bp.route('/dashboard', methods=['GET'])
 @token_required
+@cache_leitura('itens', 'campanhas', privado=True)
 def get_dashboard(current_user):
     """Retorna dados do dashboard."""
     conn = None
@@ -13,21 +23,8 @@ def get_dashboard(current_user):
         conn = get_db_connection()
         cursor = conn.cursor()
         
-        # Quantidade de campanhas ativas
-        cursor.execute("SELECT COUNT(*) FROM campanhas WHERE status = 'ativa'")
-        campanhas_ativas = cursor.fetchone()[0]
-        
-        # Quantidade de itens cadastrados
-        cursor.execute("SELECT COUNT(*) FROM itens")
-        total_itens = cursor.fetchone()[0]
-        
-        # Total de lances recebidos
-        cursor.execute("SELECT COUNT(*) FROM lances")
-        total_lances = cursor.fetchone()[0]
-        
-        # Valor total arrecadado
-        cursor.execute("SELECT COALESCE(SUM(valor), 0) FROM lances")
-        valor_arrecadado = float(cursor.fetchone()[0])
+        # Totais mantidos pelos contadores incrementais
+        campanhas_ativas, total_itens, total_lances, valor_arrecadado = ler_resumo(cursor)
         
         # Últimos 5 lances
         cursor.execute("""
@@ -35,23 +32,11 @@ def get_dashboard(current_user):
                    i.id, i.nome
             FROM lances l
             JOIN itens i ON l.item_id = i.id
-            ORDER BY l.data_lance DESC
+            ORDER BY l.data_lance DESC, l.id DESC
             LIMIT 5
         """)
         
-        lances = cursor.fetchall()
-        ultimos_lances = []
-        for lance in lances:
-            ultimos_lances.append({
-                'id': lance[0],
-                'valor': float(lance[1]),
-                'nome_participante': lance[2],
-                'data_lance': lance[3].isoformat(),
-                'item': {
-                    'id': lance[4],
-                    'nome': lance[5]
-                }
-            })
+        ultimos_lances = MAPA_LANCE_RECENTE.lista(cursor.fetchall())
         
         return jsonify({
             'campanhas_ativas': campanhas_ativas,
@@ -68,7 +53,52 @@ def get_dashboard(current_user):
             cursor.close()
             release_db_connection(conn)
 
+@dashboard_bp.route('/dashboard/recalcular', methods=['POST'])
+@token_required
+@admin_required
+def recalcular_dashboard(current_user):
+    """Reconstrói os contadores do dashboard a partir das tabelas."""
+    conn = None
+    try:
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        
+        campanhas_ativas, total_itens, total_lances, valor_arrecadado = recalcular_resumo(cursor)
+        registrar_auditoria(cursor, current_user['id'], "Recalculou os contadores do dashboard")
+        conn.commit()
+        
+        # Invalida o dashboard em cache, que depende desses grupos
+        incrementar_versao('itens', 'campanhas')
+        
+        return jsonify({
+            'message': 'Contadores recalculados com sucesso!',
+            'campanhas_ativas': campanhas_ativas,
+            'total_itens': total_itens,
+            'total_lances': total_lances,
+            'valor_arrecadado': float(valor_arrecadado)
+        }), 200
+        
+    except Exception as e:
+        if conn:
+            conn.rollback()
+        return jsonify({'message': f'Erro ao recalcular o dashboard: {str(e)}'}), 500
+    finally:
+        if conn:
+            cursor.close()
+            release_db_connection(conn)
+
+@dashboard_bp.route('/dashboard/pool', methods=['GET'])
+@token_required
+@admin_required
+def get_estatisticas_pool(current_user):
+    """Retorna as estatísticas do pool de conexões com o banco."""
+    estatisticas = get_pool_stats()
+    if estatisticas is None:
+        return jsonify({'message': 'Pool de conexões não inicializado!'}), 503
+    return jsonify(estatisticas), 200
+
 @dashboard_bp.route('/configuracoes', methods=['GET'])
+@cache_leitura('configuracoes')
 def get_configuracoes():
     """Retorna as configurações do sistema."""
     conn = None
@@ -96,15 +126,7 @@ def get_configuracoes():
                 'mensagem_home': 'Bem-vindo ao Leilão Missionário!'
             }), 200
         
-        return jsonify({
-            'id': config[0],
-            'nome_instituicao': config[1],
-            'logo': config[2],
-            'telefone': config[3],
-            'email': config[4],
-            'moeda': config[5],
-            'mensagem_home': config[6]
-        }), 200
+        return jsonify(MAPA_CONFIGURACOES(config)), 200
         
     except Exception as e:
         return jsonify({'message': f'Erro ao buscar configurações: {str(e)}'}), 500
@@ -177,14 +199,9 @@ def update_configuracoes(current_user):
                     data.get('mensagem_home', 'Bem-vindo ao Leilão Missionário!')
                 ))
             
+            registrar_auditoria(cursor, current_user['id'], "Atualizou as configurações do sistema")
             conn.commit()
-            
-            # Registra na auditoria
-            cursor.execute(
-                "INSERT INTO auditoria (usuario_id, acao) VALUES (%s, %s)",
-                (current_user['id'], "Atualizou as configurações do sistema")
-            )
-            conn.commit()
+            incrementar_versao('configuracoes')
             
             return jsonify({'message': 'Configurações atualizadas com sucesso!'}), 200
             
@@ -202,11 +219,23 @@ def update_configuracoes(current_user):
 @dashboard_bp.route('/auditoria', methods=['GET'])
 @token_required
 def get_auditoria(current_user):
-    """Retorna o log de auditoria."""
+    """Retorna o log de auditoria, paginado por cursor."""
     from src.auth import admin_required
     
     @admin_required
     def _get_auditoria(current_user):
+        # Paginação por cursor sobre (data_acao, id)
+        limite = ler_limite(request.args, padrao=100)
+        filtros = ""
+        params = []
+        if request.args.get('cursor'):
+            try:
+                data_cursor, id_cursor = decodificar_cursor(request.args['cursor'])
+            except ValueError as e:
+                return jsonify({'message': str(e)}), 400
+            filtros = "WHERE (a.data_acao, a.id) < (%s, %s)"
+            params = [data_cursor, id_cursor]
+        
         conn = None
         try:
             conn = get_db_connection()
@@ -216,26 +245,20 @@ def get_auditoria(current_user):
                 SELECT a.id, a.acao, a.data_acao, u.id, u.nome, u.email
                 FROM auditoria a
                 LEFT JOIN usuarios u ON a.usuario_id = u.id
-                ORDER BY a.data_acao DESC
-                LIMIT 100
-            """)
+            """ + filtros + """
+                ORDER BY a.data_acao DESC, a.id DESC
+                LIMIT %s
+            """, params + [limite + 1])
             
-            logs = cursor.fetchall()
+            logs, proximo = paginar(cursor.fetchall(), limite, lambda log: (log[2], log[0]))
             
-            result = []
-            for log in logs:
-                result.append({
-                    'id': log[0],
-                    'acao': log[1],
-                    'data_acao': log[2].isoformat(),
-                    'usuario': {
-                        'id': log[3],
-                        'nome': log[4],
-                        'email': log[5]
-                    } if log[3] else None
-                })
+            result = MAPA_AUDITORIA.lista(logs)
+            for log in result:
+                # Ações sem usuário (removido ou do sistema)
+                if log['usuario']['id'] is None:
+                    log['usuario'] = None
             
-            return jsonify(result), 200
+            return jsonify({'auditoria': result, 'proximo': proximo}), 200
             
         except Exception as e:
             return jsonify({'message': f'Erro ao buscar auditoria: {str(e)}'}), 500
@@ -0,0 +1,48 @@
+import os
+from flask import Blueprint, request, jsonify, send_file
+from src.auth import token_required, gestor_or_admin_required
+from src.estaticos import CACHE_IMUTAVEL
+from src.imagens import (
+    ErroImagem, imagens_disponiveis, processar_imagem, urls_imagem,
+    caminho_variante, mimetype_variante
+)
+from src.config import Config
+
+imagens_bp = Blueprint('imagens', __name__)
+
+@imagens_bp.route('/imagens', methods=['POST'])
+@token_required
+@gestor_or_admin_required
+def upload_imagem(current_user):
+    """Recebe um banner (campo 'arquivo') e gera as suas variantes (gestor ou admin).
+
+    Retorna as URLs para banner_16_9 e banner_1_1 e a lista de variantes.
+    """
+    if not imagens_disponiveis():
+        return jsonify({'message': 'Processamento de imagens indisponível: instale o pacote Pillow!'}), 501
+
+    arquivo = request.files.get('arquivo')
+    if arquivo is None:
+        return jsonify({'message': 'Envie a imagem no campo arquivo!'}), 400
+
+    conteudo = arquivo.read(Config.IMAGENS_TAMANHO_MAXIMO + 1)
+    try:
+        chave = processar_imagem(conteudo)
+    except ErroImagem as e:
+        return jsonify({'message': str(e)}), 400
+    except Exception as e:
+        return jsonify({'message': f'Erro ao processar imagem: {str(e)}'}), 500
+
+    return jsonify(urls_imagem(chave)), 201
+
+@imagens_bp.route('/imagens/<chave>/<nome>', methods=['GET'])
+def get_imagem(chave, nome):
+    """Serve uma variante; o conteúdo de cada URL nunca muda."""
+    caminho = caminho_variante(chave, nome)
+    if caminho is None or not os.path.isfile(caminho):
+        return jsonify({'message': 'Imagem não encontrada!'}), 404
+
+    resposta = send_file(caminho, mimetype=mimetype_variante(nome), etag=False, conditional=False)
+    resposta.set_etag(f'{chave}-{nome}')
+    resposta.headers['Cache-Control'] = CACHE_IMUTAVEL
+    return resposta.make_conditional(request)
@@ -1,10 +1,74 @@
 from flask import Blueprint, request, jsonify
+from psycopg2.extras import execute_values
 from src.db import get_db_connection, release_db_connection
+from src.auditoria import registrar_auditoria
 from src.auth import token_required, gestor_or_admin_required
+from src.cache import cache_leitura, incrementar_versao
+from src.motor_lances import get_motor_lances
+from src.consultas import registrar_consulta, executar_consulta
+from src.config import Config
+from src.serializacao import Mapeador, resposta_json_pronta
+from src.importacao import ler_csv, validar_itens, ErroImportacao, LIMITE_ITENS_LOTE
+from src.paginacao import ler_limite, decodificar_cursor, paginar
+from src.precos import ler_preco, LANCE_MAXIMO
 
 itens_bp = Blueprint('itens', __name__)
 
+MAPA_ITEM = Mapeador(
+    'id', 'nome', 'lance_inicial', 'banner_16_9', 'banner_1_1',
+    ('campanha', 'id', 'nome'),
+    ('categoria', 'id', 'nome'),
+    'lance_atual', 'total_lances'
+)
+COLUNAS_ITEM = [
+    'i.id', 'i.nome', 'i.lance_inicial', 'i.banner_16_9', 'i.banner_1_1',
+    'c.id', 'c.nome', 'cat.id', 'cat.nome',
+    'i.lance_atual', 'i.total_lances'
+]
+MAPA_LANCE_ITEM = Mapeador('id', 'valor', 'data')
+
+JUNCOES_ITENS = """
+    FROM itens i
+    JOIN campanhas c ON i.campanha_id = c.id
+    JOIN categorias cat ON i.categoria_id = cat.id
+"""
+SQL_ITENS = f"SELECT {', '.join(COLUNAS_ITEM)}" + JUNCOES_ITENS
+
+# A listagem inteira montada pelo Postgres, já como texto JSON
+SQL_ITENS_JSON = (
+    f"SELECT COALESCE(json_agg({MAPA_ITEM.objeto_json(COLUNAS_ITEM)} ORDER BY i.id DESC), '[]')::text"
+    + JUNCOES_ITENS
+)
+
+# Consultas mais frequentes das páginas públicas, preparadas por conexão
+CONSULTA_ITENS = registrar_consulta('listar_itens', SQL_ITENS + " ORDER BY i.id DESC")
+CONSULTA_ITENS_CAMPANHA = registrar_consulta(
+    'listar_itens_campanha',
+    SQL_ITENS + " WHERE i.campanha_id = %(campanha_id)s ORDER BY i.id DESC",
+    campanha_id='INTEGER'
+)
+CONSULTA_ITENS_JSON = registrar_consulta('listar_itens_json', SQL_ITENS_JSON)
+CONSULTA_ITENS_CAMPANHA_JSON = registrar_consulta(
+    'listar_itens_campanha_json',
+    SQL_ITENS_JSON + " WHERE i.campanha_id = %(campanha_id)s",
+    campanha_id='INTEGER'
+)
+CONSULTA_ITEM = registrar_consulta(
+    'buscar_item',
+    SQL_ITENS + " WHERE i.id = %(id)s",
+    id='INTEGER'
+)
+# A campanha do item restringe a busca a uma única partição de lances
+CONSULTA_ULTIMOS_LANCES_ITEM = registrar_consulta('ultimos_lances_item', """
+    SELECT id, valor, data_lance
+    FROM lances
+    WHERE campanha_id = %(campanha_id)s AND item_id = %(item_id)s
+    ORDER BY data_lance DESC, id DESC
+    LIMIT 3
+""", campanha_id='INTEGER', item_id='INTEGER')
+
 @itens_bp.route('/itens', methods=['GET'])
+@cache_leitura('itens', 'campanhas', 'categorias')
 def get_itens():
     """Lista todos os itens."""
     conn = None
@@ -15,47 +79,149 @@ def get_itens():
         # Filtra por campanha se fornecido
         campanha_id = request.args.get('campanha_id')
         
-        query = """
-            SELECT i.id, i.nome, i.lance_inicial, i.banner_16_9, i.banner_1_1,
-                   c.id, c.nome, cat.id, cat.nome,
-                   COALESCE(MAX(l.valor), i.lance_inicial) as lance_atual
-            FROM itens i
-            JOIN campanhas c ON i.campanha_id = c.id
-            JOIN categorias cat ON i.categoria_id = cat.id
-            LEFT JOIN lances l ON i.id = l.item_id
-        """
+        if Config.SERIALIZACAO_JSON_AGG:
+            # O banco devolve a listagem pronta, sem montar dicts no Python
+            if campanha_id:
+                executar_consulta(cursor, CONSULTA_ITENS_CAMPANHA_JSON, {'campanha_id': campanha_id})
+            else:
+                executar_consulta(cursor, CONSULTA_ITENS_JSON)
+            return resposta_json_pronta(cursor.fetchone()[0])
         
         if campanha_id:
-            query += " WHERE i.campanha_id = %s"
-            query += " GROUP BY i.id, c.id, cat.id ORDER BY i.id DESC"
-            cursor.execute(query, (campanha_id,))
+            executar_consulta(cursor, CONSULTA_ITENS_CAMPANHA, {'campanha_id': campanha_id})
         else:
-            query += " GROUP BY i.id, c.id, cat.id ORDER BY i.id DESC"
-            cursor.execute(query)
+            executar_consulta(cursor, CONSULTA_ITENS)
+        
+        return jsonify(MAPA_ITEM.lista(cursor.fetchall())), 200
         
+    except Exception as e:
+        return jsonify({'message': f'Erro ao buscar itens: {str(e)}'}), 500
+    finally:
+        if conn:
+            cursor.close()
+            release_db_connection(conn)
+
+@itens_bp.route('/itens/changes', methods=['GET'])
+def get_itens_alterados():
+    """Retorna os itens alterados ou removidos desde a versão informada.
+
+    Sem o parâmetro since, retorna todos os itens. A resposta traz a nova
+    versão a ser enviada na próxima chamada; um item pode vir repetido em
+    chamadas seguidas, mas nenhuma alteração é perdida.
+    """
+    desde = request.args.get('since', type=int)
+    campanha_id = request.args.get('campanha_id', type=int)
+    
+    conn = None
+    try:
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        
+        # Marca d'água lida antes dos itens: transações abaixo dela já terminaram.
+        # Só transações que escrevem recebem ID; leituras longas, como a
+        # exportação de lances, não a seguram
+        cursor.execute("SELECT pg_snapshot_xmin(pg_current_snapshot())::text::BIGINT")
+        versao = cursor.fetchone()[0]
+        
+        params = {'desde': desde or 0, 'campanha_id': campanha_id}
+        cursor.execute(SQL_ITENS + """
+            WHERE i.versao >= %(desde)s
+              AND (%(campanha_id)s::INTEGER IS NULL OR i.campanha_id = %(campanha_id)s)
+            ORDER BY i.id DESC
+        """, params)
         itens = cursor.fetchall()
         
-        result = []
-        for item in itens:
-            result.append({
-                'id': item[0],
-                'nome': item[1],
-                'lance_inicial': float(item[2]),
-                'banner_16_9': item[3],
-                'banner_1_1': item[4],
-                'campanha': {
-                    'id': item[5],
-                    'nome': item[6]
-                },
-                'categoria': {
-                    'id': item[7],
-                    'nome': item[8]
-                },
-                'lance_atual': float(item[9])
-            })
+        removidos = []
+        if desde:
+            cursor.execute("""
+                SELECT item_id FROM itens_removidos
+                WHERE versao >= %(desde)s
+                  AND (%(campanha_id)s::INTEGER IS NULL OR campanha_id = %(campanha_id)s)
+            """, params)
+            removidos = [row[0] for row in cursor.fetchall()]
         
-        return jsonify(result), 200
+        return jsonify({'itens': MAPA_ITEM.lista(itens), 'removidos': removidos, 'versao': versao}), 200
         
+    except Exception as e:
+        return jsonify({'message': f'Erro ao buscar alterações dos itens: {str(e)}'}), 500
+    finally:
+        if conn:
+            cursor.close()
+            release_db_connection(conn)
+
+def _padrao_like(texto):
+    """Padrão ILIKE que encontra o texto em qualquer posição, literalmente."""
+    texto = texto.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+    return f'%{texto}%'
+
+@itens_bp.route('/itens/busca', methods=['GET'])
+@cache_leitura('itens', 'campanhas', 'categorias')
+def buscar_itens():
+    """Busca itens pelo nome, ordenados por relevância e paginados por cursor.
+
+    O texto de q é procurado sem acentos, por palavras (com radicais em
+    português), por trecho do nome e por semelhança, o que tolera erros de
+    digitação. Filtros opcionais: campanha_id, categoria_id, preco_min e
+    preco_max (sobre o lance atual). Sem q, os itens saem do mais novo para o
+    mais antigo.
+    """
+    q = request.args.get('q', '').strip()
+    params = {
+        'q': q,
+        'padrao': _padrao_like(q),
+        'campanha_id': request.args.get('campanha_id', type=int),
+        'categoria_id': request.args.get('categoria_id', type=int),
+    }
+    for campo in ('preco_min', 'preco_max'):
+        params[campo] = request.args.get(campo)
+        if params[campo] is not None:
+            params[campo] = ler_preco(params[campo])
+            if params[campo] is None:
+                return jsonify({'message': f'{campo} deve ser um valor entre 0 e {LANCE_MAXIMO}!'}), 400
+    limite = ler_limite(request.args)
+
+    if q:
+        # tsvector e trigramas usam índices GIN; a relevância soma as duas notas
+        busca = """
+            CROSS JOIN websearch_to_tsquery('portugues_sem_acento', %(q)s) tsq
+            CROSS JOIN LATERAL (
+                SELECT (ts_rank_cd(i.busca, tsq) + similarity(sem_acento(i.nome), sem_acento(%(q)s)))::FLOAT8 AS pontuacao
+            ) p
+            WHERE (i.busca @@ tsq
+                   OR sem_acento(i.nome) ILIKE sem_acento(%(padrao)s)
+                   OR sem_acento(i.nome) %% sem_acento(%(q)s))
+        """
+    else:
+        busca = "CROSS JOIN LATERAL (SELECT 0::FLOAT8 AS pontuacao) p WHERE true"
+
+    filtros = """
+          AND (%(campanha_id)s::INTEGER IS NULL OR i.campanha_id = %(campanha_id)s)
+          AND (%(categoria_id)s::INTEGER IS NULL OR i.categoria_id = %(categoria_id)s)
+          AND (%(preco_min)s::NUMERIC IS NULL OR i.lance_atual >= %(preco_min)s)
+          AND (%(preco_max)s::NUMERIC IS NULL OR i.lance_atual <= %(preco_max)s)
+    """
+    # Paginação por cursor sobre (pontuacao, id)
+    if request.args.get('cursor'):
+        try:
+            params['pontuacao_cursor'], params['id_cursor'] = decodificar_cursor(request.args['cursor'], float)
+        except ValueError as e:
+            return jsonify({'message': str(e)}), 400
+        filtros += " AND (p.pontuacao, i.id) < (%(pontuacao_cursor)s, %(id_cursor)s)"
+
+    conn = None
+    try:
+        conn = get_db_connection()
+        cursor = conn.cursor()
+
+        cursor.execute(
+            f"SELECT {', '.join(COLUNAS_ITEM)}, p.pontuacao" + JUNCOES_ITENS + busca + filtros
+            + " ORDER BY p.pontuacao DESC, i.id DESC LIMIT %(limite)s",
+            {**params, 'limite': limite + 1}
+        )
+        itens, proximo = paginar(cursor.fetchall(), limite, lambda item: (item[-1], item[0]))
+
+        return jsonify({'itens': MAPA_ITEM.lista(item[:-1] for item in itens), 'proximo': proximo}), 200
+
     except Exception as e:
         return jsonify({'message': f'Erro ao buscar itens: {str(e)}'}), 500
     finally:
@@ -64,6 +230,7 @@ def get_itens():
             release_db_connection(conn)
 
 @itens_bp.route('/itens/<int:id>', methods=['GET'])
+@cache_leitura('itens', 'campanhas', 'categorias')
 def get_item(id):
     """Busca um item específico com seus últimos 3 lances."""
     conn = None
@@ -72,51 +239,24 @@ def get_item(id):
         cursor = conn.cursor()
         
         # Busca o item
-        cursor.execute("""
-            SELECT i.id, i.nome, i.lance_inicial, i.banner_16_9, i.banner_1_1,
-                   c.id, c.nome, cat.id, cat.nome,
-                   COALESCE(MAX(l.valor), i.lance_inicial) as lance_atual
-            FROM itens i
-            JOIN campanhas c ON i.campanha_id = c.id
-            JOIN categorias cat ON i.categoria_id = cat.id
-            LEFT JOIN lances l ON i.id = l.item_id
-            WHERE i.id = %s
-            GROUP BY i.id, c.id, cat.id
-        """, (id,))
+        executar_consulta(cursor, CONSULTA_ITEM, {'id': id})
         
         item = cursor.fetchone()
         
         if not item:
             return jsonify({'message': 'Item não encontrado!'}), 404
         
+        result = MAPA_ITEM(item)
+        
         # Busca os últimos 3 lances
-        cursor.execute("""
-            SELECT valor, data_lance
-            FROM lances
-            WHERE item_id = %s
-            ORDER BY data_lance DESC
-            LIMIT 3
-        """, (id,))
+        executar_consulta(cursor, CONSULTA_ULTIMOS_LANCES_ITEM, {
+            'campanha_id': result['campanha']['id'],
+            'item_id': id
+        })
         
         lances = cursor.fetchall()
         
-        result = {
-            'id': item[0],
-            'nome': item[1],
-            'lance_inicial': float(item[2]),
-            'banner_16_9': item[3],
-            'banner_1_1': item[4],
-            'campanha': {
-                'id': item[5],
-                'nome': item[6]
-            },
-            'categoria': {
-                'id': item[7],
-                'nome': item[8]
-            },
-            'lance_atual': float(item[9]),
-            'ultimos_lances': [{'valor': float(l[0]), 'data': l[1].isoformat()} for l in lances]
-        }
+        result['ultimos_lances'] = MAPA_LANCE_ITEM.lista(lances)
         
         return jsonify(result), 200
         
@@ -154,34 +294,118 @@ def create_item(current_user):
             return jsonify({'message': 'Apenas campanhas ativas podem receber novos itens!'}), 400
         
         cursor.execute("""
-            INSERT INTO itens (nome, campanha_id, categoria_id, lance_inicial, banner_16_9, banner_1_1)
-            VALUES (%s, %s, %s, %s, %s, %s)
+            INSERT INTO itens (nome, campanha_id, categoria_id, lance_inicial, lance_atual, banner_16_9, banner_1_1)
+            VALUES (%s, %s, %s, %s, %s, %s, %s)
             RETURNING id
         """, (
             data['nome'],
             data['campanha_id'],
             data['categoria_id'],
             data['lance_inicial'],
+            data['lance_inicial'],
             data.get('banner_16_9'),
             data.get('banner_1_1')
         ))
         
         item_id = cursor.fetchone()[0]
+        registrar_auditoria(cursor, current_user['id'], f"Criou o item '{data['nome']}' (ID: {item_id})")
         conn.commit()
+        incrementar_versao('itens')
         
-        # Registra na auditoria
-        cursor.execute(
-            "INSERT INTO auditoria (usuario_id, acao) VALUES (%s, %s)",
-            (current_user['id'], f"Criou o item '{data['nome']}' (ID: {item_id})")
+        return jsonify({'message': 'Item criado com sucesso!', 'id': item_id}), 201
+        
+    except Exception as e:
+        if conn:
+            conn.rollback()
+        return jsonify({'message': f'Erro ao criar item: {str(e)}'}), 500
+    finally:
+        if conn:
+            cursor.close()
+            release_db_connection(conn)
+
+def _ler_lote(req):
+    """Retorna (campanha_id, linhas) do corpo JSON ou CSV da importação em lote."""
+    campanha_id = req.args.get('campanha_id') or req.form.get('campanha_id')
+    if req.is_json:
+        corpo = req.get_json(silent=True)
+        if isinstance(corpo, dict):
+            campanha_id = corpo.get('campanha_id', campanha_id)
+            corpo = corpo.get('itens')
+        if not isinstance(corpo, list):
+            raise ErroImportacao('Envie um array de itens ou {"campanha_id": ..., "itens": [...]}!')
+        return campanha_id, corpo
+    if 'arquivo' in req.files:
+        return campanha_id, ler_csv(req.files['arquivo'].read())
+    if req.mimetype == 'text/csv':
+        return campanha_id, ler_csv(req.get_data())
+    raise ErroImportacao('Envie os itens em JSON ou CSV!')
+
+@itens_bp.route('/itens/lote', methods=['POST'])
+@token_required
+@gestor_or_admin_required
+def create_itens_lote(current_user):
+    """Cria vários itens de uma campanha numa única transação (JSON ou CSV)."""
+    try:
+        campanha_id, linhas = _ler_lote(request)
+    except ErroImportacao as e:
+        return jsonify({'message': str(e)}), 400
+    
+    try:
+        campanha_id = int(campanha_id)
+    except (TypeError, ValueError):
+        return jsonify({'message': 'campanha_id é obrigatório!'}), 400
+    if not linhas:
+        return jsonify({'message': 'Nenhum item enviado!'}), 400
+    if len(linhas) > LIMITE_ITENS_LOTE:
+        return jsonify({'message': f'Envie no máximo {LIMITE_ITENS_LOTE} itens por lote!'}), 400
+    
+    conn = None
+    try:
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        
+        # Campanha e categorias são conferidas uma única vez para o lote todo
+        cursor.execute("SELECT nome, status FROM campanhas WHERE id = %s", (campanha_id,))
+        campanha = cursor.fetchone()
+        
+        if not campanha:
+            return jsonify({'message': 'Campanha não encontrada!'}), 404
+        
+        if campanha[1] != 'ativa':
+            return jsonify({'message': 'Apenas campanhas ativas podem receber novos itens!'}), 400
+        
+        cursor.execute("SELECT id, nome FROM categorias")
+        itens, erros = validar_itens(linhas, dict(cursor.fetchall()))
+        
+        # Nada é gravado se alguma linha tiver erro, para o lote poder ser reenviado
+        if erros:
+            return jsonify({'message': f'{len(erros)} item(ns) com erro, nenhum item foi criado.', 'erros': erros}), 400
+        
+        # Um único INSERT com todas as linhas
+        ids = execute_values(cursor, """
+            INSERT INTO itens (nome, campanha_id, categoria_id, lance_inicial, lance_atual, banner_16_9, banner_1_1)
+            VALUES %s
+            RETURNING id
+        """, [
+            (nome, campanha_id, categoria_id, lance_inicial, lance_inicial, banner_16_9, banner_1_1)
+            for nome, categoria_id, lance_inicial, banner_16_9, banner_1_1 in itens
+        ], page_size=len(itens), fetch=True)
+        registrar_auditoria(
+            cursor, current_user['id'],
+            f"Importou {len(ids)} itens na campanha '{campanha[0]}' (ID: {campanha_id})"
         )
         conn.commit()
+        incrementar_versao('itens')
         
-        return jsonify({'message': 'Item criado com sucesso!', 'id': item_id}), 201
+        return jsonify({
+            'message': f'{len(ids)} itens criados com sucesso!',
+            'ids': [row[0] for row in ids]
+        }), 201
         
     except Exception as e:
         if conn:
             conn.rollback()
-        return jsonify({'message': f'Erro ao criar item: {str(e)}'}), 500
+        return jsonify({'message': f'Erro ao importar itens: {str(e)}'}), 500
     finally:
         if conn:
             cursor.close()
@@ -225,6 +449,9 @@ def update_item(current_user, id):
         if 'lance_inicial' in data:
             fields.append("lance_inicial = %s")
             values.append(data['lance_inicial'])
+            # Sem lances, o preço atual acompanha o lance inicial
+            fields.append("lance_atual = CASE WHEN total_lances = 0 THEN %s ELSE lance_atual END")
+            values.append(data['lance_inicial'])
         if 'banner_16_9' in data:
             fields.append("banner_16_9 = %s")
             values.append(data['banner_16_9'])
@@ -239,14 +466,14 @@ def update_item(current_user, id):
         query = f"UPDATE itens SET {', '.join(fields)} WHERE id = %s"
         
         cursor.execute(query, values)
+        registrar_auditoria(cursor, current_user['id'], f"Atualizou o item '{item[0]}' (ID: {id})")
         conn.commit()
+        incrementar_versao('itens')
         
-        # Registra na auditoria
-        cursor.execute(
-            "INSERT INTO auditoria (usuario_id, acao) VALUES (%s, %s)",
-            (current_user['id'], f"Atualizou o item '{item[0]}' (ID: {id})")
-        )
-        conn.commit()
+        # O preço em memória pode ter mudado junto com o lance inicial
+        motor = get_motor_lances()
+        if motor:
+            motor.descartar_item(id)
         
         return jsonify({'message': 'Item atualizado com sucesso!'}), 200
         
@@ -277,14 +504,13 @@ def delete_item(current_user, id):
             return jsonify({'message': 'Item não encontrado!'}), 404
         
         cursor.execute("DELETE FROM itens WHERE id = %s", (id,))
+        registrar_auditoria(cursor, current_user['id'], f"Deletou o item '{item[0]}' (ID: {id})")
         conn.commit()
+        incrementar_versao('itens')
         
-        # Registra na auditoria
-        cursor.execute(
-            "INSERT INTO auditoria (usuario_id, acao) VALUES (%s, %s)",
-            (current_user['id'], f"Deletou o item '{item[0]}' (ID: {id})")
-        )
-        conn.commit()
+        motor = get_motor_lances()
+        if motor:
+            motor.descartar_item(id)
         
         return jsonify({'message': 'Item deletado com sucesso!'}), 200
         
@@ -1,23 +1,86 @@
-from flask import Blueprint, request, jsonify
-from src.db import get_db_connection, release_db_connection
+import csv
+import queue
+from io import StringIO
+from flask import Blueprint, Response, request, jsonify, stream_with_context
+from src.db import get_db_connection, release_db_connection, release_request_connection, create_dedicated_connection
 from src.auth import token_required
+from src.precos import registrar_lance, ler_valor_lance, erro_participante
+from src.cache import incrementar_versao
+from src.motor_lances import get_motor_lances
+from src.gravacao_agrupada import get_gravacao_agrupada
+from src.fila_lotes import ConfirmacaoPendente
+from src.eventos_lances import get_transmissor_lances, formatar_evento
+from src.config import Config
+from src.paginacao import ler_limite, decodificar_cursor, paginar
+from src.serializacao import Mapeador
 
 lances_bp = Blueprint('lances', __name__)
 
+# Quantidade de linhas buscadas por vez pelo cursor da exportação
+EXPORTACAO_LINHAS_POR_BLOCO = 2000
+
+# Tamanho aproximado de cada pedaço do CSV enviado ao cliente
+EXPORTACAO_TAMANHO_PEDACO = 64 * 1024
+
+MAPA_LANCE = Mapeador(
+    'id', 'valor', 'nome_participante', 'telefone', 'data_lance',
+    ('item', 'id', 'nome'),
+    ('categoria', 'id', 'nome')
+)
+MAPA_LANCE_RECENTE = Mapeador(
+    'id', 'valor', 'nome_participante', 'telefone', 'data_lance',
+    ('item', 'id', 'nome')
+)
+
+def _filtros_lances(args):
+    """Monta as condições dos filtros opcionais da listagem de lances."""
+    filtros = ""
+    params = []
+    
+    # O filtro por campanha (explícito ou a do item) limita as partições lidas
+    if args.get('campanha_id'):
+        filtros += " AND l.campanha_id = %s"
+        params.append(args.get('campanha_id'))
+    
+    if args.get('item_id'):
+        filtros += " AND l.item_id = %s AND l.campanha_id = (SELECT campanha_id FROM itens WHERE id = %s)"
+        params += [args.get('item_id'), args.get('item_id')]
+    
+    if args.get('categoria_id'):
+        filtros += " AND i.categoria_id = %s"
+        params.append(args.get('categoria_id'))
+    
+    if args.get('data_inicio'):
+        filtros += " AND l.data_lance >= %s"
+        params.append(args.get('data_inicio'))
+    
+    if args.get('data_fim'):
+        filtros += " AND l.data_lance <= %s"
+        params.append(args.get('data_fim'))
+    
+    return filtros, params
+
 @lances_bp.route('/lances', methods=['GET'])
 @token_required
 def get_lances(current_user):
-    """Lista todos os lances (protegido)."""
+    """Lista os lances, paginados por cursor (protegido)."""
     conn = None
     try:
         conn = get_db_connection()
         cursor = conn.cursor()
         
         # Filtros opcionais
-        item_id = request.args.get('item_id')
-        categoria_id = request.args.get('categoria_id')
-        data_inicio = request.args.get('data_inicio')
-        data_fim = request.args.get('data_fim')
+        filtros, params = _filtros_lances(request.args)
+        
+        # Paginação por cursor sobre (data_lance, id)
+        limite = ler_limite(request.args)
+        if request.args.get('cursor'):
+            try:
+                data_cursor, id_cursor = decodificar_cursor(request.args['cursor'])
+            except ValueError as e:
+                return jsonify({'message': str(e)}), 400
+            filtros += " AND (l.data_lance, l.id) < (%s, %s)"
+            params += [data_cursor, id_cursor]
         
         query = """
             SELECT l.id, l.valor, l.nome_participante, l.telefone, l.data_lance,
@@ -26,49 +89,12 @@ def get_lances(current_user):
             JOIN itens i ON l.item_id = i.id
             JOIN categorias cat ON i.categoria_id = cat.id
             WHERE 1=1
-        """
-        params = []
-        
-        if item_id:
-            query += " AND l.item_id = %s"
-            params.append(item_id)
-        
-        if categoria_id:
-            query += " AND i.categoria_id = %s"
-            params.append(categoria_id)
-        
-        if data_inicio:
-            query += " AND l.data_lance >= %s"
-            params.append(data_inicio)
-        
-        if data_fim:
-            query += " AND l.data_lance <= %s"
-            params.append(data_fim)
-        
-        query += " ORDER BY l.data_lance DESC"
-        
-        cursor.execute(query, params)
-        lances = cursor.fetchall()
-        
-        result = []
-        for lance in lances:
-            result.append({
-                'id': lance[0],
-                'valor': float(lance[1]),
-                'nome_participante': lance[2],
-                'telefone': lance[3],
-                'data_lance': lance[4].isoformat(),
-                'item': {
-                    'id': lance[5],
-                    'nome': lance[6]
-                },
-                'categoria': {
-                    'id': lance[7],
-                    'nome': lance[8]
-                }
-            })
-        
-        return jsonify(result), 200
+        """ + filtros + " ORDER BY l.data_lance DESC, l.id DESC LIMIT %s"
+        
+        cursor.execute(query, params + [limite + 1])
+        lances, proximo = paginar(cursor.fetchall(), limite, lambda lance: (lance[4], lance[0]))
+        
+        return jsonify({'lances': MAPA_LANCE.lista(lances), 'proximo': proximo}), 200
         
     except Exception as e:
         return jsonify({'message': f'Erro ao buscar lances: {str(e)}'}), 500
@@ -86,54 +112,80 @@ def create_lance():
     if not data or not all(field in data for field in required_fields):
         return jsonify({'message': 'Campos obrigatórios: item_id, valor, nome_participante, telefone'}), 400
     
+    # Um valor inválido derrubaria o lote inteiro da gravação agrupada
+    item_id = data['item_id']
+    if isinstance(item_id, str) and item_id.strip().isdigit():
+        item_id = int(item_id)
+    if not isinstance(item_id, int) or isinstance(item_id, bool) or not 0 < item_id <= 2 ** 31 - 1:
+        return jsonify({'message': 'item_id inválido!'}), 400
+    valor = ler_valor_lance(data['valor'])
+    if valor is None:
+        return jsonify({'message': 'Valor do lance inválido!'}), 400
+    erro = erro_participante(data['nome_participante'], data['telefone'])
+    if erro:
+        return jsonify({'message': erro}), 400
+    
     conn = None
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        # Busca o lance atual do item
-        cursor.execute("""
-            SELECT COALESCE(MAX(l.valor), i.lance_inicial) as lance_atual
-            FROM itens i
-            LEFT JOIN lances l ON i.id = l.item_id
-            WHERE i.id = %s
-            GROUP BY i.lance_inicial
-        """, (data['item_id'],))
-        
-        result = cursor.fetchone()
+        motor = get_motor_lances()
+        gravacao = get_gravacao_agrupada()
+        
+        if motor:
+            # Valida em memória e aguarda a confirmação da gravação em lote
+            result = motor.propor_lance(
+                item_id,
+                valor,
+                data['nome_participante'],
+                data['telefone']
+            )
+        elif gravacao:
+            # Registra junto com os lances concorrentes, num único commit
+            result = gravacao.registrar_lance(
+                item_id,
+                valor,
+                data['nome_participante'],
+                data['telefone']
+            )
+        else:
+            conn = get_db_connection()
+            cursor = conn.cursor()
+            
+            # Valida e registra o lance numa única ida ao banco
+            result = registrar_lance(
+                cursor,
+                item_id,
+                valor,
+                data['nome_participante'],
+                data['telefone']
+            )
+            conn.commit()
         
         if not result:
             return jsonify({'message': 'Item não encontrado!'}), 404
         
-        lance_atual = float(result[0])
+        lance_id, lance_atual = result[0], float(result[1])
         
-        # Valida se o novo lance é maior que o atual
-        if float(data['valor']) <= lance_atual:
+        if lance_id is None:
             return jsonify({
                 'message': f'O lance deve ser maior que o lance atual de R$ {lance_atual:.2f}',
                 'lance_atual': lance_atual
             }), 400
         
-        # Insere o novo lance
-        cursor.execute("""
-            INSERT INTO lances (item_id, valor, nome_participante, telefone)
-            VALUES (%s, %s, %s, %s)
-            RETURNING id
-        """, (
-            data['item_id'],
-            data['valor'],
-            data['nome_participante'],
-            data['telefone']
-        ))
-        
-        lance_id = cursor.fetchone()[0]
-        conn.commit()
+        # O preço atual e a quantidade de lances dos itens mudaram
+        incrementar_versao('itens')
         
         return jsonify({
             'message': 'Lance registrado com sucesso!',
-            'id': lance_id
+            'id': lance_id,
+            'lance_atual': lance_atual
         }), 201
         
+    except ConfirmacaoPendente as e:
+        # O lance não falhou: a gravação em lote só não terminou no prazo
+        resposta = {'message': str(e), 'pendente': True}
+        if e.lance_atual is not None:
+            resposta['lance_atual'] = float(e.lance_atual)
+        return jsonify(resposta), 202
     except Exception as e:
         if conn:
             conn.rollback()
@@ -143,6 +195,56 @@ def create_lance():
             cursor.close()
             release_db_connection(conn)
 
+@lances_bp.route('/lances/stream', methods=['GET'])
+def stream_lances():
+    """Transmite os lances aceitos em tempo real (público, Server-Sent Events)."""
+    transmissor = get_transmissor_lances()
+    if not transmissor:
+        return jsonify({'message': 'Transmissão de lances indisponível!'}), 503
+    
+    item_id = request.args.get('item_id', type=int)
+    campanha_id = request.args.get('campanha_id', type=int)
+    ultimo_id = request.headers.get('Last-Event-ID', type=int)
+    
+    try:
+        assinatura = transmissor.assinar(item_id, campanha_id, ultimo_id)
+    except Exception as e:
+        return jsonify({'message': f'Erro ao assinar lances: {str(e)}'}), 500
+    finally:
+        # O stream pode durar horas: não segura a conexão da requisição
+        release_request_connection()
+    
+    def gerar():
+        try:
+            yield 'retry: 3000\n\n'
+            
+            # Eventos perdidos desde o Last-Event-ID
+            enviados = set()
+            for evento in assinatura.retomada:
+                enviados.add(evento['id'])
+                yield formatar_evento(evento)
+            
+            while True:
+                try:
+                    evento = assinatura.fila.get(timeout=Config.EVENTOS_HEARTBEAT)
+                except queue.Empty:
+                    # Heartbeat para manter a conexão aberta em proxies
+                    yield ': heartbeat\n\n'
+                    continue
+                
+                if evento is None:
+                    break
+                if evento['id'] not in enviados:
+                    yield formatar_evento(evento)
+        finally:
+            transmissor.cancelar(assinatura)
+    
+    return Response(
+        stream_with_context(gerar()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
 @lances_bp.route('/lances/ultimos', methods=['GET'])
 @token_required
 def get_ultimos_lances(current_user):
@@ -157,27 +259,11 @@ def get_ultimos_lances(current_user):
                    i.id, i.nome
             FROM lances l
             JOIN itens i ON l.item_id = i.id
-            ORDER BY l.data_lance DESC
+            ORDER BY l.data_lance DESC, l.id DESC
             LIMIT 5
         """)
         
-        lances = cursor.fetchall()
-        
-        result = []
-        for lance in lances:
-            result.append({
-                'id': lance[0],
-                'valor': float(lance[1]),
-                'nome_participante': lance[2],
-                'telefone': lance[3],
-                'data_lance': lance[4].isoformat(),
-                'item': {
-                    'id': lance[5],
-                    'nome': lance[6]
-                }
-            })
-        
-        return jsonify(result), 200
+        return jsonify(MAPA_LANCE_RECENTE.lista(cursor.fetchall())), 200
         
     except Exception as e:
         return jsonify({'message': f'Erro ao buscar últimos lances: {str(e)}'}), 500
@@ -189,57 +275,67 @@ def get_ultimos_lances(current_user):
 @lances_bp.route('/lances/exportar', methods=['GET'])
 @token_required
 def exportar_lances(current_user):
-    """Exporta lances em formato CSV."""
-    import csv
-    from io import StringIO
+    """Exporta lances em formato CSV, enviando as linhas conforme são lidas."""
+    filtros, params = _filtros_lances(request.args)
     
     conn = None
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
+        # Conexão própria e só de leitura: a transação não recebe um ID e, por
+        # mais que dure, não segura a marca d'água de /itens/changes
+        conn = create_dedicated_connection()
+        conn.set_session(readonly=True)
+        
+        # Cursor no servidor: as linhas chegam em blocos, sem carregar tudo na memória
+        cursor = conn.cursor(name='exportar_lances')
+        cursor.itersize = EXPORTACAO_LINHAS_POR_BLOCO
         cursor.execute("""
             SELECT l.id, i.nome as item, cat.nome as categoria, l.valor,
                    l.nome_participante, l.telefone, l.data_lance
             FROM lances l
             JOIN itens i ON l.item_id = i.id
             JOIN categorias cat ON i.categoria_id = cat.id
-            ORDER BY l.data_lance DESC
-        """)
-        
-        lances = cursor.fetchall()
-        
-        # Cria CSV em memória
-        output = StringIO()
-        writer = csv.writer(output)
-        
-        # Cabeçalho
-        writer.writerow(['ID', 'Item', 'Categoria', 'Valor', 'Participante', 'Telefone', 'Data'])
-        
-        # Dados
-        for lance in lances:
-            writer.writerow([
-                lance[0],
-                lance[1],
-                lance[2],
-                f'R$ {float(lance[3]):.2f}',
-                lance[4],
-                lance[5],
-                lance[6].strftime('%d/%m/%Y %H:%M:%S')
-            ])
-        
-        output.seek(0)
-        
-        from flask import Response
-        return Response(
-            output.getvalue(),
-            mimetype='text/csv',
-            headers={'Content-Disposition': 'attachment; filename=lances.csv'}
-        )
-        
+            WHERE 1=1
+        """ + filtros + " ORDER BY l.data_lance DESC, l.id DESC", params)
     except Exception as e:
+        if conn:
+            conn.close()
         return jsonify({'message': f'Erro ao exportar lances: {str(e)}'}), 500
     finally:
-        if conn:
+        # A conexão da requisição (verificação do token) não acompanha o envio
+        release_request_connection()
+    
+    def gerar():
+        try:
+            output = StringIO()
+            writer = csv.writer(output)
+            
+            # Cabeçalho
+            writer.writerow(['ID', 'Item', 'Categoria', 'Valor', 'Participante', 'Telefone', 'Data'])
+            
+            # Dados
+            for lance in cursor:
+                writer.writerow([
+                    lance[0],
+                    lance[1],
+                    lance[2],
+                    f'R$ {float(lance[3]):.2f}',
+                    lance[4],
+                    lance[5],
+                    lance[6].strftime('%d/%m/%Y %H:%M:%S')
+                ])
+                
+                if output.tell() >= EXPORTACAO_TAMANHO_PEDACO:
+                    yield output.getvalue()
+                    output.seek(0)
+                    output.truncate()
+            
+            yield output.getvalue()
+        finally:
             cursor.close()
-            release_db_connection(conn)
+            conn.close()
+    
+    return Response(
+        stream_with_context(gerar()),
+        mimetype='text/csv',
+        headers={'Content-Disposition': 'attachment; filename=lances.csv'}
+    )
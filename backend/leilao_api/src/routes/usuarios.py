@@ -1,10 +1,14 @@
 from flask import Blueprint, request, jsonify
-import bcrypt
 from src.db import get_db_connection, release_db_connection
-from src.auth import token_required, admin_required
+from src.auditoria import registrar_auditoria
+from src.auth import token_required, admin_required, revogar_tokens_usuario
+from src.senhas import gerar_hash, verificar_senha, SenhasOcupadas
+from src.serializacao import Mapeador
 
 usuarios_bp = Blueprint('usuarios', __name__)
 
+MAPA_USUARIO = Mapeador('id', 'nome', 'email', 'permissao')
+
 @usuarios_bp.route('/usuarios', methods=['GET'])
 @token_required
 @admin_required
@@ -18,14 +22,7 @@ def get_usuarios(current_user):
         cursor.execute("SELECT id, nome, email, permissao FROM usuarios ORDER BY nome")
         usuarios = cursor.fetchall()
         
-        result = []
-        for usuario in usuarios:
-            result.append({
-                'id': usuario[0],
-                'nome': usuario[1],
-                'email': usuario[2],
-                'permissao': usuario[3]
-            })
+        result = MAPA_USUARIO.lista(usuarios)
         
         return jsonify(result), 200
         
@@ -52,12 +49,7 @@ def get_usuario(current_user, id):
         if not usuario:
             return jsonify({'message': 'Usuário não encontrado!'}), 404
         
-        return jsonify({
-            'id': usuario[0],
-            'nome': usuario[1],
-            'email': usuario[2],
-            'permissao': usuario[3]
-        }), 200
+        return jsonify(MAPA_USUARIO(usuario)), 200
         
     except Exception as e:
         return jsonify({'message': f'Erro ao buscar usuário: {str(e)}'}), 500
@@ -88,7 +80,7 @@ def create_usuario(current_user):
             return jsonify({'message': 'Email já cadastrado!'}), 400
         
         # Hash da senha
-        senha_hash = bcrypt.hashpw(data['senha'].encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+        senha_hash = gerar_hash(data['senha'])
         
         cursor.execute("""
             INSERT INTO usuarios (nome, email, senha, permissao)
@@ -97,17 +89,15 @@ def create_usuario(current_user):
         """, (data['nome'], data['email'], senha_hash, data['permissao']))
         
         usuario_id = cursor.fetchone()[0]
-        conn.commit()
-        
-        # Registra na auditoria
-        cursor.execute(
-            "INSERT INTO auditoria (usuario_id, acao) VALUES (%s, %s)",
-            (current_user['id'], f"Criou o usuário '{data['nome']}' (ID: {usuario_id})")
-        )
+        registrar_auditoria(cursor, current_user['id'], f"Criou o usuário '{data['nome']}' (ID: {usuario_id})")
         conn.commit()
         
         return jsonify({'message': 'Usuário criado com sucesso!', 'id': usuario_id}), 201
         
+    except SenhasOcupadas:
+        if conn:
+            conn.rollback()
+        return jsonify({'message': 'Servidor ocupado, tente novamente em instantes.'}), 503, {'Retry-After': '1'}
     except Exception as e:
         if conn:
             conn.rollback()
@@ -133,7 +123,7 @@ def update_usuario(current_user, id):
         cursor = conn.cursor()
         
         # Verifica se o usuário existe
-        cursor.execute("SELECT nome FROM usuarios WHERE id = %s", (id,))
+        cursor.execute("SELECT nome, email, senha, permissao FROM usuarios WHERE id = %s", (id,))
         usuario = cursor.fetchone()
         
         if not usuario:
@@ -142,6 +132,8 @@ def update_usuario(current_user, id):
         # Atualiza os campos fornecidos
         fields = []
         values = []
+        # Tokens antigos carregam o email e a permissão anteriores
+        revogar = False
         
         if 'nome' in data:
             fields.append("nome = %s")
@@ -149,32 +141,39 @@ def update_usuario(current_user, id):
         if 'email' in data:
             fields.append("email = %s")
             values.append(data['email'])
+            revogar = revogar or data['email'] != usuario[1]
         if 'senha' in data:
-            senha_hash = bcrypt.hashpw(data['senha'].encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+            senha_hash = gerar_hash(data['senha'])
             fields.append("senha = %s")
             values.append(senha_hash)
+            revogar = revogar or not verificar_senha(data['senha'], usuario[2])
         if 'permissao' in data:
             fields.append("permissao = %s")
             values.append(data['permissao'])
+            revogar = revogar or data['permissao'] != usuario[3]
         
         if not fields:
             return jsonify({'message': 'Nenhum campo para atualizar!'}), 400
         
+        if revogar:
+            fields.append("token_versao = token_versao + 1")
+        
         values.append(id)
         query = f"UPDATE usuarios SET {', '.join(fields)} WHERE id = %s"
         
         cursor.execute(query, values)
+        registrar_auditoria(cursor, current_user['id'], f"Atualizou o usuário '{usuario[0]}' (ID: {id})")
         conn.commit()
         
-        # Registra na auditoria
-        cursor.execute(
-            "INSERT INTO auditoria (usuario_id, acao) VALUES (%s, %s)",
-            (current_user['id'], f"Atualizou o usuário '{usuario[0]}' (ID: {id})")
-        )
-        conn.commit()
+        if revogar:
+            revogar_tokens_usuario(id)
         
         return jsonify({'message': 'Usuário atualizado com sucesso!'}), 200
         
+    except SenhasOcupadas:
+        if conn:
+            conn.rollback()
+        return jsonify({'message': 'Servidor ocupado, tente novamente em instantes.'}), 503, {'Retry-After': '1'}
     except Exception as e:
         if conn:
             conn.rollback()
@@ -206,14 +205,9 @@ def delete_usuario(current_user, id):
             return jsonify({'message': 'Você não pode deletar seu próprio usuário!'}), 400
         
         cursor.execute("DELETE FROM usuarios WHERE id = %s", (id,))
+        registrar_auditoria(cursor, current_user['id'], f"Deletou o usuário '{usuario[0]}' (ID: {id})")
         conn.commit()
-        
-        # Registra na auditoria
-        cursor.execute(
-            "INSERT INTO auditoria (usuario_id, acao) VALUES (%s, %s)",
-            (current_user['id'], f"Deletou o usuário '{usuario[0]}' (ID: {id})")
-        )
-        conn.commit()
+        revogar_tokens_usuario(id)
         
         return jsonify({'message': 'Usuário deletado com sucesso!'}), 200
         
@@ -0,0 +1,90 @@
+"""Hash e verificação de senhas com bcrypt fora da thread da requisição.
+
+O bcrypt é caro de propósito: com muitos logins ao mesmo tempo (os voluntários
+entrando antes do evento), as threads da aplicação ficariam presas no hash e
+os lances do público esperariam. O trabalho vai para um pool com poucos
+trabalhadores e uma fila limitada; com a fila cheia, a requisição recebe 503
+em vez de esperar. O bcrypt libera o GIL durante o hash, então threads
+bastam para usar os núcleos.
+
+O custo do hash vem de BCRYPT_CUSTO. Senhas gravadas com outro custo são
+refeitas no próximo login.
+"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+
+import bcrypt
+
+from src.config import Config
+
+class SenhasOcupadas(Exception):
+    """A fila do hash de senhas está cheia ou não respondeu a tempo."""
+
+class PoolSenhas:
+    """Executa o bcrypt em poucas threads, com fila limitada."""
+
+    def __init__(self, trabalhadores=2, fila=32, timeout=10.0):
+        self._executor = ThreadPoolExecutor(max_workers=trabalhadores, thread_name_prefix='senhas')
+        self._vagas = threading.BoundedSemaphore(trabalhadores + fila)
+        self._timeout = timeout
+
+    def executar(self, funcao, *args):
+        """Executa funcao no pool e retorna o resultado, ou levanta SenhasOcupadas."""
+        if not self._vagas.acquire(blocking=False):
+            raise SenhasOcupadas("Fila de verificação de senhas cheia")
+        try:
+            futuro = self._executor.submit(funcao, *args)
+        except BaseException:
+            self._vagas.release()
+            raise
+        futuro.add_done_callback(lambda _: self._vagas.release())
+        try:
+            return futuro.result(timeout=self._timeout)
+        except TimeoutError:
+            raise SenhasOcupadas("Tempo esgotado aguardando a verificação da senha")
+
+    def fechar(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+pool_senhas = None
+
+def init_pool_senhas():
+    """Cria o pool de hash de senhas."""
+    global pool_senhas
+    pool_senhas = PoolSenhas(
+        trabalhadores=Config.SENHAS_TRABALHADORES,
+        fila=Config.SENHAS_FILA,
+        timeout=Config.SENHAS_TIMEOUT
+    )
+
+def close_pool_senhas():
+    if pool_senhas:
+        pool_senhas.fechar()
+
+def _executar(funcao, *args):
+    # Sem pool (comandos e scripts), o hash roda na própria thread
+    if pool_senhas is None:
+        return funcao(*args)
+    return pool_senhas.executar(funcao, *args)
+
+def _gerar_hash(senha, custo):
+    return bcrypt.hashpw(senha.encode('utf-8'), bcrypt.gensalt(custo)).decode('utf-8')
+
+def _verificar(senha, senha_hash):
+    return bcrypt.checkpw(senha.encode('utf-8'), senha_hash.encode('utf-8'))
+
+def gerar_hash(senha, custo=None):
+    """Retorna o hash bcrypt da senha, com o custo configurado se não informado."""
+    return _executar(_gerar_hash, senha, custo or Config.BCRYPT_CUSTO)
+
+def verificar_senha(senha, senha_hash):
+    """Indica se a senha confere com o hash."""
+    return _executar(_verificar, senha, senha_hash)
+
+def precisa_rehash(senha_hash):
+    """Indica se o hash foi gerado com um custo diferente do configurado."""
+    try:
+        return int(senha_hash.split('$')[2]) != Config.BCRYPT_CUSTO
+    except (IndexError, ValueError):
+        return True
@@ -0,0 +1,111 @@
+"""Serialização das linhas do banco para JSON.
+
+Cada consulta declara um Mapeador com os nomes das suas colunas, na ordem do
+SELECT, em vez de montar os dicts à mão com índices. Os valores seguem como
+vieram do banco: o provedor JSON da aplicação converte Decimal em número e
+datas no formato ISO 8601, usando orjson quando o pacote opcional estiver
+instalado.
+
+Para listagens grandes, o mesmo Mapeador gera a expressão json_build_object
+equivalente, para que o Postgres monte o JSON com json_agg.
+"""
+
+import json
+from datetime import date, datetime
+from decimal import Decimal
+
+from flask import current_app
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+class Mapeador:
+    """Converte linhas de uma consulta em dicts, pela posição das colunas.
+
+    Cada campo é um nome ou uma tupla ('grupo', 'campo', ...) para agrupar
+    as colunas seguintes num objeto aninhado:
+
+        Mapeador('id', 'nome', ('campanha', 'id', 'nome'))
+        # (1, 'Bolo', 2, 'Missões') -> {'id': 1, 'nome': 'Bolo',
+        #                              'campanha': {'id': 2, 'nome': 'Missões'}}
+    """
+
+    def __init__(self, *campos):
+        self.campos = campos
+        self.quantidade = 0
+        estrutura = []
+        for campo in campos:
+            if isinstance(campo, tuple):
+                grupo, subcampos = campo[0], campo[1:]
+                estrutura.append((grupo, tuple(zip(subcampos, range(self.quantidade, self.quantidade + len(subcampos))))))
+                self.quantidade += len(subcampos)
+            else:
+                estrutura.append((campo, self.quantidade))
+                self.quantidade += 1
+
+        if all(isinstance(campo, str) for campo in campos):
+            # Sem grupos, zip monta o dict sem laço em Python
+            def mapear(linha):
+                return dict(zip(campos, linha))
+        else:
+            def mapear(linha):
+                return {
+                    nome: {sub: linha[i] for sub, i in posicao} if isinstance(posicao, tuple) else linha[posicao]
+                    for nome, posicao in estrutura
+                }
+        self._mapear = mapear
+
+    def __call__(self, linha):
+        return self._mapear(linha)
+
+    def lista(self, linhas):
+        """Converte todas as linhas."""
+        return list(map(self._mapear, linhas))
+
+    def objeto_json(self, colunas):
+        """Expressão json_build_object com as colunas SQL informadas, na ordem dos campos."""
+        if len(colunas) != self.quantidade:
+            raise ValueError(f"Esperadas {self.quantidade} colunas, recebidas {len(colunas)}")
+        posicao = iter(colunas)
+        partes = []
+        for campo in self.campos:
+            if isinstance(campo, tuple):
+                internos = ', '.join(f"'{nome}', {next(posicao)}" for nome in campo[1:])
+                partes.append(f"'{campo[0]}', json_build_object({internos})")
+            else:
+                partes.append(f"'{campo}', {next(posicao)}")
+        return f"json_build_object({', '.join(partes)})"
+
+def converter_valor(valor):
+    """Converte os tipos do banco que o JSON não conhece."""
+    if isinstance(valor, Decimal):
+        return float(valor)
+    if isinstance(valor, (datetime, date)):
+        return valor.isoformat()
+    raise TypeError(f"Tipo {type(valor).__name__} não serializável em JSON")
+
+def serializar(obj):
+    """Serializa obj em JSON (bytes UTF-8)."""
+    if orjson:
+        return orjson.dumps(obj, default=converter_valor)
+    return json.dumps(obj, default=converter_valor, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+class ProvedorJson(DefaultJSONProvider):
+    """Provedor JSON da aplicação, usado por jsonify."""
+
+    def dumps(self, obj, **kwargs):
+        if kwargs:
+            kwargs.setdefault('default', converter_valor)
+            return json.dumps(obj, **kwargs)
+        return serializar(obj).decode('utf-8')
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(serializar(obj), mimetype=self.mimetype)
+
+def resposta_json_pronta(texto):
+    """Resposta com um JSON já montado (por exemplo, pelo json_agg do banco)."""
+    return current_app.response_class(texto, mimetype='application/json')
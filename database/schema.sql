@@ -1,3 +1,19 @@
+-- Esquema consolidado, equivalente a todas as migrações de
+-- backend/leilao_api/migrations aplicadas. Para atualizar um banco existente,
+-- use as migrações (python -m src.migracoes).
+
+-- Busca de itens sem acentos (unaccent) e por trechos (pg_trgm)
+CREATE EXTENSION unaccent;
+CREATE EXTENSION pg_trgm;
+
+CREATE OR REPLACE FUNCTION sem_acento(texto TEXT) RETURNS TEXT AS $$
+    SELECT public.unaccent('public.unaccent'::regdictionary, texto)
+$$ LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT;
+
+CREATE TEXT SEARCH CONFIGURATION portugues_sem_acento (COPY = portuguese);
+ALTER TEXT SEARCH CONFIGURATION portugues_sem_acento
+    ALTER MAPPING FOR hword, hword_part, word WITH unaccent, portuguese_stem;
+
 CREATE TABLE campanhas (
     id SERIAL PRIMARY KEY,
     nome VARCHAR(255) NOT NULL,
@@ -18,32 +34,165 @@ CREATE TABLE itens (
     categoria_id INTEGER NOT NULL REFERENCES categorias(id),
     banner_16_9 VARCHAR(255),
     banner_1_1 VARCHAR(255),
-    lance_inicial NUMERIC(10, 2) NOT NULL
+    lance_inicial NUMERIC(10, 2) NOT NULL,
+    -- Preço atual desnormalizado, atualizado junto com cada lance aceito
+    lance_atual NUMERIC(10, 2) NOT NULL,
+    lance_lider_id INTEGER,
+    total_lances INTEGER NOT NULL DEFAULT 0,
+    -- ID da última transação que alterou o item (feed de alterações)
+    versao BIGINT NOT NULL DEFAULT 0,
+    -- Nome indexado para a busca por texto (GET /api/itens/busca)
+    busca TSVECTOR GENERATED ALWAYS AS (to_tsvector('portugues_sem_acento'::regconfig, nome)) STORED
 );
 
+-- Lances particionados por campanha; as partições das campanhas encerradas
+-- podem ser movidas para lances_arquivo (flask arquivar-lances)
 CREATE TABLE lances (
-    id SERIAL PRIMARY KEY,
+    id SERIAL,
+    campanha_id INTEGER NOT NULL,
     item_id INTEGER NOT NULL REFERENCES itens(id),
     valor NUMERIC(10, 2) NOT NULL,
     nome_participante VARCHAR(255) NOT NULL,
     telefone VARCHAR(20) NOT NULL,
-    data_lance TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
-);
+    data_lance TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (id, campanha_id)
+) PARTITION BY LIST (campanha_id);
+
+CREATE TABLE lances_padrao PARTITION OF lances DEFAULT;
+
+CREATE TABLE lances_arquivo (
+    id INTEGER NOT NULL,
+    campanha_id INTEGER NOT NULL,
+    item_id INTEGER NOT NULL REFERENCES itens(id),
+    valor NUMERIC(10, 2) NOT NULL,
+    nome_participante VARCHAR(255) NOT NULL,
+    telefone VARCHAR(20) NOT NULL,
+    data_lance TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (id, campanha_id)
+) PARTITION BY LIST (campanha_id);
+
+-- Todos os lances, anexados ou arquivados, para recálculos e relatórios
+CREATE VIEW lances_historico AS
+    SELECT * FROM lances
+    UNION ALL
+    SELECT * FROM lances_arquivo;
+
+CREATE OR REPLACE FUNCTION criar_particao_lances(campanha INTEGER) RETURNS void AS $$
+DECLARE
+    nome TEXT := 'lances_campanha_' || campanha;
+BEGIN
+    IF to_regclass(nome) IS NOT NULL THEN
+        RETURN;
+    END IF;
+    EXECUTE format('CREATE TABLE %I (LIKE lances INCLUDING DEFAULTS)', nome);
+    EXECUTE format(
+        'WITH movidos AS (DELETE FROM lances_padrao WHERE campanha_id = %s RETURNING *)
+         INSERT INTO %I SELECT * FROM movidos',
+        campanha, nome
+    );
+    EXECUTE format('ALTER TABLE lances ATTACH PARTITION %I FOR VALUES IN (%s)', nome, campanha);
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION criar_particao_lances_campanha() RETURNS trigger AS $$
+BEGIN
+    PERFORM criar_particao_lances(NEW.id);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION remover_particao_lances_campanha() RETURNS trigger AS $$
+BEGIN
+    EXECUTE format('DROP TABLE IF EXISTS %I', 'lances_campanha_' || OLD.id);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER campanhas_particao_lances
+    AFTER INSERT ON campanhas
+    FOR EACH ROW EXECUTE FUNCTION criar_particao_lances_campanha();
+
+CREATE TRIGGER campanhas_remover_particao_lances
+    AFTER DELETE ON campanhas
+    FOR EACH ROW EXECUTE FUNCTION remover_particao_lances_campanha();
+
+-- Item trocado de campanha leva os seus lances para a partição da nova campanha
+CREATE OR REPLACE FUNCTION mover_lances_item() RETURNS trigger AS $$
+BEGIN
+    UPDATE lances SET campanha_id = NEW.campanha_id
+    WHERE campanha_id = OLD.campanha_id AND item_id = NEW.id;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER itens_mover_lances
+    AFTER UPDATE OF campanha_id ON itens
+    FOR EACH ROW
+    WHEN (OLD.campanha_id IS DISTINCT FROM NEW.campanha_id)
+    EXECUTE FUNCTION mover_lances_item();
+
+-- Publica cada lance gravado no canal 'lances_novos' (entregue no commit)
+CREATE OR REPLACE FUNCTION notificar_lance() RETURNS trigger AS $$
+BEGIN
+    PERFORM pg_notify('lances_novos', json_build_object(
+        'id', NEW.id,
+        'item_id', NEW.item_id,
+        'campanha_id', NEW.campanha_id,
+        'valor', NEW.valor,
+        'data_lance', NEW.data_lance
+    )::text);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER lances_notificar
+    AFTER INSERT ON lances
+    FOR EACH ROW EXECUTE FUNCTION notificar_lance();
 
 CREATE TABLE usuarios (
     id SERIAL PRIMARY KEY,
     nome VARCHAR(255) NOT NULL,
     email VARCHAR(255) NOT NULL UNIQUE,
     senha VARCHAR(255) NOT NULL, -- Armazenar hash da senha
-    permissao VARCHAR(50) NOT NULL CHECK (permissao IN ('admin', 'gestor', 'operador'))
+    permissao VARCHAR(50) NOT NULL CHECK (permissao IN ('admin', 'gestor', 'operador')),
+    token_versao INTEGER NOT NULL DEFAULT 0 -- Incrementada para invalidar os tokens emitidos
 );
 
+-- Auditoria particionada por mês (flask manter-particoes cria os meses seguintes)
 CREATE TABLE auditoria (
-    id SERIAL PRIMARY KEY,
+    id SERIAL,
     usuario_id INTEGER REFERENCES usuarios(id),
     acao TEXT NOT NULL,
-    data_acao TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
-);
+    data_acao TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (id, data_acao)
+) PARTITION BY RANGE (data_acao);
+
+CREATE TABLE auditoria_padrao PARTITION OF auditoria DEFAULT;
+
+CREATE OR REPLACE FUNCTION criar_particao_auditoria(mes DATE) RETURNS void AS $$
+DECLARE
+    inicio DATE := date_trunc('month', mes);
+    fim DATE := date_trunc('month', mes) + INTERVAL '1 month';
+    nome TEXT := 'auditoria_' || to_char(mes, 'YYYY_MM');
+BEGIN
+    IF to_regclass(nome) IS NOT NULL THEN
+        RETURN;
+    END IF;
+    EXECUTE format('CREATE TABLE %I (LIKE auditoria INCLUDING DEFAULTS)', nome);
+    EXECUTE format(
+        'WITH movidas AS (DELETE FROM auditoria_padrao WHERE data_acao >= %L AND data_acao < %L RETURNING *)
+         INSERT INTO %I SELECT * FROM movidas',
+        inicio, fim, nome
+    );
+    EXECUTE format(
+        'ALTER TABLE auditoria ATTACH PARTITION %I FOR VALUES FROM (%L) TO (%L)',
+        nome, inicio, fim
+    );
+END;
+$$ LANGUAGE plpgsql;
+
+SELECT criar_particao_auditoria((date_trunc('month', now()) + n * INTERVAL '1 month')::DATE)
+FROM generate_series(0, 2) n;
 
 CREATE TABLE configuracoes (
     id SERIAL PRIMARY KEY,
@@ -54,3 +203,239 @@ CREATE TABLE configuracoes (
     moeda VARCHAR(10) DEFAULT 'R$',
     mensagem_home TEXT
 );
+
+-- Índices para as consultas mais frequentes das rotas
+CREATE INDEX lances_item_data_idx ON lances (item_id, data_lance DESC, id DESC) INCLUDE (valor);
+CREATE INDEX lances_data_idx ON lances (data_lance DESC, id DESC);
+CREATE INDEX lances_arquivo_item_idx ON lances_arquivo (item_id, data_lance DESC, id DESC) INCLUDE (valor);
+CREATE INDEX itens_campanha_idx ON itens (campanha_id, id DESC);
+CREATE INDEX itens_categoria_idx ON itens (categoria_id);
+CREATE INDEX itens_busca_idx ON itens USING gin (busca);
+CREATE INDEX itens_nome_trgm_idx ON itens USING gin (sem_acento(nome) gin_trgm_ops);
+CREATE INDEX campanhas_status_ano_idx ON campanhas (status, ano DESC);
+CREATE INDEX auditoria_data_idx ON auditoria (data_acao DESC, id DESC);
+CREATE INDEX auditoria_usuario_idx ON auditoria (usuario_id);
+
+-- Versão dos itens e registro das exclusões para o feed de alterações
+CREATE OR REPLACE FUNCTION marcar_versao_item() RETURNS trigger AS $$
+BEGIN
+    NEW.versao := pg_current_xact_id()::text::BIGINT;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER itens_versao
+    BEFORE INSERT OR UPDATE ON itens
+    FOR EACH ROW EXECUTE FUNCTION marcar_versao_item();
+
+CREATE INDEX itens_versao_idx ON itens (versao);
+
+CREATE TABLE itens_removidos (
+    item_id INTEGER PRIMARY KEY,
+    campanha_id INTEGER NOT NULL,
+    versao BIGINT NOT NULL
+);
+
+CREATE INDEX itens_removidos_versao_idx ON itens_removidos (versao);
+
+CREATE OR REPLACE FUNCTION registrar_item_removido() RETURNS trigger AS $$
+BEGIN
+    INSERT INTO itens_removidos (item_id, campanha_id, versao)
+    VALUES (OLD.id, OLD.campanha_id, pg_current_xact_id()::text::BIGINT);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER itens_removidos_registrar
+    AFTER DELETE ON itens
+    FOR EACH ROW EXECUTE FUNCTION registrar_item_removido();
+
+-- Contadores do dashboard mantidos por triggers, distribuídos em 8 fatias
+CREATE TABLE resumo_dashboard (
+    fatia SMALLINT PRIMARY KEY,
+    campanhas_ativas BIGINT NOT NULL DEFAULT 0,
+    total_itens BIGINT NOT NULL DEFAULT 0,
+    total_lances BIGINT NOT NULL DEFAULT 0,
+    valor_arrecadado NUMERIC(14, 2) NOT NULL DEFAULT 0
+);
+
+INSERT INTO resumo_dashboard (fatia)
+SELECT generate_series(0, 7);
+
+CREATE OR REPLACE FUNCTION atualizar_resumo_lances() RETURNS trigger AS $$
+DECLARE
+    sorteada SMALLINT := floor(random() * 8);
+    delta_lances BIGINT := 0;
+    delta_valor NUMERIC := 0;
+BEGIN
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        SELECT delta_lances + COUNT(*), delta_valor + COALESCE(SUM(valor), 0)
+        INTO delta_lances, delta_valor FROM novos;
+    END IF;
+    IF TG_OP IN ('DELETE', 'UPDATE') THEN
+        SELECT delta_lances - COUNT(*), delta_valor - COALESCE(SUM(valor), 0)
+        INTO delta_lances, delta_valor FROM antigos;
+    END IF;
+    IF delta_lances <> 0 OR delta_valor <> 0 THEN
+        UPDATE resumo_dashboard
+        SET total_lances = total_lances + delta_lances,
+            valor_arrecadado = valor_arrecadado + delta_valor
+        WHERE fatia = sorteada;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION atualizar_resumo_itens() RETURNS trigger AS $$
+DECLARE
+    sorteada SMALLINT := floor(random() * 8);
+    delta BIGINT;
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        SELECT COUNT(*) INTO delta FROM novos;
+    ELSE
+        SELECT -COUNT(*) INTO delta FROM antigos;
+    END IF;
+    IF delta <> 0 THEN
+        UPDATE resumo_dashboard
+        SET total_itens = total_itens + delta
+        WHERE fatia = sorteada;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION atualizar_resumo_campanhas() RETURNS trigger AS $$
+DECLARE
+    sorteada SMALLINT := floor(random() * 8);
+    delta BIGINT := 0;
+BEGIN
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        SELECT delta + COUNT(*) INTO delta FROM novos WHERE status = 'ativa';
+    END IF;
+    IF TG_OP IN ('DELETE', 'UPDATE') THEN
+        SELECT delta - COUNT(*) INTO delta FROM antigos WHERE status = 'ativa';
+    END IF;
+    IF delta <> 0 THEN
+        UPDATE resumo_dashboard
+        SET campanhas_ativas = campanhas_ativas + delta
+        WHERE fatia = sorteada;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER lances_resumo_insert AFTER INSERT ON lances
+    REFERENCING NEW TABLE AS novos
+    FOR EACH STATEMENT EXECUTE FUNCTION atualizar_resumo_lances();
+CREATE TRIGGER lances_resumo_update AFTER UPDATE ON lances
+    REFERENCING NEW TABLE AS novos OLD TABLE AS antigos
+    FOR EACH STATEMENT EXECUTE FUNCTION atualizar_resumo_lances();
+CREATE TRIGGER lances_resumo_delete AFTER DELETE ON lances
+    REFERENCING OLD TABLE AS antigos
+    FOR EACH STATEMENT EXECUTE FUNCTION atualizar_resumo_lances();
+
+CREATE TRIGGER itens_resumo_insert AFTER INSERT ON itens
+    REFERENCING NEW TABLE AS novos
+    FOR EACH STATEMENT EXECUTE FUNCTION atualizar_resumo_itens();
+CREATE TRIGGER itens_resumo_delete AFTER DELETE ON itens
+    REFERENCING OLD TABLE AS antigos
+    FOR EACH STATEMENT EXECUTE FUNCTION atualizar_resumo_itens();
+
+CREATE TRIGGER campanhas_resumo_insert AFTER INSERT ON campanhas
+    REFERENCING NEW TABLE AS novos
+    FOR EACH STATEMENT EXECUTE FUNCTION atualizar_resumo_campanhas();
+CREATE TRIGGER campanhas_resumo_update AFTER UPDATE ON campanhas
+    REFERENCING NEW TABLE AS novos OLD TABLE AS antigos
+    FOR EACH STATEMENT EXECUTE FUNCTION atualizar_resumo_campanhas();
+CREATE TRIGGER campanhas_resumo_delete AFTER DELETE ON campanhas
+    REFERENCING OLD TABLE AS antigos
+    FOR EACH STATEMENT EXECUTE FUNCTION atualizar_resumo_campanhas();
+
+-- Resultado das campanhas encerradas, calculado na finalização
+CREATE TABLE resultados_campanhas (
+    campanha_id INTEGER PRIMARY KEY REFERENCES campanhas(id) ON DELETE CASCADE,
+    resultado JSON NOT NULL,
+    calculado_em TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    desatualizado BOOLEAN NOT NULL DEFAULT false
+);
+
+CREATE OR REPLACE FUNCTION invalidar_resultados_lances() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        UPDATE resultados_campanhas SET desatualizado = true
+        WHERE NOT desatualizado AND campanha_id IN (SELECT campanha_id FROM novos);
+    END IF;
+    IF TG_OP IN ('DELETE', 'UPDATE') THEN
+        UPDATE resultados_campanhas SET desatualizado = true
+        WHERE NOT desatualizado AND campanha_id IN (SELECT campanha_id FROM antigos);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION invalidar_resultados_itens() RETURNS trigger AS $$
+BEGIN
+    UPDATE resultados_campanhas SET desatualizado = true
+    WHERE NOT desatualizado AND campanha_id = OLD.campanha_id;
+    IF TG_OP = 'UPDATE' AND NEW.campanha_id <> OLD.campanha_id THEN
+        UPDATE resultados_campanhas SET desatualizado = true
+        WHERE NOT desatualizado AND campanha_id = NEW.campanha_id;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER lances_resultados_insert AFTER INSERT ON lances
+    REFERENCING NEW TABLE AS novos
+    FOR EACH STATEMENT EXECUTE FUNCTION invalidar_resultados_lances();
+CREATE TRIGGER lances_resultados_update AFTER UPDATE ON lances
+    REFERENCING NEW TABLE AS novos OLD TABLE AS antigos
+    FOR EACH STATEMENT EXECUTE FUNCTION invalidar_resultados_lances();
+CREATE TRIGGER lances_resultados_delete AFTER DELETE ON lances
+    REFERENCING OLD TABLE AS antigos
+    FOR EACH STATEMENT EXECUTE FUNCTION invalidar_resultados_lances();
+
+-- Os lances arquivados são justamente os das campanhas encerradas
+CREATE TRIGGER lances_arquivo_resultados_update AFTER UPDATE ON lances_arquivo
+    REFERENCING NEW TABLE AS novos OLD TABLE AS antigos
+    FOR EACH STATEMENT EXECUTE FUNCTION invalidar_resultados_lances();
+CREATE TRIGGER lances_arquivo_resultados_delete AFTER DELETE ON lances_arquivo
+    REFERENCING OLD TABLE AS antigos
+    FOR EACH STATEMENT EXECUTE FUNCTION invalidar_resultados_lances();
+
+-- Só as colunas que aparecem no resultado: o UPDATE do preço a cada lance não dispara
+CREATE TRIGGER itens_resultados_update
+    AFTER UPDATE OF nome, categoria_id, lance_inicial, campanha_id ON itens
+    FOR EACH ROW EXECUTE FUNCTION invalidar_resultados_itens();
+CREATE TRIGGER itens_resultados_delete
+    AFTER DELETE ON itens
+    FOR EACH ROW EXECUTE FUNCTION invalidar_resultados_itens();
+
+-- Versões dos grupos de dados do cache de leitura, compartilhadas entre os
+-- processos da aplicação; nextval não trava nem depende da transação
+CREATE SEQUENCE versao_cache_itens;
+CREATE SEQUENCE versao_cache_campanhas;
+CREATE SEQUENCE versao_cache_categorias;
+CREATE SEQUENCE versao_cache_configuracoes;
+
+-- Migrações já contidas neste esquema, para que o comando migrar não as
+-- reaplique; acrescente aqui cada nova migração consolidada no arquivo
+CREATE TABLE schema_migracoes (
+    versao INTEGER PRIMARY KEY,
+    nome VARCHAR(255) NOT NULL,
+    aplicada_em TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+
+INSERT INTO schema_migracoes (versao, nome) VALUES
+    (1, 'esquema_inicial'),
+    (2, 'preco_atual_itens'),
+    (3, 'notificacao_lances'),
+    (4, 'indices_desempenho'),
+    (5, 'resumo_dashboard'),
+    (6, 'versao_itens'),
+    (7, 'particionamento'),
+    (8, 'resultados_campanhas'),
+    (9, 'busca_itens'),
+    (10, 'versoes_cache'),
+    (11, 'versao_token');
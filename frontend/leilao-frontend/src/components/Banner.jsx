@@ -0,0 +1,45 @@
+const API_URL = import.meta.env.VITE_API_URL || '/api';
+
+// Larguras geradas pela API para cada formato (src/imagens.py)
+const LARGURAS = {
+  '16_9': [480, 960, 1600],
+  '1_1': [320, 640, 960],
+};
+
+const PADRAO_VARIANTE = /^\/api\/imagens\/([0-9a-f]{32})\/(16_9|1_1)-\d+\.jpg$/;
+
+// URLs da API são relativas a ela, que no desenvolvimento fica em outra origem
+function urlApi(caminho) {
+  return API_URL.replace(/\/api\/?$/, '') + caminho;
+}
+
+function srcSet(chave, formato, extensao) {
+  return LARGURAS[formato]
+    .map((largura) => `${urlApi(`/api/imagens/${chave}/${formato}-${largura}.${extensao}`)} ${largura}w`)
+    .join(', ');
+}
+
+// Banner com as variantes geradas no upload (WebP e várias larguras);
+// URLs antigas, ainda não convertidas, são exibidas como estão
+export default function Banner({ src, alt, sizes = '100vw', loading = 'lazy', className }) {
+  const variante = PADRAO_VARIANTE.exec(src);
+  if (!variante) {
+    return <img src={src} alt={alt} className={className} loading={loading} decoding="async" />;
+  }
+
+  const [, chave, formato] = variante;
+  return (
+    <picture>
+      <source type="image/webp" srcSet={srcSet(chave, formato, 'webp')} sizes={sizes} />
+      <img
+        src={urlApi(src)}
+        srcSet={srcSet(chave, formato, 'jpg')}
+        sizes={sizes}
+        alt={alt}
+        className={className}
+        loading={loading}
+        decoding="async"
+      />
+    </picture>
+  );
+}
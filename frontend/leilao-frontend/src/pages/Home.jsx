@@ -1,27 +1,63 @@
-import { useEffect, useState } from 'react';
+import { useEffect, useRef, useState } from 'react';
 import { useNavigate } from 'react-router-dom';
 import api from '../services/api';
 import { Card, CardContent } from '@/components/ui/card';
 import { Badge } from '@/components/ui/badge';
+import Banner from '@/components/Banner';
 import { Loader2 } from 'lucide-react';
 
 export default function Home() {
   const [itens, setItens] = useState([]);
   const [config, setConfig] = useState(null);
   const [loading, setLoading] = useState(true);
+  const versao = useRef(null);
   const navigate = useNavigate();
 
   useEffect(() => {
     loadData();
   }, []);
 
+  // Busca periodicamente só os itens criados, alterados ou removidos
+  useEffect(() => {
+    const interval = setInterval(async () => {
+      if (versao.current === null) return;
+      try {
+        const changes = await api.getItensChanges(versao.current);
+        versao.current = changes.versao;
+        if (changes.itens.length === 0 && changes.removidos.length === 0) return;
+        setItens(prev => {
+          const porId = new Map(prev.map(item => [item.id, item]));
+          changes.removidos.forEach(id => porId.delete(id));
+          changes.itens.forEach(item => porId.set(item.id, item));
+          return [...porId.values()].sort((a, b) => b.id - a.id);
+        });
+      } catch (error) {
+        console.error('Erro ao atualizar itens:', error);
+      }
+    }, 30000);
+    return () => clearInterval(interval);
+  }, []);
+
+  // Atualiza os preços da listagem conforme os lances chegam
+  useEffect(() => {
+    const source = api.streamLances({}, (lance) => {
+      setItens(prev => prev.map(item => (
+        item.id === lance.item_id && lance.valor > item.lance_atual
+          ? { ...item, lance_atual: lance.valor, total_lances: (item.total_lances || 0) + 1 }
+          : item
+      )));
+    }, loadData);
+    return () => source.close();
+  }, []);
+
   const loadData = async () => {
     try {
       const [itensData, configData] = await Promise.all([
-        api.getItens(),
+        api.getItensChanges(),
         api.getConfiguracoes()
       ]);
-      setItens(itensData);
+      versao.current = itensData.versao;
+      setItens(itensData.itens);
       setConfig(configData);
     } catch (error) {
       console.error('Erro ao carregar dados:', error);
@@ -83,9 +119,10 @@ export default function Home() {
                     {/* Banner */}
                     <div className="md:w-2/5 bg-gray-200 aspect-video md:aspect-auto">
                       {item.banner_16_9 ? (
-                        <img
+                        <Banner
                           src={item.banner_16_9}
                           alt={item.nome}
+                          sizes="(min-width: 768px) 40vw, 100vw"
                           className="w-full h-full object-cover"
                         />
                       ) : (
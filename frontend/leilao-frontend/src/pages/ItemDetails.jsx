@@ -3,6 +3,7 @@ import { useParams, useNavigate } from 'react-router-dom';
 import api from '../services/api';
 import { Card, CardContent, CardHeader, CardTitle } from '@/components/ui/card';
 import { Badge } from '@/components/ui/badge';
+import Banner from '@/components/Banner';
 import { Input } from '@/components/ui/input';
 import { Label } from '@/components/ui/label';
 import { Button } from '@/components/ui/button';
@@ -27,6 +28,27 @@ export default function ItemDetails() {
     loadData();
   }, [id]);
 
+  // Atualiza o lance atual assim que novos lances são aceitos
+  useEffect(() => {
+    const source = api.streamLances({ item_id: id }, (lance) => {
+      setItem(prev => {
+        if (!prev || prev.ultimos_lances?.some(l => l.id === lance.id)) {
+          return prev;
+        }
+        return {
+          ...prev,
+          lance_atual: Math.max(prev.lance_atual, lance.valor),
+          total_lances: (prev.total_lances || 0) + 1,
+          ultimos_lances: [
+            { id: lance.id, valor: lance.valor, data: lance.data_lance },
+            ...(prev.ultimos_lances || [])
+          ].slice(0, 3)
+        };
+      });
+    }, loadData);
+    return () => source.close();
+  }, [id]);
+
   const loadData = async () => {
     try {
       const [itemData, configData] = await Promise.all([
@@ -188,9 +210,11 @@ export default function ItemDetails() {
               <CardContent className="p-0">
                 <div className="aspect-video bg-gray-200">
                   {item.banner_16_9 ? (
-                    <img
+                    <Banner
                       src={item.banner_16_9}
                       alt={item.nome}
+                      sizes="(min-width: 768px) 50vw, 100vw"
+                      loading="eager"
                       className="w-full h-full object-cover"
                     />
                   ) : (
@@ -230,9 +254,9 @@ export default function ItemDetails() {
                 </CardHeader>
                 <CardContent>
                   <div className="space-y-2">
-                    {item.ultimos_lances.map((lance, index) => (
+                    {item.ultimos_lances.map((lance) => (
                       <div
-                        key={index}
+                        key={lance.id}
                         className="flex justify-between items-center py-2 border-b last:border-0"
                       >
                         <span className="font-semibold">
@@ -3,6 +3,8 @@ const API_URL = import.meta.env.VITE_API_URL || '/api';
 class ApiService {
   constructor() {
     this.baseURL = API_URL;
+    // Última resposta de cada GET com ETag, reaproveitada quando a API responde 304
+    this.validators = new Map();
   }
 
   getHeaders(includeAuth = false) {
@@ -30,14 +32,30 @@ class ApiService {
       },
     };
 
+    const isGet = !config.method || config.method === 'GET';
+    const cached = isGet ? this.validators.get(url) : null;
+    if (cached) {
+      config.headers['If-None-Match'] = cached.etag;
+    }
+
     try {
       const response = await fetch(url, config);
+
+      if (response.status === 304 && cached) {
+        return cached.data;
+      }
+
       const data = await response.json();
 
       if (!response.ok) {
         throw new Error(data.message || 'Erro na requisição');
       }
 
+      const etag = response.headers.get('ETag');
+      if (isGet && etag) {
+        this.validators.set(url, { etag, data });
+      }
+
       return data;
     } catch (error) {
       console.error('API Error:', error);
@@ -120,6 +138,16 @@ class ApiService {
     return this.request(`/itens${query}`);
   }
 
+  // Itens alterados desde a versão informada; sem versão, retorna todos.
+  // Devolve { itens, removidos, versao }: envie a versao na próxima chamada.
+  async getItensChanges(since = null, campanhaId = null) {
+    const params = new URLSearchParams();
+    if (since !== null) params.append('since', since);
+    if (campanhaId) params.append('campanha_id', campanhaId);
+    const query = params.toString() ? `?${params.toString()}` : '';
+    return this.request(`/itens/changes${query}`);
+  }
+
   async getItem(id) {
     return this.request(`/itens/${id}`);
   }
@@ -147,7 +175,7 @@ class ApiService {
     });
   }
 
-  // Lances
+  // Lances (paginados: retorna { lances, proximo }; envie proximo como cursor)
   async getLances(filters = {}) {
     const params = new URLSearchParams(filters);
     return this.request(`/lances?${params.toString()}`, { auth: true });
@@ -160,6 +188,29 @@ class ApiService {
     });
   }
 
+  // Stream de lances em tempo real (Server-Sent Events); o navegador
+  // reconecta sozinho enviando o Last-Event-ID. A retomada pode reenviar
+  // lances já recebidos, descartados aqui pelo id. Se faltarem lances demais
+  // para retomar, chega o evento recarregar: busque o estado atual de novo
+  streamLances(filters = {}, onLance, onRecarregar) {
+    const params = new URLSearchParams(filters);
+    const source = new EventSource(`${this.baseURL}/lances/stream?${params.toString()}`);
+    const recebidos = new Set();
+    source.addEventListener('lance', (event) => {
+      const lance = JSON.parse(event.data);
+      if (recebidos.has(lance.id)) return;
+      recebidos.add(lance.id);
+      if (recebidos.size > 2000) {
+        recebidos.delete(recebidos.values().next().value);
+      }
+      onLance(lance);
+    });
+    source.addEventListener('recarregar', () => {
+      if (onRecarregar) onRecarregar();
+    });
+    return source;
+  }
+
   async getUltimosLances() {
     return this.request('/lances/ultimos', { auth: true });
   }
@@ -181,8 +232,10 @@ class ApiService {
     });
   }
 
-  async getAuditoria() {
-    return this.request('/auditoria', { auth: true });
+  // Retorna { auditoria, proximo }; envie proximo como cursor para a próxima página
+  async getAuditoria(filters = {}) {
+    const params = new URLSearchParams(filters);
+    return this.request(`/auditoria?${params.toString()}`, { auth: true });
   }
 
   // Usuários